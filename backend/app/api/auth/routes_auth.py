@@ -1,20 +1,15 @@
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel, EmailStr
-import jwt, datetime, json
+import jwt, datetime
 from uuid import uuid4
-from pathlib import Path
 from typing import Optional
+from app.db.user_store import UserExistsError, get_user_store
+from app.api.auth.token_cache import token_cache
 
 SECRET_KEY = "supersecretkey"
 
 router = APIRouter(prefix="/auth", tags=["Auth"])
 
-# === Файл користувачів ===
-data_path = Path(__file__).resolve().parent.parent.parent / "data" / "users.json"
-data_path.parent.mkdir(exist_ok=True)
-if not data_path.exists():
-    data_path.write_text("[]", encoding="utf-8")
-
 # === Моделі ===
 class RegisterRequest(BaseModel):
     username: str
@@ -27,12 +22,6 @@ class LoginRequest(BaseModel):
     password: str
 
 # === Утиліти ===
-def load_users():
-    return json.loads(data_path.read_text(encoding="utf-8"))
-
-def save_users(users):
-    data_path.write_text(json.dumps(users, indent=2, ensure_ascii=False), encoding="utf-8")
-
 def generate_token(user_id: str):
     payload = {
         "id": user_id,
@@ -44,9 +33,15 @@ def generate_token(user_id: str):
 def decode_token(token: str) -> Optional[str]:
     """
     Перевіряє JWT токен і повертає ID користувача, якщо токен валідний.
+    Вже перевірені токени беруться з кешу до закінчення їх терміну дії.
     """
+    found, user_id = token_cache.get(token, SECRET_KEY)
+    if found:
+        return user_id
+
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=["HS256"])
+        token_cache.put(token, SECRET_KEY, payload.get("id"), payload.get("exp"))
         return payload.get("id")
     except jwt.ExpiredSignatureError:
         raise HTTPException(status_code=401, detail="Токен протерміновано")
@@ -56,11 +51,6 @@ def decode_token(token: str) -> Optional[str]:
 # === Ендпоінти ===
 @router.post("/register")
 def register(data: RegisterRequest):
-    users = load_users()
-
-    if any(u["username"] == data.username for u in users):
-        raise HTTPException(status_code=400, detail="Користувач із таким логіном вже існує")
-
     new_user = {
         "id": str(uuid4()),
         "username": data.username,
@@ -69,8 +59,11 @@ def register(data: RegisterRequest):
         "password": data.password
     }
 
-    users.append(new_user)
-    save_users(users)
+    # унікальність логіна перевіряє сховище атомарно (UNIQUE у базі)
+    try:
+        get_user_store().create(new_user)
+    except UserExistsError:
+        raise HTTPException(status_code=400, detail="Користувач із таким логіном вже існує")
 
     token = generate_token(new_user["id"])
 
@@ -82,10 +75,9 @@ def register(data: RegisterRequest):
 
 @router.post("/login")
 def login(data: LoginRequest):
-    users = load_users()
-    user = next((u for u in users if u["username"] == data.username and u["password"] == data.password), None)
+    user = get_user_store().get_by_username(data.username)
 
-    if not user:
+    if not user or user["password"] != data.password:
         raise HTTPException(status_code=401, detail="Невірний логін або пароль")
 
     token = generate_token(user["id"])
@@ -95,3 +87,8 @@ def login(data: LoginRequest):
         "user": {"username": user["username"], "full_name": user["full_name"]},
         "token": token
     }
+
+@router.get("/token-cache")
+def get_token_cache_stats():
+    """Статистика кешу перевірених токенів."""
+    return token_cache.stats()
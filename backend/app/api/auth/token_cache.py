@@ -0,0 +1,82 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+
+class TokenCache:
+    """
+    Кеш перевірених JWT: token → (user_id, exp).
+
+    Повторний запит із тим самим токеном обходиться без перевірки підпису.
+    Запис живе до exp токена; зміна секрету очищує кеш повністю.
+    """
+
+    def __init__(self, maxsize: int = 10000):
+        self.maxsize = maxsize
+        self._data: "OrderedDict[str, Tuple[Optional[str], float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._secret_id: Optional[str] = None
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+
+    @staticmethod
+    def _fingerprint(secret: str) -> str:
+        return hashlib.sha256(secret.encode("utf-8")).hexdigest()
+
+    def _check_secret(self, secret: str) -> None:
+        secret_id = self._fingerprint(secret)
+        if secret_id != self._secret_id:
+            self._data.clear()
+            self._secret_id = secret_id
+
+    def get(self, token: str, secret: str) -> Tuple[bool, Optional[str]]:
+        """(знайдено, user_id) для ще чинного токена."""
+        with self._lock:
+            self._check_secret(secret)
+            item = self._data.get(token)
+            if item is None:
+                self.misses += 1
+                return False, None
+            user_id, exp = item
+            if exp <= time.time():
+                del self._data[token]
+                self.expired += 1
+                self.misses += 1
+                return False, None
+            self._data.move_to_end(token)
+            self.hits += 1
+            return True, user_id
+
+    def put(self, token: str, secret: str, user_id: Optional[str], exp: Any) -> None:
+        if exp is None:
+            return
+        with self._lock:
+            self._check_secret(secret)
+            self._data[token] = (user_id, float(exp))
+            self._data.move_to_end(token)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "expired": self.expired,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+        }
+
+
+token_cache = TokenCache()
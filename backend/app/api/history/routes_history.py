@@ -1,32 +1,34 @@
-from fastapi import APIRouter, HTTPException, Header
+from fastapi import APIRouter, HTTPException, Header, Query, Response
 from app.api.auth.routes_auth import decode_token
-from pathlib import Path
-import json
+from app.db.history_store import get_history_store, load_history
+from app.services.bom import RESULT_FORMATS, format_result
+from app.services.history_writer import history_writer
+from typing import Optional
 
 router = APIRouter(prefix="/history", tags=["History"])
 
-HISTORY_FILE = Path(__file__).resolve().parent.parent.parent / "db" / "history.json"
-HISTORY_FILE.parent.mkdir(parents=True, exist_ok=True)
-
-# --- Завантаження історії ---
-def load_history():
-    if not HISTORY_FILE.exists():
-        return []
-    try:
-        return json.loads(HISTORY_FILE.read_text(encoding="utf-8"))
-    except json.JSONDecodeError:
-        return []
-
-# --- Збереження історії ---
-def save_history(data):
-    HISTORY_FILE.write_text(json.dumps(data, indent=2, ensure_ascii=False), encoding="utf-8")
-
 # --- Отримання історії ---
 @router.get("/list")
-def get_history(token: str = Header(None)):
+def get_history(
+    response: Response,
+    token: str = Header(None),
+    limit: Optional[int] = Query(None, ge=1, le=500),
+    cursor: Optional[int] = Query(None, ge=1),
+    response_format: str = Query("full", alias="format", description="full | bom"),
+):
     """
     Повертає історію лише для поточного користувача.
+
+    З limit повертається сторінка найновіших записів (старших за cursor),
+    а курсор наступної сторінки — у заголовку X-Next-Cursor. Результати
+    зберігаються як специфікація (bom); format=full (за замовчуванням)
+    розгортає їх у запис на кожну одиницю, як раніше. Перед читанням
+    дописується черга фонового записувача, тож видно й щойно створені
+    конфігурації.
     """
+    if response_format not in RESULT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Невідомий формат відповіді: {response_format}")
+
     if not token:
         raise HTTPException(status_code=401, detail="Токен відсутній")
 
@@ -35,8 +37,13 @@ def get_history(token: str = Header(None)):
     except Exception:
         raise HTTPException(status_code=401, detail="Недійсний токен")
 
-    history = load_history()
-    user_history = [h for h in history if h.get("user_id") == user_id]
+    history_writer.flush()
+    user_history, next_cursor = load_history(user_id, limit=limit, cursor=cursor)
+    if next_cursor is not None:
+        response.headers["X-Next-Cursor"] = str(next_cursor)
+    for entry in user_history:
+        if isinstance(entry.get("result"), dict):
+            entry["result"] = format_result(entry["result"], response_format)
     return user_history
 
 
@@ -45,6 +52,10 @@ def get_history(token: str = Header(None)):
 def clear_history(token: str = Header(None)):
     """
     Видаляє історію лише для поточного користувача.
+
+    Спершу дописується черга фонового записувача: надгробок ставиться на
+    найбільший id, тож записи, що ще чекали в черзі, інакше пережили б
+    очищення.
     """
     if not token:
         raise HTTPException(status_code=401, detail="Токен відсутній")
@@ -54,9 +65,14 @@ def clear_history(token: str = Header(None)):
     except Exception:
         raise HTTPException(status_code=401, detail="Недійсний токен")
 
-    history = load_history()
-    updated_history = [h for h in history if h.get("user_id") != user_id]
-
-    save_history(updated_history)
+    history_writer.flush()
+    get_history_store().clear_user(user_id)
 
     return {"message": "Історію успішно очищено"}
+
+
+# --- Метрики фонового записувача ---
+@router.get("/writer")
+def get_writer_stats():
+    """Глибина черги та затримки запису пачок історії."""
+    return history_writer.stats()
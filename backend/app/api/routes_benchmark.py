@@ -1,20 +1,183 @@
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
-from app.services.benchmark import BenchmarkService
+from typing import List, Optional
+from app.services.benchmark_jobs import JobQueueFull, benchmark_jobs, wait_for_job
+from app.services.benchmark_suite import FUNCTION_SCENARIOS, default_output_path
+from app.services.benchmark_scaling import (
+    check_baseline_names, geometric_sizes, list_baselines,
+)
 
 router = APIRouter()
-service = BenchmarkService()
 
 class BenchmarkRequest(BaseModel):
     n: int
+    seed: Optional[int] = None      # однаковий seed — однаковий датасет
+    persist: bool = False           # зберегти датасет на диск для повторних запусків
 
-@router.post("/run")
-def run_benchmark(req: BenchmarkRequest):
+def _check_run(req: BenchmarkRequest) -> None:
     if req.n < 10 or req.n > 1000000:
         raise HTTPException(status_code=400, detail="N має бути від 10 до 100 000")
-    
+
+
+@router.post("/run")
+async def run_benchmark(req: BenchmarkRequest):
+    _check_run(req)
+    return await _run_job("run", req.dict())
+
+
+class SuiteRequest(BaseModel):
+    n: Optional[int] = None         # None — реальний каталог
+    seed: int = 0
+    warmup: int = 3
+    repetitions: int = 20
+    priorities: Optional[List[str]] = None
+    functions: Optional[List[str]] = None
+    terrains: Optional[List[str]] = None
+    complexity: Optional[List[int]] = None
+    save: bool = True               # записати JSON у data/benchmarks
+
+
+def _check_suite(req: SuiteRequest) -> None:
+    if req.n is not None and (req.n < 10 or req.n > 1000000):
+        raise HTTPException(status_code=400, detail="N має бути від 10 до 1 000 000")
+    if req.warmup < 0 or not 1 <= req.repetitions <= 1000:
+        raise HTTPException(status_code=400, detail="Некоректна кількість прогрівів або повторень")
+    unknown = set(req.functions or ()) - set(FUNCTION_SCENARIOS)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Невідомий сценарій: {', '.join(sorted(unknown))}")
+
+
+def _suite_params(req: SuiteRequest) -> dict:
+    params = req.dict()
+    params["out"] = default_output_path() if params.pop("save") else None
+    return params
+
+
+@router.post("/suite")
+async def run_benchmark_suite(req: SuiteRequest):
+    """Матриця сценаріїв з прогрівом, повтореннями, перцентилями та пам'яттю."""
+    _check_suite(req)
+    return await _run_job("suite", _suite_params(req))
+
+
+class ScalingRequest(BaseModel):
+    sizes: Optional[List[int]] = None   # явний набір n; інакше геометричний ряд
+    max_n: int = 1000000
+    factor: float = 10.0
+    seed: int = 0
+    repetitions: int = 5
+    save_as: Optional[str] = None       # зберегти як іменовану базову лінію
+    compare_to: Optional[str] = None    # порівняти з базовою лінією
+    tolerance: float = 0.25
+    exponent_tolerance: float = 0.15
+    assembly: bool = False              # також перевірка з'єднань на збірках до тисяч деталей
+    assembly_sizes: Optional[List[int]] = None  # розміри збірок; інакше ASSEMBLY_SIZES
+
+
+def _scaling_params(req: ScalingRequest) -> dict:
+    if req.sizes:
+        sizes = req.sizes
+    elif req.factor > 1:
+        sizes = geometric_sizes(10, req.max_n, req.factor)
+    else:
+        sizes = None
+    if not sizes or any(n < 10 or n > 1000000 for n in sizes):
+        raise HTTPException(status_code=400, detail="N має бути від 10 до 1 000 000")
+    if req.assembly_sizes and any(n < 1 or n > 100000 for n in req.assembly_sizes):
+        raise HTTPException(status_code=400, detail="Розмір збірки має бути від 1 до 100 000")
+    if not 1 <= req.repetitions <= 100 or req.tolerance < 0:
+        raise HTTPException(status_code=400, detail="Некоректна кількість повторень або допуск")
     try:
-        result = service.run_benchmark(req.n)
-        return result
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        check_baseline_names(req.save_as, req.compare_to)
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return {
+        "sizes": sizes,
+        "seed": req.seed,
+        "repetitions": req.repetitions,
+        "save_as": req.save_as,
+        "compare_to": req.compare_to,
+        "tolerance": req.tolerance,
+        "exponent_tolerance": req.exponent_tolerance,
+        "assembly": req.assembly,
+        "assembly_sizes": req.assembly_sizes,
+    }
+
+
+@router.post("/scaling")
+async def run_benchmark_scaling(req: ScalingRequest):
+    """Крива масштабування, показники складності та порівняння з базовою лінією."""
+    return await _run_job("scaling", _scaling_params(req))
+
+
+@router.get("/baselines")
+def get_baselines():
+    return {"baselines": list_baselines()}
+
+
+# ---------------- ФОНОВІ ЗАДАЧІ ---------------- #
+
+def _submit(kind: str, params: dict):
+    try:
+        return benchmark_jobs.submit(kind, params)
+    except JobQueueFull:
+        raise HTTPException(status_code=429, detail="Черга бенчмарків переповнена, спробуйте пізніше")
+
+
+async def _run_job(kind: str, params: dict):
+    """
+    Синхронний для клієнта прогін: виконується як фонова задача в окремому
+    процесі, а запит лише асинхронно чекає результат, не займаючи потік.
+    """
+    job = await wait_for_job(_submit(kind, params))
+    if job.status != "done":
+        raise HTTPException(status_code=500, detail=job.error or "Бенчмарк скасовано")
+    return job.result
+
+
+def _get_job(job_id: str):
+    job = benchmark_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Задачу не знайдено")
+    return job
+
+
+@router.post("/jobs/run", status_code=202)
+def submit_run_job(req: BenchmarkRequest):
+    _check_run(req)
+    return _submit("run", req.dict()).to_dict(include_result=False)
+
+
+@router.post("/jobs/suite", status_code=202)
+def submit_suite_job(req: SuiteRequest):
+    _check_suite(req)
+    return _submit("suite", _suite_params(req)).to_dict(include_result=False)
+
+
+@router.post("/jobs/scaling", status_code=202)
+def submit_scaling_job(req: ScalingRequest):
+    return _submit("scaling", _scaling_params(req)).to_dict(include_result=False)
+
+
+@router.get("/jobs")
+def list_jobs():
+    return {
+        "stats": benchmark_jobs.stats(),
+        "jobs": [job.to_dict(include_result=False) for job in benchmark_jobs.list()],
+    }
+
+
+@router.get("/jobs/{job_id}")
+def get_job(job_id: str):
+    return _get_job(job_id).to_dict()
+
+
+@router.delete("/jobs/{job_id}")
+def cancel_job(job_id: str):
+    job = _get_job(job_id)
+    if job.finished:
+        raise HTTPException(status_code=409, detail=f"Задачу вже завершено ({job.status})")
+    return benchmark_jobs.cancel(job_id).to_dict(include_result=False)
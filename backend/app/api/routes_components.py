@@ -1,17 +1,126 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Header, Query, Response
+from typing import Optional
 from app.db.repo import Repo
+from app.services.component_pages import PageError, get_component_pages
 
 router = APIRouter(prefix="/components", tags=["Components"])
 
+
+def _split(value: Optional[str]):
+    return [v.strip() for v in value.split(",") if v.strip()] if value else []
+
+
+def _etag_matches(if_none_match: Optional[str], etags) -> bool:
+    """
+    Слабке порівняння (RFC 9110) для If-None-Match: W/"…" від проксі чи CDN,
+    що перестиснули відповідь, збігається з нашим сильним тегом.
+    """
+    if not if_none_match:
+        return False
+    tags = {_opaque_tag(t) for t in if_none_match.split(",")}
+    return "*" in tags or any(_opaque_tag(tag) in tags for tag in etags)
+
+
+def _opaque_tag(tag: str) -> str:
+    tag = tag.strip()
+    return tag[2:] if tag.startswith("W/") else tag
+
+
 @router.get("")
-def get_components():
+def get_components(
+    fields: Optional[str] = Query(None, description="list | all | поле,поле,..."),
+    category: Optional[str] = Query(None, description="категорія або кілька через кому"),
+    domain: Optional[str] = Query(None, description="ground | air | water | universal (через кому)"),
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    cursor: Optional[int] = Query(None, description="id останнього запису попередньої сторінки"),
+    if_none_match: Optional[str] = Header(None),
+    accept_encoding: Optional[str] = Header(None),
+):
     """
-    Повертає список усіх доступних LEGO-компонентів.
+    Повертає список доступних LEGO-компонентів.
+
+    Без параметрів — увесь каталог, як і раніше. fields= обмежує поля,
+    category/domain фільтрують, limit/cursor дають сторінки (курсор
+    наступної — у заголовку X-Next-Cursor). ETag залежить від версії
+    каталогу й параметрів, тож If-None-Match дає 304, доки каталог незмінний.
     """
-    repo = Repo()
-    components = repo.get_all_components()
+    snapshot = Repo().get_snapshot()
 
-    if not components:
+    if not snapshot.components:
         raise HTTPException(status_code=404, detail="Компоненти не знайдено")
 
-    return components
+    pages = get_component_pages(snapshot)
+    try:
+        page = pages.page(
+            pages.parse_fields(fields),
+            category=_split(category),
+            domain=_split(domain),
+            cursor=cursor,
+            limit=limit,
+        )
+    except PageError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    use_gzip = page.gzipped is not None and "gzip" in (accept_encoding or "")
+    headers = {
+        "ETag": page.gzip_etag if use_gzip else page.etag,
+        "Cache-Control": "no-cache",
+        "Vary": "Accept-Encoding",
+        "X-Total-Count": str(page.total),
+        "X-Catalog-Version": snapshot.version,
+    }
+    if page.next_cursor is not None:
+        headers["X-Next-Cursor"] = str(page.next_cursor)
+
+    if _etag_matches(if_none_match, (page.etag, page.gzip_etag)):
+        return Response(status_code=304, headers=headers)
+
+    if use_gzip:
+        headers["Content-Encoding"] = "gzip"
+        return Response(content=page.gzipped, media_type="application/json", headers=headers)
+    return Response(content=page.body, media_type="application/json", headers=headers)
+
+
+@router.get("/changes")
+def get_component_changes(
+    since: str = Query(..., description="версія каталогу, яку вже має клієнт"),
+    fields: Optional[str] = Query(None, description="list | all | поле,поле,..."),
+):
+    """
+    Зміни каталогу від версії since до поточної.
+
+    Зазвичай — лише дельта: додані й змінені записи та id видалених.
+    Якщо версія невідома або вже ущільнена в журналі, повертається повний
+    знімок (full=true), як у GET /components.
+    """
+    repo = Repo()
+    snapshot = repo.get_snapshot()
+    pages = get_component_pages(snapshot)
+    try:
+        projection = pages.parse_fields(fields)
+    except PageError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    def project(comp):
+        return comp if projection is None else {f: comp[f] for f in projection if f in comp}
+
+    log = repo.store.changes
+    delta = log.since(since) if log is not None and log.head == snapshot.version else None
+    if delta is None:
+        return {
+            "version": snapshot.version,
+            "since": since,
+            "full": True,
+            "components": [project(c) for c in snapshot.components],
+        }
+
+    added, modified, removed = delta
+    return {
+        "version": snapshot.version,
+        "since": since,
+        "full": False,
+        # порядок каталогу, як і в повному списку
+        "added": [project(c) for c in snapshot.components if c.get("id") in added],
+        "modified": [project(c) for c in snapshot.components if c.get("id") in modified],
+        "removed": sorted(removed, key=str),
+    }
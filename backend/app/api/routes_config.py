@@ -1,53 +1,140 @@
-from fastapi import APIRouter, HTTPException, Header
+import json
+from fastapi import APIRouter, HTTPException, Header, Query
+from fastapi.responses import StreamingResponse
 from app.db.repo import Repo
-from app.models.dto import ConfigRequest
-from app.services.greedy import GreedyConfigurator
+from app.models.dto import ConfigBatchRequest, ConfigRequest, ConfigValidateRequest
+from app.services.prepared_catalog import get_prepared_catalog
+from app.services.config_cache import cache_stats, request_key
+from app.services.config_batch import MAX_BATCH_SIZE, configure_batch, configure_cached
+from app.services.bom import RESULT_FORMATS, compact_result, format_result
 from app.api.auth.routes_auth import decode_token
-from pathlib import Path
+from app.services.history_writer import history_writer
 from datetime import datetime
-import json
 
 router = APIRouter(prefix="/config", tags=["Configurator"])
 
 @router.post("")
-def generate_configuration(request: ConfigRequest, authorization: str = Header(None)):
-    repo = Repo()
-    components = repo.get_all_components()
+def generate_configuration(
+    request: ConfigRequest,
+    authorization: str = Header(None),
+    response_format: str = Query("full", alias="format", description="full | bom"),
+):
+    """
+    Конфігурація робота.
+
+    format=full (за замовчуванням) — запис на кожну одиницю з unique_id;
+    format=bom — специфікація: таблиця компонентів без повторів і рядки
+    (component_id, quantity, role).
+    """
+    _check_format(response_format)
+    snapshot = Repo().get_snapshot()
 
-    if not components:
+    if not snapshot.components:
         raise HTTPException(status_code=404, detail="База компонентів порожня")
 
-    configurator = GreedyConfigurator(components)
-    result = configurator.configure(request)
+    # Повний результат детермінований для (запит, версія каталогу) — спершу кеш
+    result = configure_cached(
+        get_prepared_catalog(snapshot), request, request_key(request, snapshot.version)
+    )
 
     if "error" in result:
         raise HTTPException(status_code=400, detail=result["error"])
 
-    # --- Логування історії користувача ---
-    history_file = Path(__file__).resolve().parent.parent / "db" / "history.json"
-    history_file.parent.mkdir(parents=True, exist_ok=True)
+    # запис історії — у фоновому записувачі, відповідь не чекає на диск
+    history_writer.enqueue(_history_entry(_user_id(authorization), request, result))
+
+    return format_result(result, response_format)
+
+
+@router.post("/batch")
+def generate_configuration_batch(batch: ConfigBatchRequest, authorization: str = Header(None)):
+    """
+    Пакет запитів на одному підготовленому каталозі.
 
-    try:
-        history = json.loads(history_file.read_text(encoding="utf-8")) if history_file.exists() else []
-    except json.JSONDecodeError:
-        history = []
+    Відповідь — список {index, status, result | error} у порядку запитів;
+    зі stream=true — NDJSON, по рядку на запит, щойно він готовий.
+    Історія успішних конфігурацій пишеться однією пачкою.
+    """
+    _check_format(batch.format)
+    if not batch.requests:
+        raise HTTPException(status_code=400, detail="Порожній пакет запитів")
+    if len(batch.requests) > MAX_BATCH_SIZE:
+        raise HTTPException(status_code=400, detail=f"Не більше {MAX_BATCH_SIZE} запитів у пакеті")
+
+    snapshot = Repo().get_snapshot()
+    if not snapshot.components:
+        raise HTTPException(status_code=404, detail="База компонентів порожня")
+
+    catalog = get_prepared_catalog(snapshot)
+    user_id = _user_id(authorization)
+
+    def items():
+        entries = []
+        try:
+            for i, status, result in configure_batch(catalog, batch.requests):
+                if status == 200:
+                    entries.append(_history_entry(user_id, batch.requests[i], result))
+                    yield {"index": i, "status": status, "result": format_result(result, batch.format)}
+                else:
+                    yield {"index": i, "status": status, "error": result["error"]}
+        finally:
+            # і для обірваного потоку — те, що встигли порахувати
+            if entries:
+                history_writer.enqueue_many(entries)
 
-    user_id = "anonymous"
+    if batch.stream:
+        lines = (json.dumps(item, ensure_ascii=False) + "\n" for item in items())
+        return StreamingResponse(lines, media_type="application/x-ndjson")
+    return list(items())
+
+
+@router.post("/validate")
+def validate_configuration(body: ConfigValidateRequest):
+    """
+    Перевірка готової збірки за індексом сумісності каталогу.
+
+    Відповідь — {valid, conflicts, missing, unconnected}: пари деталей, що
+    не можуть бути разом, невиконані requires і деталі без сумісних з'єднань.
+    """
+    snapshot = Repo().get_snapshot()
+    if not snapshot.components:
+        raise HTTPException(status_code=404, detail="База компонентів порожня")
+
+    compat = get_prepared_catalog(snapshot).compat
+    unknown = sorted({i for i in body.component_ids if i not in compat.row_by_id})
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Невідомі компоненти: {', '.join(map(str, unknown))}")
+    return compat.validate([compat.row_by_id[i] for i in body.component_ids])
+
+
+def _check_format(response_format: str) -> None:
+    if response_format not in RESULT_FORMATS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Невідомий формат відповіді: {response_format} (доступні: {', '.join(RESULT_FORMATS)})",
+        )
+
+
+def _user_id(authorization: str) -> str:
     if authorization:
         try:
-            token = authorization.replace("Bearer ", "")
-            user_id = decode_token(token)
+            return decode_token(authorization.replace("Bearer ", ""))
         except Exception:
-            user_id = "anonymous"
+            pass
+    return "anonymous"
+
 
-    entry = {
+def _history_entry(user_id: str, request: ConfigRequest, result: dict) -> dict:
+    return {
         "user_id": user_id,
         "request": request.dict(),
-        "result": result,
+        # в історії — лише специфікація; розгортається при читанні
+        "result": compact_result(result),
         "timestamp": str(datetime.utcnow())
     }
 
-    history.append(entry)
-    history_file.write_text(json.dumps(history, indent=2, ensure_ascii=False), encoding="utf-8")
 
-    return result
+@router.get("/cache")
+def get_cache_stats():
+    """Статистика кешів blueprint і результатів конфігурації."""
+    return cache_stats()
@@ -0,0 +1,281 @@
+import argparse
+import json
+import mmap
+import struct
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+
+MAGIC = b"LEGOCAT1"
+ALIGN = 64
+COMPILED_DIR = Path(__file__).resolve().parent.parent / "data" / "compiled"
+
+# Скільки декодованих записів тримати на каталог
+RECORD_CACHE_SIZE = 4096
+
+
+def compiled_path(catalog_path: Path, version: str) -> Path:
+    """Скомпільований знімок прив'язаний до версії: зміна JSON робить його неактуальним."""
+    return COMPILED_DIR / f"{Path(catalog_path).stem}-{version}.bin"
+
+
+def synthetic_version(catalog_version: str, n: int, seed: int) -> str:
+    """Версія синтетичного датасету: він повністю задається каталогом, n і seed."""
+    return f"{catalog_version}-n{n}-s{seed}"
+
+
+def synthetic_path(catalog_version: str, n: int, seed: int) -> Path:
+    return COMPILED_DIR / f"synthetic-{synthetic_version(catalog_version, n, seed)}.bin"
+
+
+# ---------------- РЯДКОВІ ТАБЛИЦІ ---------------- #
+
+def pack_strings(values: Sequence[str]) -> Dict[str, np.ndarray]:
+    """Рядки → (blob utf-8, offsets n+1): i-й рядок — blob[offsets[i]:offsets[i+1]]."""
+    encoded = [v.encode("utf-8") for v in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(b) for b in encoded], out=offsets[1:])
+    return {"blob": np.frombuffer(b"".join(encoded), dtype=np.uint8), "offsets": offsets}
+
+
+class StringTable(Sequence):
+    """Послідовність рядків поверх blob + offsets; рядок декодується при зверненні."""
+
+    def __init__(self, blob: np.ndarray, offsets: np.ndarray):
+        self._blob = memoryview(blob)
+        self._offsets = offsets
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def raw(self, i: int) -> memoryview:
+        return self._blob[int(self._offsets[i]):int(self._offsets[i + 1])]
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        return str(self.raw(i), "utf-8")
+
+    def __iter__(self) -> Iterator[str]:
+        for i in range(len(self)):
+            yield str(self.raw(i), "utf-8")
+
+
+class LazyRecords(Sequence):
+    """
+    Записи каталогу, що декодуються з JSON-фрагментів лише при зверненні.
+
+    rows — позиції в таблиці (None — усі по порядку); зріз повертає
+    представлення без копіювання. Декодовані записи кешуються спільно
+    для всіх представлень і, як і записи знімка, не мають змінюватись.
+    """
+
+    def __init__(self, loader: Callable[[int], Dict], size: int, rows: Optional[np.ndarray] = None):
+        self._load = loader
+        self._size = size
+        self._rows = rows
+
+    def __len__(self) -> int:
+        return self._size if self._rows is None else len(self._rows)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            rows = np.arange(self._size)[i] if self._rows is None else self._rows[i]
+            return LazyRecords(self._load, self._size, rows)
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        return self._load(i if self._rows is None else int(self._rows[i]))
+
+    def __iter__(self) -> Iterator[Dict]:
+        for i in range(len(self)):
+            yield self[i]
+
+
+def cached_loader(fetch: Callable[[int], Dict], transform: Optional[Callable[[Dict], Dict]] = None) -> Callable[[int], Dict]:
+    """Завантажувач запису за позицією з LRU-кешем на RECORD_CACHE_SIZE записів."""
+    @lru_cache(maxsize=RECORD_CACHE_SIZE)
+    def load(pos: int) -> Dict:
+        record = fetch(pos)
+        return transform(record) if transform is not None else record
+    return load
+
+
+def record_loader(table: StringTable, transform: Optional[Callable[[Dict], Dict]] = None) -> Callable[[int], Dict]:
+    return cached_loader(lambda pos: json.loads(str(table.raw(pos), "utf-8")), transform)
+
+
+# ---------------- ФОРМАТ ФАЙЛУ ---------------- #
+
+def write_sections(path: Path, meta: Dict[str, Any], arrays: Dict[str, np.ndarray]) -> Path:
+    """
+    MAGIC | довжина заголовка (u64) | заголовок JSON | секції масивів.
+
+    Кожна секція вирівняна на 64 байти, тож після mmap масиви читаються
+    np.frombuffer без копіювання.
+    """
+    sections: Dict[str, Dict[str, Any]] = {}
+    layout: List[tuple] = []
+    offset = 0
+    for name, arr in arrays.items():
+        arr = np.ascontiguousarray(arr)
+        offset = (offset + ALIGN - 1) // ALIGN * ALIGN
+        sections[name] = {"dtype": arr.dtype.str, "count": int(arr.size), "offset": offset}
+        layout.append((offset, arr))
+        offset += arr.nbytes
+
+    header = json.dumps({"meta": meta, "sections": sections}, ensure_ascii=False).encode("utf-8")
+    data_start = (len(MAGIC) + 8 + len(header) + ALIGN - 1) // ALIGN * ALIGN
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<Q", len(header)))
+        f.write(header)
+        for rel, arr in layout:
+            f.write(b"\x00" * (data_start + rel - f.tell()))
+            f.write(arr.tobytes())
+    tmp.replace(path)
+    return path
+
+
+class BinaryCatalog:
+    """
+    Скомпільований знімок каталогу, відображений у пам'ять лише для читання.
+
+    Масиви — np.frombuffer поверх mmap: сторінки спільні для всіх процесів,
+    що відкрили той самий файл, і підвантажуються ОС за потреби.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        with open(self.path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mm[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{self.path}: не скомпільований знімок каталогу")
+        (header_len,) = struct.unpack_from("<Q", self._mm, len(MAGIC))
+        header_start = len(MAGIC) + 8
+        header = json.loads(self._mm[header_start:header_start + header_len].decode("utf-8"))
+        self.meta: Dict[str, Any] = header["meta"]
+        self._sections: Dict[str, Dict[str, Any]] = header["sections"]
+        self._data_start = (header_start + header_len + ALIGN - 1) // ALIGN * ALIGN
+
+        self.version: str = self.meta["version"]
+        self.size: int = self.meta["size"]
+        self.raw_table = self.strings("records")
+        self.raw_records = LazyRecords(record_loader(self.raw_table), self.size)
+
+    def record_hashes(self) -> Optional[Dict[Any, str]]:
+        """
+        id → хеш запису (див. app.db.catalog_changes.record_hash), збережені
+        під час компіляції, — журнал змін обходиться без декодування записів.
+        None — знімок скомпільовано без хешів.
+        """
+        if "record_ids.blob" not in self:
+            return None
+        hashes = self.array("record_hashes").tolist()
+        return {
+            json.loads(raw): str(h, "ascii")
+            for raw, h in zip(self.strings("record_ids"), hashes)
+        }
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._sections
+
+    def array(self, name: str) -> np.ndarray:
+        spec = self._sections[name]
+        return np.frombuffer(
+            self._mm, dtype=np.dtype(spec["dtype"]), count=spec["count"], offset=self._data_start + spec["offset"]
+        )
+
+    def strings(self, name: str) -> StringTable:
+        return StringTable(self.array(f"{name}.blob"), self.array(f"{name}.offsets"))
+
+
+def load_compiled(catalog_path: Path, version: str) -> Optional[BinaryCatalog]:
+    """Знімок для версії, якщо його скомпільовано; пошкоджений файл ігнорується."""
+    return _open_compiled(compiled_path(catalog_path, version), version)
+
+
+def load_compiled_synthetic(catalog_version: str, n: int, seed: int) -> Optional[BinaryCatalog]:
+    """Синтетичний датасет, скомпільований `--synthetic n --seed seed`, якщо він є."""
+    return _open_compiled(synthetic_path(catalog_version, n, seed), synthetic_version(catalog_version, n, seed))
+
+
+def _open_compiled(path: Path, version: str) -> Optional[BinaryCatalog]:
+    if not path.exists():
+        return None
+    try:
+        binary = BinaryCatalog(path)
+    except (OSError, ValueError, KeyError) as e:
+        print(f"[WARN] Не вдалося відкрити скомпільований каталог {path}: {e}")
+        return None
+    if binary.version != version:
+        return None
+    return binary
+
+
+# ---------------- КОМПІЛЯЦІЯ ---------------- #
+
+def compile_catalog(components: Sequence[Dict], version: str, out: Path) -> Path:
+    """Будує PreparedCatalog і записує всі його масиви та сирі записи у файл out."""
+    from app.db.catalog_changes import record_hash
+    from app.services.prepared_catalog import PreparedCatalog, export_arrays
+
+    catalog = PreparedCatalog(components, version=version)
+    meta, arrays = export_arrays(catalog)
+    meta.update({"version": version, "size": len(catalog)})
+
+    raw = pack_strings([json.dumps(c, ensure_ascii=False, separators=(",", ":")) for c in components])
+    arrays["records.blob"] = raw["blob"]
+    arrays["records.offsets"] = raw["offsets"]
+
+    # хеші записів для журналу змін (записи без id у журнал не потрапляють)
+    keyed = [c for c in components if c.get("id") is not None]
+    ids = pack_strings([json.dumps(c["id"], ensure_ascii=False) for c in keyed])
+    arrays["record_ids.blob"] = ids["blob"]
+    arrays["record_ids.offsets"] = ids["offsets"]
+    arrays["record_hashes"] = np.array([record_hash(c) for c in keyed], dtype="S16")
+    return write_sections(out, meta, arrays)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    from app.db.repo import Repo
+
+    parser = argparse.ArgumentParser(description="Компіляція каталогу в бінарний знімок")
+    parser.add_argument("--synthetic", type=int, default=None, help="скомпілювати синтетичний датасет розміру N")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", type=Path, default=None)
+    args = parser.parse_args(argv)
+
+    repo = Repo()
+    snapshot = repo.get_snapshot()
+    if args.synthetic is None:
+        components, version = list(snapshot.components), snapshot.version
+        out = args.out or compiled_path(repo.data_path, version)
+    else:
+        from app.services.synthetic import generate_synthetic
+
+        # той самий датасет, що генерують бенчмарки: вони беруть знімок замість генерації
+        components = generate_synthetic(snapshot.components, args.synthetic, args.seed, catalog_version=snapshot.version)
+        version = synthetic_version(snapshot.version, args.synthetic, args.seed)
+        out = args.out or synthetic_path(snapshot.version, args.synthetic, args.seed)
+
+    path = compile_catalog(components, version, out)
+    print(f"{len(components)} компонентів → {path} ({path.stat().st_size / 1e6:.1f} МБ)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Set, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+# Скільки послідовних змін каталогу зберігати; старші версії «ущільнюються»
+MAX_CHANGES = 50
+
+
+def record_hash(comp: Dict) -> str:
+    payload = json.dumps(comp, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+def diff_hashes(old: Dict[Any, str], new: Dict[Any, str]) -> Tuple[List, List, List]:
+    """(added, modified, removed) за id між двома наборами хешів записів."""
+    added = [i for i in new if i not in old]
+    modified = [i for i in new if i in old and old[i] != new[i]]
+    removed = [i for i in old if i not in new]
+    return added, modified, removed
+
+
+class CatalogChangeLog:
+    """
+    Журнал змін каталогу на рівні компонентів (за id).
+
+    Для поточної версії зберігаються хеші записів, для кожного переходу
+    між версіями — списки доданих, змінених і видалених id. Журнал лежить
+    поруч із каталогом, тож переживає перезапуск: зміну файлу між запусками
+    видно з порівняння хешів. Зберігається не більше max_changes переходів;
+    для старішої версії since() повертає None (потрібен повний знімок).
+
+    Журнал спільний для всіх воркерів uvicorn: record() тримає файловий
+    замок, перечитує журнал (його могли дописати інші воркери) і пише
+    через унікальний тимчасовий файл.
+    """
+
+    def __init__(self, path: Path, max_changes: int = MAX_CHANGES):
+        self.path = Path(path)
+        self.max_changes = max_changes
+        self._lock = threading.Lock()
+        self.head: Optional[str] = None
+        self._hashes: Dict[Any, str] = {}
+        self._changes: List[Dict] = []
+        self._load()
+
+    def _load(self) -> None:
+        if not self.path.exists():
+            return
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"[WARN] Журнал змін каталогу пошкоджено, починаємо заново: {e}")
+            return
+        self.head = data.get("head")
+        # пари [id, хеш]: у ключах JSON id стали б рядками
+        self._hashes = {i: h for i, h in data.get("hashes") or []}
+        self._changes = data.get("changes") or []
+
+    @contextmanager
+    def _file_lock(self) -> Iterator[None]:
+        """Міжпроцесний замок журналу (без fcntl чи прав на запис — лише потоки процесу)."""
+        try:
+            f = open(self.path.with_name(self.path.name + ".lock"), "a") if fcntl is not None else None
+        except OSError:
+            f = None
+        if f is None:
+            yield
+            return
+        with f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _save(self) -> None:
+        # власний тимчасовий файл: інший воркер не підмінить його напівзаписаним
+        tmp = tempfile.NamedTemporaryFile(
+            "w", encoding="utf-8", dir=self.path.parent, prefix=self.path.name + ".", suffix=".tmp", delete=False
+        )
+        try:
+            with tmp:
+                json.dump({"head": self.head, "hashes": list(self._hashes.items()), "changes": self._changes},
+                          tmp, ensure_ascii=False, separators=(",", ":"))
+            os.replace(tmp.name, self.path)
+        except BaseException:
+            os.unlink(tmp.name)
+            raise
+
+    def record(self, version: str, components: Sequence[Dict],
+               stored_hashes: Optional[Callable[[], Optional[Dict[Any, str]]]] = None) -> None:
+        """
+        Фіксує нову версію каталогу (нічого не робить, якщо вона вже поточна).
+        stored_hashes — хеші записів, збережені у скомпільованому знімку;
+        без них записи хешуються тут, і лише коли версія справді нова.
+        """
+        with self._lock, self._file_lock():
+            self._load()
+            if version == self.head:
+                return
+            hashes = stored_hashes() if stored_hashes is not None else None
+            if hashes is None:
+                hashes = {c["id"]: record_hash(c) for c in components if c.get("id") is not None}
+            if self.head is not None:
+                added, modified, removed = diff_hashes(self._hashes, hashes)
+                self._changes.append({
+                    "from": self.head,
+                    "to": version,
+                    "at": time.time(),
+                    "added": added,
+                    "modified": modified,
+                    "removed": removed,
+                })
+                del self._changes[:-self.max_changes]
+            self.head = version
+            self._hashes = hashes
+            try:
+                self._save()
+            except OSError as e:
+                print(f"[WARN] Не вдалося записати журнал змін каталогу: {e}")
+
+    def since(self, version: str) -> Optional[Tuple[Set, Set, Set]]:
+        """
+        Сумарна зміна від version до поточної: (added, modified, removed).
+        None — версія невідома або вже ущільнена.
+        """
+        with self._lock:
+            if version == self.head:
+                return set(), set(), set()
+            # остання поява версії дає найкоротший ланцюжок
+            start = next(
+                (i for i in range(len(self._changes) - 1, -1, -1) if self._changes[i]["from"] == version),
+                None,
+            )
+            if start is None:
+                return None
+            chain = self._changes[start:]
+
+        added: Set = set()
+        modified: Set = set()
+        removed: Set = set()
+        for change in chain:
+            for i in change["added"]:
+                if i in removed:  # видалили й повернули — для клієнта це зміна
+                    removed.discard(i)
+                    modified.add(i)
+                else:
+                    added.add(i)
+            for i in change["modified"]:
+                if i not in added:
+                    modified.add(i)
+            for i in change["removed"]:
+                if i in added:  # з'явився й зник між версіями — клієнт його не бачив
+                    added.discard(i)
+                else:
+                    modified.discard(i)
+                    removed.add(i)
+        return added, modified, removed
+
+    def versions(self) -> List[str]:
+        with self._lock:
+            return [ch["from"] for ch in self._changes] + ([self.head] if self.head else [])
@@ -0,0 +1,138 @@
+import hashlib
+import json
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional, Sequence, Tuple
+
+from app.db.catalog_binary import BinaryCatalog, load_compiled
+from app.db.catalog_changes import CatalogChangeLog
+
+DEFAULT_CATALOG_PATH = Path(__file__).parent.parent / "data" / "lego_components.json"
+
+
+class CatalogSnapshot:
+    """
+    Незмінний знімок каталогу компонентів.
+
+    Записи спільні для всіх запитів процесу, тому їх не можна змінювати —
+    потрібна модифікація робиться на копії. Якщо для версії є скомпільований
+    знімок (binary), components — ліниві записи поверх нього.
+    """
+
+    __slots__ = ("version", "components", "loaded_at", "binary")
+
+    def __init__(self, version: str, components: Sequence[Dict], binary: Optional[BinaryCatalog] = None):
+        self.version = version
+        self.components = components
+        self.loaded_at = time.time()
+        self.binary = binary
+
+    def __len__(self) -> int:
+        return len(self.components)
+
+
+class CatalogStore:
+    """
+    Спільне на процес сховище каталогу.
+
+    Файл парситься один раз; при кожному зверненні перевіряється лише
+    (mtime, size). Якщо вони змінились — файл перечитується, а версія
+    (sha256 вмісту) оновлюється тільки коли змінився сам вміст. Кожна нова
+    версія фіксується в журналі змін (див. CatalogChangeLog).
+    """
+
+    def __init__(self, path: Path, track_changes: bool = True):
+        self.path = Path(path)
+        self.changes: Optional[CatalogChangeLog] = (
+            CatalogChangeLog(changes_path(self.path)) if track_changes else None
+        )
+        self._lock = threading.Lock()
+        self._snapshot: Optional[CatalogSnapshot] = None
+        self._stat_key: Optional[Tuple[int, int]] = None
+        self.reloads = 0
+
+    def _stat(self) -> Optional[Tuple[int, int]]:
+        try:
+            st = self.path.stat()
+        except FileNotFoundError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def get(self) -> CatalogSnapshot:
+        """Повертає актуальний знімок, перечитуючи файл лише після змін."""
+        key = self._stat()
+        snapshot = self._snapshot
+        if snapshot is not None and key == self._stat_key:
+            return snapshot
+
+        with self._lock:
+            key = self._stat()
+            if self._snapshot is None or key != self._stat_key:
+                self._reload(key)
+            return self._snapshot
+
+    @property
+    def version(self) -> str:
+        return self.get().version
+
+    def _reload(self, key: Optional[Tuple[int, int]]) -> None:
+        if key is None:
+            print(f"[WARN] JSON-файл {self.path} не знайдено")
+            self._snapshot = CatalogSnapshot("empty", ())
+            self._stat_key = None
+            return
+
+        raw = self.path.read_bytes()
+        version = hashlib.sha256(raw).hexdigest()[:16]
+
+        # mtime змінився, а вміст ні (touch, повторний деплой) — знімок той самий
+        if self._snapshot is not None and self._snapshot.version == version:
+            self._stat_key = key
+            return
+
+        # скомпільований знімок цієї версії — без розбору JSON
+        binary = load_compiled(self.path, version)
+        if binary is not None:
+            self._install(key, CatalogSnapshot(version, binary.raw_records, binary))
+            return
+
+        try:
+            components = json.loads(raw.decode("utf-8"))
+        except (UnicodeDecodeError, json.JSONDecodeError) as e:
+            # файл могли записати частково — лишаємо попередній знімок
+            # до наступної зміни (mtime, size)
+            print(f"[WARN] Не вдалося прочитати {self.path}: {e}")
+            if self._snapshot is None:
+                self._snapshot = CatalogSnapshot("empty", ())
+            self._stat_key = key
+            return
+
+        self._install(key, CatalogSnapshot(version, tuple(components)))
+
+    def _install(self, key: Tuple[int, int], snapshot: CatalogSnapshot) -> None:
+        self._snapshot = snapshot
+        self._stat_key = key
+        self.reloads += 1
+        if self.changes is not None:
+            stored = snapshot.binary.record_hashes if snapshot.binary is not None else None
+            self.changes.record(snapshot.version, snapshot.components, stored)
+
+
+def changes_path(catalog_path: Path) -> Path:
+    """Журнал змін поруч із каталогом: lego_components.json → lego_components.changes.json."""
+    return catalog_path.with_name(catalog_path.stem + ".changes.json")
+
+
+_stores: Dict[Path, CatalogStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_catalog_store(path: Optional[Path] = None) -> CatalogStore:
+    """Єдиний на процес екземпляр сховища для кожного файлу каталогу."""
+    path = Path(path or DEFAULT_CATALOG_PATH).resolve()
+    store = _stores.get(path)
+    if store is None:
+        with _stores_lock:
+            store = _stores.setdefault(path, CatalogStore(path))
+    return store
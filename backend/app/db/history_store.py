@@ -0,0 +1,218 @@
+import json
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+DB_DIR = Path(__file__).resolve().parent
+HISTORY_DB = DB_DIR / "history.sqlite3"
+LEGACY_HISTORY_FILE = DB_DIR / "history.json"
+
+# Затримка фонової компактизації після очищення історії (сек)
+COMPACT_DELAY = 30.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS history (
+    id        INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id   TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    entry     TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_history_user ON history (user_id, id);
+
+-- надгробки: усе до cleared_before (включно) для користувача вважається видаленим
+CREATE TABLE IF NOT EXISTS history_clears (
+    user_id        TEXT PRIMARY KEY,
+    cleared_before INTEGER NOT NULL
+);
+
+-- службові позначки (наприклад, що старий history.json уже імпортовано)
+CREATE TABLE IF NOT EXISTS history_meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+LEGACY_MARKER = "legacy_migrated"
+
+
+class HistoryStore:
+    """
+    Журнал історії конфігурацій у SQLite (WAL).
+
+    Запис — один INSERT, без перечитування наявної історії; читання
+    користувача йде по індексу (user_id, id) з курсорною пагінацією.
+    Очищення пише лише надгробок, а фізичне видалення рядків робить
+    фонова компактизація.
+    """
+
+    def __init__(self, path: Path = HISTORY_DB):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        self._compact_lock = threading.Lock()
+        self._compact_timer: Optional[threading.Timer] = None
+
+        conn = self._conn()
+        conn.executescript(_SCHEMA)
+        self._migrate_legacy(conn)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            # FULL: fsync на кожен коміт; записувач комітить пачками, тож це fsync на пачку
+            conn.execute("PRAGMA synchronous=FULL")
+            self._local.conn = conn
+        return conn
+
+    def _migrate_legacy(self, conn: sqlite3.Connection) -> None:
+        """
+        Одноразовий імпорт старого history.json (файл перейменовується).
+
+        Кілька воркерів можуть стартувати одночасно: імпорт іде в одній
+        транзакції BEGIN IMMEDIATE разом із позначкою в history_meta, тож
+        записи імпортує лише перший, а решта бачать позначку.
+        """
+        legacy = self.path.parent / LEGACY_HISTORY_FILE.name
+        if not legacy.exists():
+            return
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            done = conn.execute("SELECT 1 FROM history_meta WHERE key = ?", (LEGACY_MARKER,)).fetchone()
+            if done is None:
+                try:
+                    entries = json.loads(legacy.read_text(encoding="utf-8"))
+                except (FileNotFoundError, json.JSONDecodeError):
+                    entries = []
+                self._insert(conn, entries)
+                conn.execute("INSERT INTO history_meta (key, value) VALUES (?, ?)", (LEGACY_MARKER, legacy.name))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        try:
+            legacy.rename(legacy.with_name(legacy.name + ".migrated"))
+        except FileNotFoundError:
+            pass  # уже перейменував інший воркер
+
+    # ---------------- ЗАПИС ---------------- #
+
+    def append(self, entry: Dict) -> int:
+        return self.append_many([entry])[-1]
+
+    def append_many(self, entries: List[Dict]) -> List[int]:
+        """Додає записи однією транзакцією; повертає їхні id."""
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            ids = self._insert(conn, entries)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return ids
+
+    @staticmethod
+    def _insert(conn: sqlite3.Connection, entries: List[Dict]) -> List[int]:
+        """INSERT записів у вже відкритій транзакції."""
+        ids: List[int] = []
+        for entry in entries:
+            cur = conn.execute(
+                "INSERT INTO history (user_id, timestamp, entry) VALUES (?, ?, ?)",
+                (
+                    entry.get("user_id") or "anonymous",
+                    entry.get("timestamp") or "",
+                    json.dumps(entry, ensure_ascii=False, separators=(",", ":")),
+                ),
+            )
+            ids.append(cur.lastrowid)
+        return ids
+
+    # ---------------- ЧИТАННЯ ---------------- #
+
+    def list_user(
+        self,
+        user_id: str,
+        limit: Optional[int] = None,
+        cursor: Optional[int] = None,
+    ) -> Tuple[List[Dict], Optional[int]]:
+        """
+        Історія користувача у хронологічному порядку.
+
+        Без limit — уся історія. З limit — сторінка з limit найновіших
+        записів, старших за cursor; другим значенням повертається курсор
+        наступної (старшої) сторінки або None.
+        """
+        query = (
+            "SELECT id, entry FROM history WHERE user_id = ? "
+            "AND id > COALESCE((SELECT cleared_before FROM history_clears WHERE user_id = ?), 0)"
+        )
+        params: list = [user_id, user_id]
+        if cursor is not None:
+            query += " AND id < ?"
+            params.append(cursor)
+
+        if limit is None:
+            rows = self._conn().execute(query + " ORDER BY id", params).fetchall()
+            return [json.loads(entry) for _, entry in rows], None
+
+        rows = self._conn().execute(query + " ORDER BY id DESC LIMIT ?", params + [limit + 1]).fetchall()
+        next_cursor = rows[limit - 1][0] if len(rows) > limit else None
+        page = rows[:limit]
+        page.reverse()
+        return [json.loads(entry) for _, entry in page], next_cursor
+
+    # ---------------- ОЧИЩЕННЯ ---------------- #
+
+    def clear_user(self, user_id: str) -> None:
+        """Надгробок на всю поточну історію користувача; рядки видалить компактизація."""
+        self._conn().execute(
+            "INSERT INTO history_clears (user_id, cleared_before) "
+            "VALUES (?, (SELECT COALESCE(MAX(id), 0) FROM history)) "
+            "ON CONFLICT(user_id) DO UPDATE SET cleared_before = excluded.cleared_before",
+            (user_id,),
+        )
+        self._schedule_compaction()
+
+    def _schedule_compaction(self) -> None:
+        with self._compact_lock:
+            if self._compact_timer is not None and self._compact_timer.is_alive():
+                return
+            self._compact_timer = threading.Timer(COMPACT_DELAY, self.compact)
+            self._compact_timer.daemon = True
+            self._compact_timer.start()
+
+    def compact(self) -> int:
+        """Фізично видаляє рядки під надгробками; повертає їх кількість."""
+        conn = self._conn()
+        cur = conn.execute(
+            "DELETE FROM history WHERE id <= "
+            "(SELECT cleared_before FROM history_clears c WHERE c.user_id = history.user_id)"
+        )
+        conn.execute("PRAGMA wal_checkpoint(PASSIVE)")
+        return cur.rowcount
+
+
+_store: Optional[HistoryStore] = None
+_store_lock = threading.Lock()
+
+
+def get_history_store() -> HistoryStore:
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = HistoryStore()
+    return _store
+
+
+# --- Завантаження історії ---
+def load_history(user_id: str, limit: Optional[int] = None, cursor: Optional[int] = None):
+    return get_history_store().list_user(user_id, limit=limit, cursor=cursor)
+
+
+# --- Збереження історії ---
+def save_history(entry: Dict) -> int:
+    return get_history_store().append(entry)
@@ -1,14 +1,19 @@
-import json
 from pathlib import Path
 
+from app.db.catalog_store import CatalogSnapshot, get_catalog_store
+
 
 class Repo:
     def __init__(self):
         self.data_path = Path(__file__).parent.parent / "data" / "lego_components.json"
+        self.store = get_catalog_store(self.data_path)
+
+    def get_snapshot(self) -> CatalogSnapshot:
+        """Поточний незмінний знімок каталогу (спільний для всього процесу)."""
+        return self.store.get()
+
+    def get_catalog_version(self) -> str:
+        return self.store.version
 
     def get_all_components(self):
-        if not self.data_path.exists():
-            print(f"[WARN] JSON-файл {self.data_path} не знайдено")
-            return []
-        with open(self.data_path, "r", encoding="utf-8") as f:
-            return json.load(f)
+        return list(self.get_snapshot().components)
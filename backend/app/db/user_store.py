@@ -0,0 +1,121 @@
+import json
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, Optional
+
+DATA_DIR = Path(__file__).resolve().parent.parent / "data"
+USERS_DB = DATA_DIR / "users.sqlite3"
+LEGACY_USERS_FILE = DATA_DIR / "users.json"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    id        TEXT PRIMARY KEY,
+    username  TEXT NOT NULL UNIQUE,
+    email     TEXT NOT NULL,
+    full_name TEXT NOT NULL,
+    password  TEXT NOT NULL
+);
+"""
+
+_FIELDS = ("id", "username", "email", "full_name", "password")
+
+
+class UserExistsError(Exception):
+    pass
+
+
+class UserStore:
+    """
+    Сховище користувачів: SQLite (WAL) + індекс username → user у пам'яті.
+
+    Індекс завантажується один раз, тож вхід — пошук у словнику. Унікальність
+    логіна гарантує UNIQUE-обмеження бази, тому реєстрація безпечна і між
+    потоками, і між воркерами; користувачі, зареєстровані іншим воркером,
+    дочитуються з бази за промахом в індексі.
+    """
+
+    def __init__(self, path: Path = USERS_DB, legacy_file: Path = LEGACY_USERS_FILE):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+        conn = self._conn()
+        conn.executescript(_SCHEMA)
+        self._import_legacy(conn, Path(legacy_file))
+
+        self._by_username: Dict[str, Dict] = {
+            row["username"]: row for row in self._select("SELECT * FROM users")
+        }
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=FULL")
+            self._local.conn = conn
+        return conn
+
+    def _select(self, sql: str, params: tuple = ()):
+        return [dict(row) for row in self._conn().execute(sql, params)]
+
+    def _import_legacy(self, conn: sqlite3.Connection, legacy_file: Path) -> None:
+        """Перенесення users.json у нову базу (лише якщо база порожня)."""
+        if not legacy_file.exists():
+            return
+        if conn.execute("SELECT 1 FROM users LIMIT 1").fetchone():
+            return
+        try:
+            users = json.loads(legacy_file.read_text(encoding="utf-8"))
+        except json.JSONDecodeError:
+            return
+        conn.executemany(
+            "INSERT OR IGNORE INTO users (id, username, email, full_name, password) VALUES (?, ?, ?, ?, ?)",
+            [tuple(u.get(f) or "" for f in _FIELDS) for u in users if u.get("id") and u.get("username")],
+        )
+
+    # ---------------- ЧИТАННЯ ---------------- #
+
+    def get_by_username(self, username: str) -> Optional[Dict]:
+        user = self._by_username.get(username)
+        if user is None:
+            rows = self._select("SELECT * FROM users WHERE username = ?", (username,))
+            if rows:
+                user = rows[0]
+                self._by_username[username] = user
+        return user
+
+    def __len__(self) -> int:
+        return len(self._by_username)
+
+    # ---------------- ЗАПИС ---------------- #
+
+    def create(self, user: Dict) -> Dict:
+        """Додає користувача; UserExistsError, якщо логін уже зайнятий."""
+        record = {f: user[f] for f in _FIELDS}
+        with self._lock:
+            try:
+                self._conn().execute(
+                    "INSERT INTO users (id, username, email, full_name, password) VALUES (?, ?, ?, ?, ?)",
+                    tuple(record[f] for f in _FIELDS),
+                )
+            except sqlite3.IntegrityError:
+                raise UserExistsError(record["username"])
+            self._by_username[record["username"]] = record
+        return record
+
+
+_store: Optional[UserStore] = None
+_store_lock = threading.Lock()
+
+
+def get_user_store() -> UserStore:
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = UserStore()
+    return _store
@@ -1,6 +1,7 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
+from contextlib import asynccontextmanager
 from pathlib import Path
 
 from app.api.routes_components import router as components_router
@@ -8,8 +9,21 @@ from app.api.routes_config import router as config_router
 from app.api.auth.routes_auth import router as auth_router
 from app.api.history.routes_history import router as history_router
 from app.api.routes_benchmark import router as benchmark_router
+from app.services.history_writer import history_writer
+from app.services.benchmark_jobs import benchmark_jobs
 
-app = FastAPI(title="LEGO Configurator API", version="1.0")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    history_writer.start()
+    benchmark_jobs.start()
+    yield
+    # незавершені бенчмарки скасовуються; черга історії дописується
+    benchmark_jobs.stop()
+    history_writer.stop()
+
+
+app = FastAPI(title="LEGO Configurator API", version="1.0", lifespan=lifespan)
 
 BASE_DIR = Path(__file__).resolve().parent
 STATIC_DIR = BASE_DIR / "static"
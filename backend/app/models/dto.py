@@ -66,6 +66,25 @@ class ConfigRequest(BaseModel):
     ownedSets: Optional[List[str]] = None
     useOnlyOwnedParts: Optional[bool] = False
 
+    # Режим підбору: 'greedy' — найкращий компонент на слот; 'exact' — точний
+    # підбір у межах бюджету й ваги (рюкзак із вибором) з обмеженням часу
+    solver: Optional[str] = "greedy"
+    solverTimeLimitMs: Optional[int] = None
+    paretoFront: Optional[bool] = False    # лише для 'exact': фронт «ціна — оцінка»
+    budgetRepair: Optional[bool] = True    # при перевищенні — дешевші заміни замість помилки
+    assemblyReport: Optional[bool] = True  # звіт про з'єднання роз'ємів ("assembly")
+    assemblyTopUp: Optional[bool] = False  # додати піни й осі для роз'ємів без пари (зі звітом)
+
+
+class ConfigBatchRequest(BaseModel):
+    requests: List[ConfigRequest]
+    stream: bool = False                   # NDJSON: по рядку на запит, щойно готовий
+    format: str = "full"                   # full | bom (див. POST /config)
+
+
+class ConfigValidateRequest(BaseModel):
+    component_ids: List[int]               # id компонентів збірки, з повторами для кількох одиниць
+
 
 class ConfigResponse(BaseModel):
     selected: List[LegoComponent]
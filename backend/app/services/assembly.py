@@ -0,0 +1,275 @@
+import math
+from typing import Any, Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from app.services.compat_index import CompatibilityIndex
+
+# Кріплення — деталі без власних роз'ємів (піни, осі), що дають кінці
+# заданого типу; тип визначається за ключовими словами назви.
+FASTENER_FAMILY = "technic_pin"
+FASTENER_KEYWORDS = {"pin": ("пін",), "axle": ("вісь",)}
+FASTENER_EXCLUDE = ("отвор",)   # «пластина з отвором для піна» — гніздо, а не кріплення
+FASTENER_ENDS = 2               # кінців на кріплення, порівну між його типами
+
+# Скільки спряжень потребує роз'єм, щоб деталь трималась (решта — запас):
+# балку фіксують два піни, колесо чи вал — одне з'єднання
+ASSEMBLY_DEMAND = {"pin_hole": 2}
+DEFAULT_DEMAND = 1
+
+
+def hopcroft_karp(left_group: Sequence[int], groups: Sequence[Sequence[int]], n_right: int) -> List[int]:
+    """
+    Максимальне парування дводольного графа (Hopcroft–Karp).
+
+    Сусіди лівої вершини l — groups[left_group[l]]: ліві вершини одного
+    типу ділять один список, тож BFS обходить кожен список раз на фазу,
+    а DFS тримає спільний вказівник на (список, шар). Повертає match_l
+    (права вершина або -1 для кожної лівої).
+    """
+    n_left = len(left_group)
+    match_l = [-1] * n_left
+    match_r = [-1] * n_right
+
+    # жадібний початок: вказівник на першу вільну праву вершину списку
+    start = [0] * len(groups)
+    for l, g in enumerate(left_group):
+        rights, i = groups[g], start[g]
+        while i < len(rights) and match_r[rights[i]] != -1:
+            i += 1
+        if i < len(rights):
+            match_l[l], match_r[rights[i]] = rights[i], l
+            i += 1
+        start[g] = i
+
+    inf = n_left + 1
+    while True:
+        # ---- BFS: шари від вільних лівих вершин ----
+        free = [l for l in range(n_left) if match_l[l] == -1]
+        if not free:
+            break
+        dist = [inf] * n_left
+        for l in free:
+            dist[l] = 0
+        queue, head = list(free), 0
+        seen_group = set()
+        seen_r = bytearray(n_right)
+        limit = inf
+        while head < len(queue):
+            l = queue[head]
+            head += 1
+            d = dist[l]
+            if d > limit:
+                break
+            g = left_group[l]
+            if g in seen_group:
+                continue
+            seen_group.add(g)
+            for r in groups[g]:
+                if seen_r[r]:
+                    continue
+                seen_r[r] = 1
+                l2 = match_r[r]
+                if l2 == -1:
+                    limit = min(limit, d)
+                elif dist[l2] == inf:
+                    dist[l2] = d + 1
+                    queue.append(l2)
+        if limit == inf:
+            break
+
+        # ---- DFS: вершинно-неперетинні найкоротші шляхи ----
+        pointer: Dict[Tuple[int, int], int] = {}
+        dead_r = bytearray(n_right)
+        augmented = 0
+        for u in free:
+            stack, path = [u], []
+            while stack:
+                l = stack[-1]
+                d = dist[l]
+                key = (left_group[l], d)
+                rights = groups[key[0]]
+                i = pointer.get(key, 0)
+                step = None
+                while i < len(rights):
+                    r = rights[i]
+                    if not dead_r[r]:
+                        l2 = match_r[r]
+                        if l2 == -1 or (d < limit and dist[l2] == d + 1):
+                            step = r
+                            break
+                    i += 1
+                pointer[key] = i
+                if step is None:
+                    # глухий кут: вершина й ребро, яким сюди прийшли, вибувають до кінця фази
+                    dist[l] = inf
+                    stack.pop()
+                    if path:
+                        dead_r[path.pop()] = 1
+                    continue
+                path.append(step)
+                if match_r[step] != -1:
+                    stack.append(match_r[step])
+                    continue
+                # вільна права вершина — розвертаємо шлях
+                for l_on, r_on in zip(stack, path):
+                    match_l[l_on], match_r[r_on] = r_on, l_on
+                    dead_r[r_on] = 1
+                augmented += 1
+                break
+        if not augmented:
+            break
+    return match_l
+
+
+class AssemblyPlanner:
+    """
+    Перевірка збірки на рівні роз'ємів: чи вистачає пінів, осей і гнізд,
+    щоб прикріпити вибрані деталі.
+
+    Кожна одиниця збірки дає «попит» (роз'єми, що мають з чимось
+    спрягтися, — ASSEMBLY_DEMAND) і «пропозицію» (усі її роз'єми, для
+    кріплень — FASTENER_ENDS кінців). Попит і пропозиція — частки
+    дводольного графа, ребро — сумісні типи (adjacency індексу сумісності)
+    у різних одиниць; максимальне парування (hopcroft_karp) показує, яким
+    роз'ємам пари не вистачило. Поверхневі з'єднання сітки (шипи/трубки,
+    pattern "grid") збірку не обмежують і в граф не входять.
+    """
+
+    def __init__(self, compat: CompatibilityIndex, price: np.ndarray, fasteners: Dict[str, np.ndarray]):
+        self.compat = compat
+        types = compat.connector_types
+        discrete = ~compat.grid_types
+        counts = compat.connector_counts.astype(np.int64)
+        self.adjacency = compat.adjacency
+
+        caps = np.array([ASSEMBLY_DEMAND.get(t, DEFAULT_DEMAND) for t in types], dtype=np.int64)
+        self.demand = np.minimum(counts, caps) * discrete
+        self.supply = counts * discrete
+
+        # кріплення: кінці порівну між типами, які воно дає
+        kinds = {kind: mask for kind, mask in fasteners.items() if kind in types}
+        n_kinds = sum(mask.astype(np.int64) for mask in kinds.values()) if kinds else np.zeros(len(price), np.int64)
+        ends = np.where(n_kinds > 0, FASTENER_ENDS // np.maximum(n_kinds, 1), 0)
+        for kind, mask in kinds.items():
+            self.supply[mask, types.index(kind)] += ends[mask]
+
+        # деталь, що могла б спрягтися сама з собою, потребує окремого списку сусідів
+        adjacency = self.adjacency.astype(np.int64)
+        self.self_mating = (((self.demand > 0) @ adjacency) * (self.supply > 0)).any(axis=1)
+
+        # найдешевше за кінець кріплення для кожного типу попиту
+        self.top_up_rows: Dict[int, Tuple[int, int]] = {}
+        for a in np.flatnonzero(self.demand.any(axis=0)).tolist():
+            best = None
+            for kind, mask in kinds.items():
+                t = types.index(kind)
+                if not self.adjacency[a, t]:
+                    continue
+                candidates = np.flatnonzero(mask)
+                if not len(candidates):
+                    continue
+                per_end = price[candidates] / ends[candidates]
+                row = int(candidates[np.argmin(per_end)])
+                if best is None or per_end.min() < best[0]:
+                    best = (float(per_end.min()), row, int(ends[row]))
+            if best is not None:
+                self.top_up_rows[a] = (best[1], best[2])
+
+    # ---------------- ПАРУВАННЯ ---------------- #
+
+    def _match(self, rows: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """(рядок, тип) кожного роз'єму попиту і чи знайшлася йому пара."""
+        demand = self.demand[rows]
+        supply = self.supply[rows]
+        adjacency = self.adjacency
+
+        # більше, ніж сумісного попиту, пропозиції не знадобиться
+        need = adjacency.astype(np.int64) @ demand.sum(axis=0)
+        supply = np.minimum(supply, need)
+
+        lu, lt = np.nonzero(demand)
+        k = demand[lu, lt]
+        left_unit, left_type = np.repeat(lu, k), np.repeat(lt, k)
+
+        rt, ru = np.nonzero(supply.T)  # впорядковано за типом
+        k = supply[ru, rt]
+        right_unit, right_type = np.repeat(ru, k), np.repeat(rt, k)
+        bounds = np.searchsorted(right_type, np.arange(len(adjacency) + 1))
+
+        groups: List[List[int]] = []
+        group_of: Dict[Any, int] = {}
+        self_mating = self.self_mating[rows]
+        left_group = []
+        for unit, a in zip(left_unit.tolist(), left_type.tolist()):
+            key = (a, unit) if self_mating[unit] else a
+            g = group_of.get(key)
+            if g is None:
+                g = group_of[key] = len(groups)
+                rights = np.concatenate(
+                    [np.arange(bounds[b], bounds[b + 1]) for b in np.flatnonzero(adjacency[a])] or [np.empty(0, np.int64)]
+                )
+                if self_mating[unit]:
+                    rights = rights[right_unit[rights] != unit]
+                groups.append(rights.tolist())
+            left_group.append(g)
+
+        match_l = hopcroft_karp(left_group, groups, len(right_unit))
+        matched = np.asarray(match_l, dtype=np.int64) >= 0
+        return rows[left_unit], left_type, matched
+
+    def _report(self, left_rows: np.ndarray, left_type: np.ndarray, matched: np.ndarray) -> Dict[str, Any]:
+        unmatched: Dict[Tuple[int, int], int] = {}
+        for row, t in zip(left_rows[~matched].tolist(), left_type[~matched].tolist()):
+            unmatched[(row, t)] = unmatched.get((row, t), 0) + 1
+        return {
+            "feasible": not unmatched,
+            "demand": int(len(matched)),
+            "connections": int(matched.sum()),
+            "unmatched": [
+                {"id": int(self.compat.ids[row]), "connector": self.compat.connector_types[t], "missing": k}
+                for (row, t), k in unmatched.items()
+            ],
+            "added": [],
+        }
+
+    def plan(self, rows: Sequence[int]) -> Dict[str, Any]:
+        """
+        Звіт про з'єднання збірки: feasible, demand (роз'ємів, яким потрібна
+        пара), connections (знайдено пар) і unmatched — {id, connector,
+        missing} для роз'ємів без пари.
+        """
+        return self._report(*self._match(np.asarray(rows, dtype=np.int64)))
+
+    def top_up(self, rows: Sequence[int]) -> Tuple[List[int], Dict[str, Any]]:
+        """
+        Добирає кріплення (найдешевші за кінець) для роз'ємів без пари.
+
+        Повертає (рядки з доданими кріпленнями в кінці, звіт plan); у звіті
+        added — {id, kind, quantity}. Роз'єми, для яких кріплень немає
+        (наприклад, вал мотора без колеса чи шестерні), лишаються в unmatched.
+        """
+        rows = list(rows)
+        left_rows, left_type, matched = self._match(np.asarray(rows, dtype=np.int64))
+        missing = np.bincount(left_type[~matched], minlength=len(self.adjacency))
+
+        added: Dict[int, int] = {}
+        for a in np.flatnonzero(missing).tolist():
+            if a in self.top_up_rows:
+                row, ends = self.top_up_rows[a]
+                added[row] = added.get(row, 0) + math.ceil(missing[a] / ends)
+        if not added:
+            return rows, self._report(left_rows, left_type, matched)
+
+        for row, quantity in added.items():
+            rows.extend([row] * quantity)
+        report = self.plan(rows)
+        report["added"] = [
+            {"id": int(self.compat.ids[row]), "kind": self._kind(row), "quantity": quantity}
+            for row, quantity in added.items()
+        ]
+        return rows, report
+
+    def _kind(self, row: int) -> str:
+        types = self.compat.connector_types
+        return "+".join(kind for kind in FASTENER_KEYWORDS if kind in types and self.supply[row, types.index(kind)])
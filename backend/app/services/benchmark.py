@@ -1,56 +1,76 @@
 import time
 import random
-import copy
-from typing import List, Dict
+from typing import Callable, List, Dict, Optional
 from app.services.greedy import GreedyConfigurator
+from app.services.prepared_catalog import PreparedCatalog, compiled_synthetic_catalog
+from app.services.synthetic import iter_synthetic
 from app.models.dto import ConfigRequest
 from app.db.repo import Repo
 
+# Зворотний виклик прогресу: (фаза, відсоток 0..100)
+ProgressCallback = Callable[[str, float], None]
+
+
+def ignore_progress(phase: str, percent: float) -> None:
+    pass
+
+
 class BenchmarkService:
     def __init__(self):
         self.repo = Repo()
-        self.real_data = self.repo.get_all_components()
 
-    def _generate_synthetic_data(self, n: int) -> List[Dict]:
+    @property
+    def real_data(self) -> List[Dict]:
+        """Реальні компоненти з поточного знімка каталогу."""
+        return self.repo.get_all_components()
+
+    def _generate_synthetic_data(self, n: int, seed: Optional[int] = None, persist: bool = False,
+                                 progress: Optional[ProgressCallback] = None) -> List[Dict]:
         """
-        Генерує N компонентів на основі реальних.
+        Генерує N компонентів на основі реальних (див. app.services.synthetic).
+        progress отримує частку згенерованого після кожної частини.
         """
-        if not self.real_data:
-            return []
-        
-        synthetic = []
-        synthetic.extend(copy.deepcopy(self.real_data))
-        
-        current_id = max(c["id"] for c in self.real_data) + 1
-        
-        while len(synthetic) < n:
-            donor = random.choice(self.real_data)
-            new_item = copy.deepcopy(donor)
-            new_item["id"] = current_id
-            new_item["name"] = f"{donor['name']} (Gen-{current_id})"
-
-            new_item["price"] = round(new_item["price"] * random.uniform(0.8, 1.2))
-            new_item["weight"] = round(new_item["weight"] * random.uniform(0.9, 1.1), 2)
-            
-            if new_item.get("speed"):
-                new_item["speed"] = int(new_item["speed"] * random.uniform(0.9, 1.1))
-            
-            synthetic.append(new_item)
-            current_id += 1
-            
-        return synthetic[:n]
+        snapshot = self.repo.get_snapshot()
+        dataset: List[Dict] = []
+        for chunk in iter_synthetic(snapshot.components, n, seed,
+                                    catalog_version=snapshot.version, persist=persist):
+            dataset.extend(chunk)
+            if progress is not None:
+                progress("generation", 100.0 * len(dataset) / max(n, 1))
+        return dataset
 
-    def run_benchmark(self, n: int):
+    def run_benchmark(self, n: int, seed: Optional[int] = None, persist: bool = False,
+                      progress: Optional[ProgressCallback] = None):
         """
         Виконує повний цикл тестування.
+        progress(фаза, відсоток) викликається між фазами (для фонових задач).
         """
-        # Генерація даних
-        start_gen = time.perf_counter()
-        dataset = self._generate_synthetic_data(n)
-        end_gen = time.perf_counter()
-        
-        # Ініціалізація алгоритму з новим датасетом
-        configurator = GreedyConfigurator(dataset)
+        progress = progress or ignore_progress
+        if seed is None:
+            seed = random.randrange(2 ** 31)
+
+        # Скомпільований знімок датасету (catalog_binary --synthetic) — без генерації й побудови
+        start_gen = end_gen = start_build = time.perf_counter()
+        catalog = None if persist else compiled_synthetic_catalog(self.repo.get_snapshot(), n, seed)
+        end_build = time.perf_counter()
+        compiled = catalog is not None
+
+        if catalog is None:
+            # Генерація даних (0–40 %)
+            start_gen = time.perf_counter()
+            dataset = self._generate_synthetic_data(
+                n, seed, persist, progress=lambda phase, pct: progress(phase, 0.4 * pct)
+            )
+            end_gen = time.perf_counter()
+
+            # Побудова підготовленого каталогу (нормалізація + індекси) — окрема фаза (40–90 %)
+            progress("index_build", 40.0)
+            start_build = time.perf_counter()
+            catalog = PreparedCatalog(dataset)
+            end_build = time.perf_counter()
+        progress("algorithm", 90.0)
+
+        configurator = GreedyConfigurator(catalog)
         
         # Типовий запит (складний, щоб навантажити алгоритм)
         request = ConfigRequest(
@@ -68,12 +88,24 @@ class BenchmarkService:
         end_algo = time.perf_counter()
         
         success = "error" not in result
+        progress("done", 100.0)
         
         return {
             "n": n,
+            "seed": seed,
             "generation_time_ms": (end_gen - start_gen) * 1000,
+            "index_build_time_ms": (end_build - start_build) * 1000,
             "algorithm_time_ms": (end_algo - start_algo) * 1000,
-            "total_items_processed": len(dataset),
+            "total_items_processed": len(catalog),
+            "compiled": compiled,
             "success": success,
-            "items_selected": len(result.get("selected", [])) if success else 0
+            "items_selected": len(result.get("selected", [])) if success else 0,
+            # кандидатів до й після відкидання домінованих, за рейтингом (пріоритетом)
+            "candidates": {
+                p: {
+                    "before": sum(c["before"] for c in cats.values()),
+                    "after": sum(c["after"] for c in cats.values()),
+                }
+                for p, cats in catalog.candidate_counts().items()
+            },
         }
\ No newline at end of file
@@ -0,0 +1,296 @@
+import asyncio
+import multiprocessing as mp
+from multiprocessing import connection as mp_connection
+import os
+import threading
+import uuid
+from collections import OrderedDict, deque
+from datetime import datetime
+from typing import Any, Deque, Dict, List, Optional, Set
+
+# Глобальна межа одночасних прогонів (окремі процеси)
+MAX_CONCURRENT_JOBS = 1
+# Скільки задач може чекати в черзі
+MAX_PENDING_JOBS = 32
+# Скільки завершених задач тримати для опитування
+MAX_FINISHED_JOBS = 100
+# Знижений пріоритет воркерів, щоб бенчмарки не відбирали CPU у /config
+WORKER_NICE = 10
+
+JOB_KINDS = ("run", "suite", "scaling")
+FINISHED_STATUSES = ("done", "failed", "cancelled")
+
+
+class JobQueueFull(Exception):
+    pass
+
+
+def _run_job(kind: str, params: Dict[str, Any], progress) -> Dict[str, Any]:
+    if kind == "run":
+        from app.services.benchmark import BenchmarkService
+        return BenchmarkService().run_benchmark(progress=progress, **params)
+    if kind == "suite":
+        from app.services.benchmark_suite import run_suite
+        return run_suite(progress=progress, **params)
+    if kind == "scaling":
+        from app.services.benchmark_scaling import scaling_report
+        return scaling_report(progress=progress, **params)
+    raise ValueError(f"Невідомий тип задачі: {kind}")
+
+
+def _job_main(job_id: str, kind: str, params: Dict[str, Any], conn) -> None:
+    """Точка входу процесу-воркера: прогрес і результат ідуть у власний канал задачі."""
+    if hasattr(os, "nice"):
+        try:
+            os.nice(WORKER_NICE)
+        except OSError:
+            pass
+
+    def progress(phase: str, percent: float) -> None:
+        conn.send(("progress", phase, round(float(percent), 1)))
+
+    try:
+        result = _run_job(kind, params, progress)
+    except BaseException as e:
+        conn.send(("error", f"{type(e).__name__}: {e}"))
+    else:
+        conn.send(("done", result))
+    finally:
+        conn.close()
+
+
+class BenchmarkJob:
+    __slots__ = ("id", "kind", "params", "status", "phase", "progress", "result", "error",
+                 "created_at", "started_at", "finished_at", "process", "conn")
+
+    def __init__(self, kind: str, params: Dict[str, Any]):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.params = params
+        self.status = "queued"
+        self.phase: Optional[str] = None
+        self.progress = 0.0
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+        self.created_at = datetime.utcnow().isoformat()
+        self.started_at: Optional[str] = None
+        self.finished_at: Optional[str] = None
+        self.process = None
+        self.conn = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED_STATUSES
+
+    def to_dict(self, include_result: bool = True) -> Dict[str, Any]:
+        data = {
+            "job_id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "phase": self.phase,
+            "progress": self.progress,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+        if include_result:
+            data["result"] = self.result
+        return data
+
+
+class BenchmarkJobManager:
+    """
+    Черга бенчмарк-задач.
+
+    Кожна задача виконується в окремому процесі (spawn), одночасно — не
+    більше max_workers; решта чекає в черзі. Процеси мають знижений
+    пріоритет, тож обробка /config у головному процесі не конкурує з ними
+    на рівних. Прогрес і результат кожна задача шле власним каналом (Pipe),
+    усі канали читає один фоновий потік; закритий без результату канал
+    означає аварійне завершення процесу. Скасування задачі, що вже
+    виконується, — завершення її процесу.
+    """
+
+    def __init__(self, max_workers: int = MAX_CONCURRENT_JOBS, max_pending: int = MAX_PENDING_JOBS,
+                 max_finished: int = MAX_FINISHED_JOBS):
+        self.max_workers = max(1, max_workers)
+        self.max_pending = max_pending
+        self.max_finished = max_finished
+        self._ctx = mp.get_context("spawn")
+        self._jobs: "OrderedDict[str, BenchmarkJob]" = OrderedDict()
+        self._pending: Deque[BenchmarkJob] = deque()
+        self._running: Dict[str, BenchmarkJob] = {}
+        self._reading: Set[Any] = set()  # канали, з яких монітор зараз читає (поза замком)
+        self._lock = threading.RLock()
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+
+    # ---------------- ЖИТТЄВИЙ ЦИКЛ ---------------- #
+
+    def start(self) -> None:
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stopping.clear()
+            self._thread = threading.Thread(target=self._monitor, name="benchmark-jobs", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: Optional[float] = 5.0) -> None:
+        """Скасовує незавершені задачі та зупиняє потік-монітор."""
+        with self._lock:
+            for job in list(self._pending) + list(self._running.values()):
+                self._cancel(job)
+            thread = self._thread
+            self._thread = None
+        self._stopping.set()
+        if thread is not None:
+            thread.join(timeout)
+
+    # ---------------- API ---------------- #
+
+    def submit(self, kind: str, params: Dict[str, Any]) -> BenchmarkJob:
+        if kind not in JOB_KINDS:
+            raise ValueError(f"Невідомий тип задачі: {kind}")
+        self.start()
+        with self._lock:
+            if len(self._pending) >= self.max_pending:
+                raise JobQueueFull(len(self._pending))
+            job = BenchmarkJob(kind, params)
+            self._jobs[job.id] = job
+            self._pending.append(job)
+            self._dispatch()
+        return job
+
+    def get(self, job_id: str) -> Optional[BenchmarkJob]:
+        return self._jobs.get(job_id)
+
+    def list(self) -> List[BenchmarkJob]:
+        with self._lock:
+            return list(self._jobs.values())
+
+    def cancel(self, job_id: str) -> Optional[BenchmarkJob]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None and not job.finished:
+                self._cancel(job)
+                self._dispatch()
+            return job
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "running": len(self._running),
+                "queued": len(self._pending),
+                "tracked": len(self._jobs),
+            }
+
+    # ---------------- ВНУТРІШНЄ ---------------- #
+
+    def _cancel(self, job: BenchmarkJob) -> None:
+        if job.status == "queued":
+            self._pending.remove(job)
+        elif job.process is not None and job.process.is_alive():
+            job.process.terminate()
+        self._finish(job, "cancelled")
+
+    def _dispatch(self) -> None:
+        while self._pending and len(self._running) < self.max_workers:
+            job = self._pending.popleft()
+            job.status = "running"
+            job.phase = "starting"
+            job.started_at = datetime.utcnow().isoformat()
+            reader, writer = self._ctx.Pipe(duplex=False)
+            job.conn = reader
+            job.process = self._ctx.Process(
+                target=_job_main,
+                args=(job.id, job.kind, job.params, writer),
+                name=f"benchmark-{job.id[:8]}",
+                daemon=True,
+            )
+            self._running[job.id] = job
+            job.process.start()
+            # своя копія кінця для запису закривається, щоб EOF означав вихід процесу
+            writer.close()
+
+    def _finish(self, job: BenchmarkJob, status: str, result: Optional[Dict] = None,
+                error: Optional[str] = None) -> None:
+        job.status = status
+        job.result = result
+        job.error = error
+        job.finished_at = datetime.utcnow().isoformat()
+        if status == "done":
+            job.progress = 100.0
+        self._running.pop(job.id, None)
+        if job.conn is not None:
+            # канал, який монітор саме читає, він закриє сам після читання
+            if job.conn not in self._reading:
+                job.conn.close()
+            job.conn = None
+        if job.process is not None:
+            job.process.join(1.0)
+            job.process = None
+        self._evict()
+
+    def _evict(self) -> None:
+        finished = [j for j in self._jobs.values() if j.finished]
+        for job in finished[:max(0, len(finished) - self.max_finished)]:
+            del self._jobs[job.id]
+
+    @staticmethod
+    def _receive(conn) -> Optional[tuple]:
+        """Наступна подія з каналу задачі; None — канал закрито (процес завершився)."""
+        try:
+            return conn.recv()
+        except (EOFError, OSError):
+            return None
+
+    def _apply(self, job: BenchmarkJob, event: Optional[tuple]) -> None:
+        if event is None:
+            code = job.process.exitcode if job.process is not None else None
+            self._finish(job, "failed", error=f"Процес бенчмарку завершився без результату (код {code})")
+        elif event[0] == "progress":
+            job.phase, job.progress = event[1], event[2]
+        elif event[0] == "done":
+            self._finish(job, "done", result=event[1])
+        elif event[0] == "error":
+            self._finish(job, "failed", error=event[1])
+
+    def _monitor(self) -> None:
+        while not self._stopping.is_set():
+            with self._lock:
+                conns = {job.conn: job for job in self._running.values() if job.conn is not None}
+            if not conns:
+                self._stopping.wait(0.1)
+                continue
+            try:
+                ready = mp_connection.wait(list(conns), timeout=0.2)
+            except OSError:  # канал закрили (скасування) між знімком і очікуванням
+                continue
+            with self._lock:
+                # за час очікування задачу могли скасувати
+                ready = [conn for conn in ready if conns[conn].conn is conn]
+                self._reading = set(ready)
+            # розпаковка звіту (може бути кілька МБ) — без замка, щоб GET /jobs
+            # і скасування не чекали на неї; під замком — лише стан задач
+            events = [(conn, self._receive(conn)) for conn in ready]
+            with self._lock:
+                self._reading = set()
+                for conn, event in events:
+                    job = conns[conn]
+                    if job.conn is conn and not job.finished:
+                        self._apply(job, event)
+                    elif not conn.closed:
+                        conn.close()  # задачу скасували, поки читали її канал
+                self._dispatch()
+
+
+async def wait_for_job(job: BenchmarkJob, poll: float = 0.05) -> BenchmarkJob:
+    """Очікування без зайнятого потоку: цикл подій лише періодично перевіряє статус."""
+    while not job.finished:
+        await asyncio.sleep(poll)
+    return job
+
+
+benchmark_jobs = BenchmarkJobManager()
@@ -0,0 +1,404 @@
+import argparse
+import json
+import re
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from app.db.repo import Repo
+from app.services.benchmark import ProgressCallback
+from app.services.benchmark_suite import BENCHMARK_DIR, build_scenarios
+from app.services.greedy import GreedyConfigurator
+from app.services.prepared_catalog import PreparedCatalog, compiled_synthetic_catalog
+from app.services.synthetic import generate_synthetic
+
+BASELINE_DIR = BENCHMARK_DIR / "baselines"
+
+# Геометричний ряд розмірів каталогу за замовчуванням
+DEFAULT_SIZES = (10, 100, 1000, 10000, 100000, 1000000)
+
+# Фази, для яких оцінюється показник складності та порівнюється базова лінія
+PHASES = ("generation", "index_build", "selection", "configure")
+
+# Нижче цього часу вимір — здебільшого шум таймера, у підгонку не йде
+MIN_FIT_MS = 0.05
+
+# На малих n домінують сталі витрати; показник оцінюється по «хвосту»
+FIT_MIN_N = 1000
+
+# Розміри збірок (деталей) для перевірки з'єднань
+ASSEMBLY_SIZES = (10, 100, 1000, 2000, 5000)
+ASSEMBLY_PHASES = ("plan", "top_up")
+ASSEMBLY_SHARE = 10.0   # частка прогресу scaling_report на криву з'єднань, %
+
+
+def geometric_sizes(min_n: int = 10, max_n: int = 1000000, factor: float = 10.0) -> List[int]:
+    sizes = []
+    n = float(min_n)
+    while n <= max_n:
+        sizes.append(int(round(n)))
+        n *= factor
+    if sizes[-1] != max_n:
+        sizes.append(max_n)
+    return sizes
+
+
+def representative_scenarios():
+    """Кілька різнотипних запитів: колеса+політ+сенсори, човен, маніпулятор."""
+    return (
+        build_scenarios(["speed"], ["drive_fly_scan"], ["indoor"], [2])
+        + build_scenarios(["stability"], ["swim"], ["water_pool"], [3])
+        + build_scenarios(["cheapness"], ["manipulate"], ["indoor"], [1])
+    )
+
+
+def fit_exponent(sizes: Sequence[int], times_ms: Sequence[float], min_n: int = FIT_MIN_N) -> Optional[float]:
+    """
+    Нахил log(t) від log(n) методом найменших квадратів: t ~ n^k.
+
+    Беруться точки з n >= min_n; якщо таких менше двох — усі виміряні.
+    """
+    points = [(n, t) for n, t in zip(sizes, times_ms) if t is not None and t >= MIN_FIT_MS]
+    tail = [p for p in points if p[0] >= min_n]
+    if len(tail) >= 2:
+        points = tail
+    if len(points) < 2:
+        return None
+    x = np.log([p[0] for p in points])
+    y = np.log([p[1] for p in points])
+    slope, _ = np.polyfit(x, y, 1)
+    return round(float(slope), 3)
+
+
+def run_scaling(sizes: Optional[Sequence[int]] = None, seed: int = 0, repetitions: int = 5,
+                progress: Optional[ProgressCallback] = None) -> Dict[str, Any]:
+    """
+    Прогін конфігуратора на каталогах зростаючого розміру.
+
+    Для кожного n: генерація (seed), побудова PreparedCatalog, потім
+    repetitions прогонів репрезентативних запитів — беруться медіани.
+    Якщо датасет (n, seed) скомпільовано, він відкривається зі знімка, а
+    точка позначається compiled (генерація 0, index_build — відкриття).
+    progress(фаза, відсоток) зважено за n, бо час росте разом із розміром.
+    """
+    sizes = sorted(sizes or DEFAULT_SIZES)
+    total_n = float(sum(sizes))
+    done_n = 0
+    snapshot = Repo().get_snapshot()
+    scenarios = representative_scenarios()
+
+    points = []
+    for n in sizes:
+        if progress is not None:
+            progress(f"n={n}", 100.0 * done_n / total_n)
+        gen_ms = 0.0
+        start = time.perf_counter()
+        catalog = compiled_synthetic_catalog(snapshot, n, seed)
+        build_ms = (time.perf_counter() - start) * 1000
+        compiled = catalog is not None
+        if catalog is None:
+            start = time.perf_counter()
+            dataset = generate_synthetic(snapshot.components, n, seed, catalog_version=snapshot.version)
+            gen_ms = (time.perf_counter() - start) * 1000
+
+            start = time.perf_counter()
+            catalog = PreparedCatalog(dataset)
+            build_ms = (time.perf_counter() - start) * 1000
+            del dataset
+
+        selection_ms = 0.0
+        configure_ms = 0.0
+        for scenario in scenarios:
+            configurator = GreedyConfigurator(catalog)
+            configurator.configure(scenario["request"])  # прогрів
+            sel, total = [], []
+            for _ in range(repetitions):
+                start = time.perf_counter()
+                configurator.configure(scenario["request"])
+                total.append((time.perf_counter() - start) * 1000)
+                sel.append(configurator.timings.get("selection", 0.0))
+            selection_ms += float(np.median(sel))
+            configure_ms += float(np.median(total))
+
+        points.append({
+            "n": n,
+            "generation": round(gen_ms, 4),
+            "index_build": round(build_ms, 4),
+            "selection": round(selection_ms, 4),
+            "configure": round(configure_ms, 4),
+            "compiled": compiled,
+        })
+        del catalog
+        done_n += n
+
+    if progress is not None:
+        progress("done", 100.0)
+
+    return {
+        "meta": {
+            "created_at": datetime.utcnow().isoformat(),
+            "catalog_version": snapshot.version,
+            "seed": seed,
+            "repetitions": repetitions,
+            "scenarios": [s["name"] for s in scenarios],
+        },
+        "points": points,
+        "exponents": {
+            phase: fit_exponent([p["n"] for p in points], [p[phase] for p in points])
+            for phase in PHASES
+        },
+    }
+
+
+def run_assembly_scaling(sizes: Optional[Sequence[int]] = None, seed: int = 0,
+                         repetitions: int = 5, progress: Optional[ProgressCallback] = None) -> Dict[str, Any]:
+    """
+    Перевірка з'єднань (AssemblyPlanner) на збірках зростаючого розміру.
+
+    Збірка з n деталей — вибірка (seed) з рядків реального каталогу, що
+    мають дискретні роз'єми або є кріпленнями, без кріплень у половині
+    випадків, щоб парування мало що доповнювати. Медіани plan і top_up, мс;
+    progress — як у run_scaling, фази "assembly n=…".
+    """
+    sizes = sorted(sizes or ASSEMBLY_SIZES)
+    total_n = float(sum(sizes))
+    done_n = 0
+    if progress is not None:
+        progress("assembly", 0.0)
+    snapshot = Repo().get_snapshot()
+    catalog = PreparedCatalog(snapshot.components)
+    planner = catalog.assembly
+    connected = np.flatnonzero(planner.demand.any(axis=1) | planner.supply.any(axis=1))
+    bare = connected[planner.demand[connected].any(axis=1)]  # без кріплень: у них немає попиту
+    rng = np.random.default_rng(seed)
+
+    points = []
+    for n in sizes:
+        if progress is not None:
+            progress(f"assembly n={n}", 100.0 * done_n / total_n)
+        plan_ms, top_up_ms = [], []
+        demand = 0
+        for i in range(repetitions):
+            pool = bare if i % 2 else connected
+            rows = rng.choice(pool, size=n).tolist()
+            start = time.perf_counter()
+            report = planner.plan(rows)
+            plan_ms.append((time.perf_counter() - start) * 1000)
+            start = time.perf_counter()
+            planner.top_up(rows)
+            top_up_ms.append((time.perf_counter() - start) * 1000)
+            demand = max(demand, report["demand"])
+        points.append({
+            "n": n,
+            "demand": demand,
+            "plan": round(float(np.median(plan_ms)), 4),
+            "top_up": round(float(np.median(top_up_ms)), 4),
+        })
+        done_n += n
+
+    if progress is not None:
+        progress("done", 100.0)
+
+    return {
+        "meta": {
+            "created_at": datetime.utcnow().isoformat(),
+            "catalog_version": snapshot.version,
+            "seed": seed,
+            "repetitions": repetitions,
+        },
+        "points": points,
+        "exponents": {
+            phase: fit_exponent([p["n"] for p in points], [p[phase] for p in points])
+            for phase in ASSEMBLY_PHASES
+        },
+    }
+
+
+# ---------------- БАЗОВІ ЛІНІЇ ---------------- #
+
+def validate_baseline_name(name: str) -> str:
+    """Назва стає іменем файлу, тож без шляхів: літери, цифри, '_', '-', '.'."""
+    if not re.fullmatch(r"[A-Za-z0-9_-][A-Za-z0-9_.-]{0,63}", name or ""):
+        raise ValueError(f"Некоректна назва базової лінії: {name!r}")
+    return name
+
+
+def _baseline_path(name: str) -> Path:
+    return BASELINE_DIR / f"{validate_baseline_name(name)}.json"
+
+
+def save_baseline(name: str, report: Dict[str, Any]) -> Path:
+    path = _baseline_path(name)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+    return path
+
+
+def load_baseline(name: str) -> Dict[str, Any]:
+    path = _baseline_path(name)
+    if not path.exists():
+        raise FileNotFoundError(f"Базову лінію {name!r} не знайдено")
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def check_baseline_names(save_as: Optional[str] = None, compare_to: Optional[str] = None) -> None:
+    """Перевірка назв до довгого прогону: ValueError або FileNotFoundError."""
+    if save_as:
+        validate_baseline_name(save_as)
+    if compare_to and not _baseline_path(compare_to).exists():
+        raise FileNotFoundError(f"Базову лінію {compare_to!r} не знайдено")
+
+
+def list_baselines() -> List[str]:
+    if not BASELINE_DIR.exists():
+        return []
+    return sorted(p.stem for p in BASELINE_DIR.glob("*.json"))
+
+
+def compare(
+    report: Dict[str, Any],
+    baseline: Dict[str, Any],
+    tolerance: float = 0.25,
+    exponent_tolerance: float = 0.15,
+    phases: Sequence[str] = ("index_build", "selection", "configure"),
+) -> Dict[str, Any]:
+    """
+    Порівняння прогону з базовою лінією.
+
+    Фаза провалюється, якщо на спільному n стала повільнішою більш ніж
+    на tolerance (частка), або якщо її показник складності виріс більш
+    ніж на exponent_tolerance. Точки, де обидва виміри нижчі за MIN_FIT_MS,
+    не оцінюються.
+    """
+    base_points = {p["n"]: p for p in baseline.get("points", [])}
+    result: Dict[str, Any] = {"passed": True, "tolerance": tolerance,
+                              "exponent_tolerance": exponent_tolerance, "phases": {}}
+
+    for phase in phases:
+        deltas = []
+        phase_ok = True
+        for point in report.get("points", []):
+            base = base_points.get(point["n"])
+            if base is None or phase not in base:
+                continue
+            # відкриття скомпільованого знімка з побудовою індексів не порівнюється
+            if phase == "index_build" and point.get("compiled", False) != base.get("compiled", False):
+                continue
+            current_ms, base_ms = point[phase], base[phase]
+            measurable = max(current_ms, base_ms) >= MIN_FIT_MS and base_ms > 0
+            delta = (current_ms / base_ms - 1) if measurable else 0.0
+            ok = not measurable or delta <= tolerance
+            phase_ok &= ok
+            deltas.append({
+                "n": point["n"],
+                "baseline_ms": base_ms,
+                "current_ms": current_ms,
+                "delta_pct": round(delta * 100, 2),
+                "passed": ok,
+            })
+
+        base_exp = (baseline.get("exponents") or {}).get(phase)
+        cur_exp = (report.get("exponents") or {}).get(phase)
+        exp_ok = base_exp is None or cur_exp is None or cur_exp <= base_exp + exponent_tolerance
+        phase_ok &= exp_ok
+
+        result["phases"][phase] = {
+            "passed": phase_ok,
+            "exponent": {"baseline": base_exp, "current": cur_exp, "passed": exp_ok},
+            "points": deltas,
+        }
+        result["passed"] &= phase_ok
+
+    return result
+
+
+def _scaled_progress(progress: Optional[ProgressCallback], low: float, high: float) -> Optional[ProgressCallback]:
+    """progress вкладеного прогону, стиснутий у [low, high]; його "done" пропускається."""
+    if progress is None:
+        return None
+
+    def report(phase: str, percent: float) -> None:
+        if phase != "done":
+            progress(phase, low + (high - low) * percent / 100.0)
+    return report
+
+
+def scaling_report(
+    sizes: Optional[Sequence[int]] = None,
+    seed: int = 0,
+    repetitions: int = 5,
+    save_as: Optional[str] = None,
+    compare_to: Optional[str] = None,
+    tolerance: float = 0.25,
+    exponent_tolerance: float = 0.15,
+    assembly: bool = False,
+    assembly_sizes: Optional[Sequence[int]] = None,
+    progress: Optional[ProgressCallback] = None,
+) -> Dict[str, Any]:
+    """
+    Прогін + (за потреби) порівняння з базовою лінією та збереження нової;
+    assembly — також крива перевірки з'єднань (run_assembly_scaling) на
+    assembly_sizes, під яку відводиться останні ASSEMBLY_SHARE % прогресу.
+    """
+    check_baseline_names(save_as, compare_to)
+    baseline = load_baseline(compare_to) if compare_to else None
+
+    share = ASSEMBLY_SHARE if assembly else 0.0
+    report = run_scaling(sizes, seed=seed, repetitions=repetitions,
+                         progress=_scaled_progress(progress, 0.0, 100.0 - share))
+    if baseline is not None:
+        report["comparison"] = compare(report, baseline, tolerance, exponent_tolerance)
+    if assembly:
+        report["assembly"] = run_assembly_scaling(assembly_sizes, seed=seed, repetitions=repetitions,
+                                                  progress=_scaled_progress(progress, 100.0 - share, 100.0))
+    if progress is not None:
+        progress("done", 100.0)
+    if save_as:
+        save_baseline(save_as, report)
+        report["saved_as"] = save_as
+    return report
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Криві масштабування та регресії продуктивності")
+    parser.add_argument("--sizes", nargs="*", type=int, default=None)
+    parser.add_argument("--max-n", type=int, default=None, help="геометричний ряд 10..max_n")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repetitions", type=int, default=5)
+    parser.add_argument("--save", metavar="NAME", help="зберегти як базову лінію")
+    parser.add_argument("--compare", metavar="NAME", help="порівняти з базовою лінією")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument("--exponent-tolerance", type=float, default=0.15)
+    parser.add_argument("--assembly", action="store_true", help="перевірка з'єднань на збірках до тисяч деталей")
+    args = parser.parse_args(argv)
+
+    if args.assembly:
+        report = run_assembly_scaling(args.sizes, seed=args.seed, repetitions=args.repetitions)
+        for point in report["points"]:
+            print(point)
+        print("exponents:", report["exponents"])
+        return 0
+
+    sizes = args.sizes or (geometric_sizes(max_n=args.max_n) if args.max_n else None)
+    report = run_scaling(sizes, seed=args.seed, repetitions=args.repetitions)
+    for point in report["points"]:
+        print(point)
+    print("exponents:", report["exponents"])
+
+    status = 0
+    if args.compare:
+        comparison = compare(report, load_baseline(args.compare), args.tolerance, args.exponent_tolerance)
+        for phase, info in comparison["phases"].items():
+            print(phase, "OK" if info["passed"] else "REGRESSION", info["exponent"])
+        status = 0 if comparison["passed"] else 1
+    if args.save:
+        print("baseline →", save_baseline(args.save, report))
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,276 @@
+import argparse
+import itertools
+import json
+import platform
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+from app.db.repo import Repo
+from app.models.dto import ConfigRequest
+from app.services.benchmark import ProgressCallback, ignore_progress
+from app.services.greedy import GreedyConfigurator
+from app.services.prepared_catalog import PreparedCatalog, compiled_synthetic_catalog, get_prepared_catalog
+from app.services.synthetic import generate_synthetic
+
+BENCHMARK_DIR = Path(__file__).resolve().parent.parent / "data" / "benchmarks"
+
+# Набори функцій/підфункцій матриці сценаріїв
+FUNCTION_SCENARIOS: Dict[str, Dict[str, Any]] = {
+    "drive": {"functions": ["їздити"], "subFunctions": {"їздити": "колеса"}},
+    "drive_tracks": {"functions": ["їздити"], "subFunctions": {"їздити": "гусениці"}},
+    "fly": {"functions": ["літати"], "subFunctions": {"літати": "квадрокоптер"}},
+    "fly_plane": {"functions": ["літати"], "subFunctions": {"літати": "літак"}},
+    "swim": {"functions": ["плавати"], "subFunctions": {"плавати": "гребні гвинти"}},
+    "manipulate": {"functions": ["маніпулювати"], "subFunctions": {"маніпулювати": "клішня (захват)"}},
+    "drive_manipulate": {
+        "functions": ["їздити", "маніпулювати"],
+        "subFunctions": {"їздити": "колеса", "маніпулювати": "біонічна рука"},
+    },
+    "drive_fly_scan": {
+        "functions": ["їздити", "літати", "сканувати"],
+        "subFunctions": {"їздити": "колеса", "літати": "квадрокоптер"},
+    },
+}
+PRIORITIES = ("speed", "stability", "cheapness", "durability")
+TERRAINS = ("indoor", "offroad", "water_pool")
+COMPLEXITY_LEVELS = (1, 2, 3)
+SENSORS = ["Сенсор відстані (УЗ)", "Гіроскоп", "Камера"]
+
+PHASES = ("blueprint", "selection", "compatibility", "serialization", "json_encode")
+
+
+def build_scenarios(
+    priorities: Optional[Sequence[str]] = None,
+    functions: Optional[Sequence[str]] = None,
+    terrains: Optional[Sequence[str]] = None,
+    complexity: Optional[Sequence[int]] = None,
+) -> List[Dict[str, Any]]:
+    """Декартів добуток вимірів матриці (None — усі значення виміру)."""
+    scenarios = []
+    for func, prio, terrain, level in itertools.product(
+        functions or list(FUNCTION_SCENARIOS),
+        priorities or PRIORITIES,
+        terrains or TERRAINS,
+        complexity or COMPLEXITY_LEVELS,
+    ):
+        base = FUNCTION_SCENARIOS[func]
+        scenarios.append({
+            "name": f"{func}/{prio}/{terrain}/c{level}",
+            "params": {"functions": func, "priority": prio, "terrain": terrain, "complexityLevel": level},
+            "request": ConfigRequest(
+                functions=base["functions"],
+                subFunctions=base["subFunctions"],
+                budget=1e9,
+                weight=1e9,
+                priority=prio,
+                sensors=SENSORS if "сканувати" in base["functions"] else [],
+                terrain=terrain,
+                complexityLevel=level,
+            ),
+        })
+    return scenarios
+
+
+def latency_summary(samples_ms: Sequence[float]) -> Dict[str, float]:
+    arr = np.asarray(samples_ms, dtype=np.float64)
+    if not len(arr):
+        return {}
+    p50, p95, p99 = np.percentile(arr, [50, 95, 99])
+    return {
+        "mean": round(float(arr.mean()), 4),
+        "p50": round(float(p50), 4),
+        "p95": round(float(p95), 4),
+        "p99": round(float(p99), 4),
+        "min": round(float(arr.min()), 4),
+        "max": round(float(arr.max()), 4),
+    }
+
+
+def peak_rss_kb() -> Optional[int]:
+    if resource is None:
+        return None
+    # на Linux ru_maxrss у кілобайтах, на macOS — у байтах
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return int(rss / 1024) if platform.system() == "Darwin" else int(rss)
+
+
+def run_scenario(catalog: PreparedCatalog, scenario: Dict[str, Any], warmup: int, repetitions: int) -> Dict[str, Any]:
+    request = scenario["request"]
+    configurator = GreedyConfigurator(catalog)
+
+    for _ in range(warmup):
+        configurator.configure(request)
+
+    latencies: List[float] = []
+    phases: Dict[str, List[float]] = {p: [] for p in PHASES}
+    result: Dict[str, Any] = {}
+    wall_start = time.perf_counter()
+    for _ in range(repetitions):
+        start = time.perf_counter()
+        result = configurator.configure(request)
+        encode_start = time.perf_counter()
+        json.dumps(result, ensure_ascii=False)
+        end = time.perf_counter()
+
+        latencies.append((end - start) * 1000)
+        for name, value in configurator.timings.items():
+            phases[name].append(value)
+        phases["json_encode"].append((end - encode_start) * 1000)
+    wall = time.perf_counter() - wall_start
+
+    # окремий прогін під tracemalloc (він сам уповільнює виконання)
+    tracemalloc.start()
+    configurator.configure(request)
+    _, traced_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "name": scenario["name"],
+        "params": scenario["params"],
+        "success": "error" not in result,
+        "error": result.get("error"),
+        "items_selected": len(result.get("selected", [])),
+        "latency_ms": latency_summary(latencies),
+        "throughput_rps": round(repetitions / wall, 2) if wall > 0 else None,
+        "phases_ms": {name: round(float(np.mean(v)), 4) for name, v in phases.items() if v},
+        "tracemalloc_peak_kb": round(traced_peak / 1024, 1),
+        "samples_ms": [round(v, 4) for v in latencies],
+    }
+
+
+def run_suite(
+    n: Optional[int] = None,
+    seed: int = 0,
+    warmup: int = 3,
+    repetitions: int = 20,
+    priorities: Optional[Sequence[str]] = None,
+    functions: Optional[Sequence[str]] = None,
+    terrains: Optional[Sequence[str]] = None,
+    complexity: Optional[Sequence[int]] = None,
+    out: Optional[Path] = None,
+    progress: Optional[ProgressCallback] = None,
+) -> Dict[str, Any]:
+    """
+    Прогін матриці сценаріїв на одному підготовленому каталозі.
+
+    n=None — реальний каталог; інакше синтетичний датасет розміру n (seed),
+    скомпільований знімок якого, якщо він є, береться замість генерації.
+    Результат (JSON) записується в out, якщо шлях задано.
+    progress(фаза, відсоток) — для фонових задач.
+    """
+    snapshot = Repo().get_snapshot()
+    progress = progress or ignore_progress
+
+    progress("setup", 0.0)
+
+    gen_ms = 0.0
+    build_start = time.perf_counter()
+    if n is None:
+        catalog = get_prepared_catalog(snapshot)
+    else:
+        catalog = compiled_synthetic_catalog(snapshot, n, seed)
+    compiled = n is not None and catalog is not None
+    build_ms = (time.perf_counter() - build_start) * 1000
+
+    if catalog is None:
+        gen_start = time.perf_counter()
+        dataset = generate_synthetic(snapshot.components, n, seed, catalog_version=snapshot.version)
+        gen_ms = (time.perf_counter() - gen_start) * 1000
+        progress("index_build", 5.0)
+        build_start = time.perf_counter()
+        catalog = PreparedCatalog(dataset)
+        build_ms = (time.perf_counter() - build_start) * 1000
+
+    scenarios = build_scenarios(priorities, functions, terrains, complexity)
+    results = []
+    for i, scenario in enumerate(scenarios):
+        progress("scenarios", 10.0 + 90.0 * i / len(scenarios))
+        results.append(run_scenario(catalog, scenario, warmup, repetitions))
+    progress("done", 100.0)
+
+    all_samples = [v for r in results for v in r["samples_ms"]]
+    total_time_s = sum(all_samples) / 1000
+    report = {
+        "meta": {
+            "started_at": datetime.utcnow().isoformat(),
+            "catalog_version": snapshot.version,
+            "n": len(catalog),
+            "seed": seed if n is not None else None,
+            "compiled": compiled,
+            "warmup": warmup,
+            "repetitions": repetitions,
+            "scenarios": len(scenarios),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "blueprint_cache": "warm",
+        },
+        "setup_ms": {
+            "generation": round(gen_ms, 3),
+            "index_build": round(build_ms, 3),
+        },
+        "summary": {
+            "latency_ms": latency_summary(all_samples),
+            "throughput_rps": round(len(all_samples) / total_time_s, 2) if total_time_s else None,
+            "failed_scenarios": sum(1 for r in results if not r["success"]),
+            "tracemalloc_peak_kb": max((r["tracemalloc_peak_kb"] for r in results), default=0),
+            "peak_rss_kb": peak_rss_kb(),
+        },
+        "scenarios": results,
+    }
+
+    if out is not None:
+        out = Path(out)
+        out.parent.mkdir(parents=True, exist_ok=True)
+        out.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+    return report
+
+
+def default_output_path() -> Path:
+    return BENCHMARK_DIR / f"suite-{datetime.utcnow().strftime('%Y%m%dT%H%M%S')}.json"
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Матриця бенчмарків конфігуратора")
+    parser.add_argument("--n", type=int, default=None, help="розмір синтетичного каталогу (за замовчуванням — реальний)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--repetitions", type=int, default=20)
+    parser.add_argument("--priorities", nargs="*", choices=PRIORITIES)
+    parser.add_argument("--functions", nargs="*", choices=list(FUNCTION_SCENARIOS))
+    parser.add_argument("--terrains", nargs="*", choices=TERRAINS)
+    parser.add_argument("--complexity", nargs="*", type=int, choices=COMPLEXITY_LEVELS)
+    parser.add_argument("--out", type=Path, default=None, help="файл JSON-результату")
+    args = parser.parse_args(argv)
+
+    out = args.out or default_output_path()
+    report = run_suite(
+        n=args.n,
+        seed=args.seed,
+        warmup=args.warmup,
+        repetitions=args.repetitions,
+        priorities=args.priorities,
+        functions=args.functions,
+        terrains=args.terrains,
+        complexity=args.complexity,
+        out=out,
+    )
+    summary = report["summary"]
+    print(
+        f"{report['meta']['scenarios']} сценаріїв, n={report['meta']['n']}: "
+        f"p50={summary['latency_ms'].get('p50')} мс, p95={summary['latency_ms'].get('p95')} мс, "
+        f"p99={summary['latency_ms'].get('p99')} мс, {summary['throughput_rps']} req/s → {out}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+from typing import Any, Dict, List
+
+# Формати результату конфігурації
+FULL_FORMAT = "full"
+BOM_FORMAT = "bom"
+RESULT_FORMATS = (FULL_FORMAT, BOM_FORMAT)
+
+
+def is_compact(result: Dict[str, Any]) -> bool:
+    return result.get("format") == BOM_FORMAT
+
+
+def line_role(comp: Dict) -> str:
+    return comp.get("primary_role") or comp.get("category") or "unknown"
+
+
+def compact_result(result: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Розгорнутий результат → специфікація (bill of materials).
+
+    components — кожен вибраний компонент один раз (у порядку першого
+    використання, без unique_id), lines — послідовні однакові одиниці
+    як (component_id, quantity, role). Рядки зберігають порядок одиниць,
+    тож expand_result відтворює розгорнутий результат байт у байт.
+    Помилки й уже компактні результати повертаються як є.
+    """
+    if "selected" not in result or is_compact(result):
+        return result
+
+    components: Dict[Any, Dict] = {}
+    lines: List[Dict[str, Any]] = []
+    for comp in result["selected"]:
+        comp_id = comp.get("id")
+        if comp_id not in components:
+            components[comp_id] = {k: v for k, v in comp.items() if k != "unique_id"}
+        if lines and lines[-1]["component_id"] == comp_id:
+            lines[-1]["quantity"] += 1
+        else:
+            lines.append({"component_id": comp_id, "quantity": 1, "role": line_role(comp)})
+
+    compact = {"format": BOM_FORMAT, "components": list(components.values()), "lines": lines}
+    compact.update((k, v) for k, v in result.items() if k != "selected")
+    return compact
+
+
+def expand_result(result: Dict[str, Any]) -> Dict[str, Any]:
+    """Специфікація → розгорнутий результат (запис на кожну одиницю з unique_id)."""
+    if not is_compact(result):
+        return result
+
+    components = {comp.get("id"): comp for comp in result["components"]}
+    selected: List[Dict] = []
+    for line in result["lines"]:
+        comp = components[line["component_id"]]
+        for _ in range(line["quantity"]):
+            selected.append({**comp, "unique_id": f"{comp['id']}-{len(selected)}"})
+
+    expanded: Dict[str, Any] = {"selected": selected}
+    expanded.update((k, v) for k, v in result.items() if k not in ("format", "components", "lines"))
+    return expanded
+
+
+def format_result(result: Dict[str, Any], result_format: str) -> Dict[str, Any]:
+    return compact_result(result) if result_format == BOM_FORMAT else expand_result(result)
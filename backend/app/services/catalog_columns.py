@@ -0,0 +1,151 @@
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+# Поля scores.*, які зберігаються окремими колонками
+SCORE_FIELDS = (
+    "structural_strength",
+    "connection_versatility",
+    "precision_level",
+    "cost_efficiency",
+    "compactness",
+)
+
+SIZE_CLASSES = ("small", "medium", "large")
+
+OFFROAD_TAGS = ("off-road", "offroad", "terrain_rough")
+
+# Склад колонок — для експорту в скомпільований знімок і назад
+NUMERIC_COLUMNS = ("price", "weight", "rpm_nominal", "torque_nominal_ncm", "stud_length", "stud_width")
+CODED_COLUMNS = ("category", "domain", "family")
+FLAG_COLUMNS = ("is_offroad", "has_axle_conn", "has_pin_conn", "is_structural_role", "is_base", "is_air")
+
+
+def encode(values: Sequence[str]) -> Tuple[np.ndarray, List[str], Dict[str, int]]:
+    """Кодує рядки цілими числами у порядку першої появи."""
+    index: Dict[str, int] = {}
+    codes = np.fromiter(
+        (index.setdefault(v, len(index)) for v in values),
+        dtype=np.int32,
+        count=len(values),
+    )
+    return codes, list(index), index
+
+
+def _num(value) -> float:
+    return float(value or 0)
+
+
+def _is_offroad(comp: Dict) -> bool:
+    tags = (comp.get("meta") or {}).get("tags") or []
+    name_l = (comp.get("name") or "").lower()
+    return (
+        any(t in tags for t in OFFROAD_TAGS)
+        or "off-road" in name_l
+        or "offroad" in name_l
+    )
+
+
+def _has_connector(comp: Dict, conn_type: str) -> bool:
+    return any(conn.get("type") == conn_type for conn in comp.get("connectors", []) or [])
+
+
+class CatalogColumns:
+    """
+    Колонкове (struct-of-arrays) представлення нормалізованих записів.
+
+    Рядок i відповідає records[i]. Числові поля — float64, категорія,
+    домен, сімейство й size_class — цілі коди зі словниками *_vocab.
+    """
+
+    def __init__(self, records: Sequence[Dict]):
+        n = len(records)
+        self.size = n
+
+        def column(getter) -> np.ndarray:
+            return np.fromiter((getter(c) for c in records), dtype=np.float64, count=n)
+
+        def flags(predicate) -> np.ndarray:
+            return np.fromiter((bool(predicate(c)) for c in records), dtype=bool, count=n)
+
+        self.price = column(lambda c: _num(c.get("price")))
+        self.weight = column(lambda c: _num(c.get("weight")))
+        self.rpm_nominal = column(lambda c: _num((c.get("electronics") or {}).get("rpm_nominal")))
+        self.torque_nominal_ncm = column(lambda c: _num((c.get("electronics") or {}).get("torque_nominal_ncm")))
+        self.stud_length = column(lambda c: _num((c.get("geometry") or {}).get("stud_length")))
+        self.stud_width = column(lambda c: _num((c.get("geometry") or {}).get("stud_width")))
+        self.scores: Dict[str, np.ndarray] = {
+            field: column(lambda c, f=field: _num((c.get("scores") or {}).get(f)))
+            for field in SCORE_FIELDS
+        }
+
+        self.category, self.category_vocab, self.category_code = encode(
+            [c.get("category", "unknown") for c in records]
+        )
+        self.domain, self.domain_vocab, self.domain_code = encode(
+            [c.get("domain", "universal") or "universal" for c in records]
+        )
+        self.family, self.family_vocab, self.family_code = encode(
+            [c.get("family") or "" for c in records]
+        )
+        # size_class без значення трактується як "medium" (як і у фільтрах ролей)
+        size_code = {s: i for i, s in enumerate(SIZE_CLASSES)}
+        self.size_class = np.fromiter(
+            (size_code.get((c.get("geometry") or {}).get("size_class") or "medium", -1) for c in records),
+            dtype=np.int8,
+            count=n,
+        )
+
+        # статичні прапорці, що раніше обчислювались обходом словників на кожен запит
+        self.is_offroad = flags(_is_offroad)
+        self.has_axle_conn = flags(lambda c: _has_connector(c, "axle"))
+        self.has_pin_conn = flags(lambda c: _has_connector(c, "pin"))
+        self.is_structural_role = flags(lambda c: (c.get("primary_role") or "structural") == "structural")
+        self.is_base = flags(lambda c: c.get("is_base"))
+        self.is_air = flags(
+            lambda c: (c.get("category") or "").lower() in ("propeller", "wing")
+            or (c.get("domain") or "universal").lower() == "air"
+        )
+
+    # ---------------- ЕКСПОРТ ---------------- #
+
+    def export(self) -> Tuple[Dict[str, List[str]], Dict[str, np.ndarray]]:
+        """(словники кодів, масиви) — усе, що потрібно для from_arrays."""
+        arrays: Dict[str, np.ndarray] = {name: getattr(self, name) for name in NUMERIC_COLUMNS + CODED_COLUMNS}
+        arrays.update({f"scores.{f}": self.scores[f] for f in SCORE_FIELDS})
+        arrays["size_class"] = self.size_class
+        arrays.update({name: getattr(self, name) for name in FLAG_COLUMNS})
+        vocabs = {name: getattr(self, f"{name}_vocab") for name in CODED_COLUMNS}
+        return vocabs, arrays
+
+    @classmethod
+    def from_arrays(cls, vocabs: Dict[str, List[str]], arrays: Dict[str, np.ndarray]) -> "CatalogColumns":
+        """Колонки поверх готових масивів (наприклад, відображених з файлу) без копіювання."""
+        self = cls.__new__(cls)
+        self.size = len(arrays["price"])
+        for name in NUMERIC_COLUMNS + FLAG_COLUMNS + ("size_class",):
+            setattr(self, name, arrays[name])
+        self.scores = {f: arrays[f"scores.{f}"] for f in SCORE_FIELDS}
+        for name in CODED_COLUMNS:
+            vocab = list(vocabs[name])
+            setattr(self, name, arrays[name])
+            setattr(self, f"{name}_vocab", vocab)
+            setattr(self, f"{name}_code", {v: i for i, v in enumerate(vocab)})
+        return self
+
+    # ---------------- ДОПОМІЖНІ ---------------- #
+
+    def family_codes(self, families: Sequence[str]) -> List[int]:
+        return [self.family_code[f] for f in families if f in self.family_code]
+
+    def size_codes(self, sizes: Sequence[str]) -> List[int]:
+        return [SIZE_CLASSES.index(s) for s in sizes]
+
+    def domain_lookup(self, allowed: Sequence[str]) -> np.ndarray:
+        """Таблиця code → дозволений; universal дозволений завжди."""
+        lut = np.zeros(len(self.domain_vocab), dtype=bool)
+        for dom in list(allowed) + ["universal"]:
+            code = self.domain_code.get(dom)
+            if code is not None:
+                lut[code] = True
+        return lut
@@ -0,0 +1,363 @@
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+from app.services.catalog_columns import CatalogColumns, encode
+
+# Масиви індексу для скомпільованого знімка: матриці зберігаються пласкими
+_MATRICES = ("offers", "connector_counts", "adjacency", "excluded_families", "required_families")
+_VECTORS = ("ids", "system", "only_with", "signature", "grid_types")
+_CSR = ("excludes", "excluded_by", "requires")
+COMPAT_ARRAYS = _MATRICES + _VECTORS + tuple(f"{name}.{part}" for name in _CSR for part in ("offsets", "values"))
+
+
+def _csr(src: Sequence[int], dst: Sequence[int], n: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Пари (рядок, значення) → (offsets, values); значення рядка — у порядку появи."""
+    src_arr = np.asarray(src, dtype=np.int64)
+    order = np.argsort(src_arr, kind="stable")
+    offsets = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(src_arr, minlength=n), out=offsets[1:])
+    return offsets, np.asarray(dst, dtype=np.int64)[order]
+
+
+def _entry_id(value: Any) -> Optional[int]:
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, int):
+        return value
+    if isinstance(value, str) and value.isdigit():
+        return int(value)
+    return None
+
+
+def _id_or_missing(value: Any) -> int:
+    comp_id = _entry_id(value)
+    return -1 if comp_id is None else comp_id
+
+
+def _row_by_id(ids: np.ndarray) -> Dict[int, int]:
+    """id → перший рядок з цим id (записи без числового id не індексуються)."""
+    row_by_id: Dict[int, int] = {}
+    for row, comp_id in enumerate(ids.tolist()):
+        if comp_id >= 0:
+            row_by_id.setdefault(comp_id, row)
+    return row_by_id
+
+
+class CompatibilityIndex:
+    """
+    Індекс сумісності нормалізованих записів (рядок i ↔ records[i]).
+
+    Будується разом із PreparedCatalog з полів, які раніше ніхто не читав:
+      - connectors[*].type / count / compatible_types → які типи з'єднань
+        має рядок і скільки (offers, connector_counts), симетрична суміжність
+        типів (adjacency) і поверхневі типи з pattern "grid" (grid_types);
+      - compatibility.incompatible_families і рядкові excludes → бітсет
+        виключених сімейств (excluded_families);
+      - числові excludes → виключені рядки в обидва боки (CSR);
+      - requires → потрібні id компонентів (CSR) і сімейства (бітсет);
+      - system_type / compatibility.only_with_system_type → коди систем
+        (розбиття каталогу на партиції за системою).
+
+    Перевірка збірки — один прохід по її рядках із бітовими операціями,
+    без обходу вкладених словників.
+    """
+
+    def __init__(self, records: Sequence[Dict], columns: CatalogColumns):
+        n = len(records)
+        self.families: List[str] = list(columns.family_vocab)
+        family_code = columns.family_code
+        self.family = columns.family
+
+        self.ids = np.fromiter((_id_or_missing(c.get("id")) for c in records), dtype=np.int64, count=n)
+        self.row_by_id = _row_by_id(self.ids)
+
+        # ---- з'єднання ----
+        type_index: Dict[str, int] = {}
+        pairs: Set[Tuple[int, int]] = set()
+        grid: Set[int] = set()
+        offer_rows: List[int] = []
+        offer_types: List[int] = []
+        offer_counts: List[int] = []
+        for row, c in enumerate(records):
+            for conn in c.get("connectors") or ():
+                t = type_index.setdefault(conn.get("type") or "", len(type_index))
+                offer_rows.append(row)
+                offer_types.append(t)
+                offer_counts.append(int(conn.get("count") or 1))
+                if conn.get("pattern") == "grid":
+                    grid.add(t)
+                for other in conn.get("compatible_types") or ():
+                    pairs.add((t, type_index.setdefault(other, len(type_index))))
+        self.connector_types: List[str] = list(type_index)
+        n_types = len(self.connector_types)
+        self.offers = np.zeros((n, n_types), dtype=bool)
+        self.offers[offer_rows, offer_types] = True
+        self.connector_counts = np.zeros((n, n_types), dtype=np.int32)
+        np.add.at(
+            self.connector_counts,
+            (np.asarray(offer_rows, dtype=np.int64), np.asarray(offer_types, dtype=np.int64)),
+            offer_counts,
+        )
+        self.grid_types = np.zeros(n_types, dtype=bool)
+        self.grid_types[list(grid)] = True
+        self.adjacency = np.zeros((n_types, n_types), dtype=bool)
+        for a, b in pairs:
+            self.adjacency[a, b] = self.adjacency[b, a] = True
+
+        # ---- виключення й вимоги ----
+        # (рядок, код сімейства) збираються в плоскі списки й записуються в бітсети разом
+        excluded_pairs: Tuple[List[int], List[int]] = ([], [])
+        required_pairs: Tuple[List[int], List[int]] = ([], [])
+        excludes: Set[Tuple[int, int]] = set()
+        requires: Tuple[List[int], List[int]] = ([], [])
+        for row, c in enumerate(records):
+            compat = c.get("compatibility") or {}
+            for values in (compat.get("incompatible_families"), c.get("excludes")):
+                for value in values or ():
+                    if value in family_code:
+                        excluded_pairs[0].append(row)
+                        excluded_pairs[1].append(family_code[value])
+                        continue
+                    target = _entry_id(value)
+                    if target in self.row_by_id:
+                        excludes.add((row, self.row_by_id[target]))
+
+            for value in c.get("requires") or ():
+                if value in family_code:
+                    required_pairs[0].append(row)
+                    required_pairs[1].append(family_code[value])
+                    continue
+                target = _entry_id(value)
+                # сімейства немає в каталозі — вимога невиконувана (-1)
+                requires[0].append(row)
+                requires[1].append(-1 if target is None else target)
+
+        n_fam = len(self.families)
+        self.excluded_families = np.zeros((n, n_fam), dtype=bool)
+        self.excluded_families[excluded_pairs] = True
+        self.required_families = np.zeros((n, n_fam), dtype=bool)
+        self.required_families[required_pairs] = True
+
+        pairs_out = sorted(excludes)
+        self.excludes = _csr([a for a, _ in pairs_out], [b for _, b in pairs_out], n)
+        pairs_in = sorted((b, a) for a, b in excludes)
+        self.excluded_by = _csr([b for b, _ in pairs_in], [a for _, a in pairs_in], n)
+        self.requires = _csr(requires[0], requires[1], n)
+
+        # ---- системи ----
+        systems = [c.get("system_type") or "" for c in records]
+        only_with = [(c.get("compatibility") or {}).get("only_with_system_type") or "" for c in records]
+        self.system, self.systems, system_code = encode(systems)
+        self.only_with = np.fromiter(
+            (system_code.setdefault(s, len(system_code)) if s else -1 for s in only_with), dtype=np.int32, count=n
+        )
+        self.systems = list(system_code)
+
+        self.signature = self._signatures(n)
+        self._summarize()
+
+    # ---------------- ЕКСПОРТ ---------------- #
+
+    def export(self) -> Tuple[Dict[str, Any], Dict[str, np.ndarray]]:
+        arrays: Dict[str, np.ndarray] = {name: getattr(self, name).ravel() for name in _MATRICES}
+        arrays.update({name: getattr(self, name) for name in _VECTORS})
+        for name in _CSR:
+            offsets, values = getattr(self, name)
+            arrays[f"{name}.offsets"], arrays[f"{name}.values"] = offsets, values
+        meta = {"connector_types": self.connector_types, "systems": self.systems}
+        return meta, arrays
+
+    @classmethod
+    def from_arrays(cls, meta: Dict[str, Any], arrays: Dict[str, np.ndarray], columns: CatalogColumns) -> "CompatibilityIndex":
+        self = cls.__new__(cls)
+        self.families = list(columns.family_vocab)
+        self.family = columns.family
+        self.connector_types = list(meta["connector_types"])
+        self.systems = list(meta["systems"])
+        n, n_types, n_fam = len(arrays["ids"]), len(self.connector_types), len(self.families)
+        self.ids = arrays["ids"]
+        self.row_by_id = _row_by_id(self.ids)
+        self.offers = arrays["offers"].reshape(n, n_types)
+        self.connector_counts = arrays["connector_counts"].reshape(n, n_types)
+        self.adjacency = arrays["adjacency"].reshape(n_types, n_types)
+        self.excluded_families = arrays["excluded_families"].reshape(n, n_fam)
+        self.required_families = arrays["required_families"].reshape(n, n_fam)
+        for name in ("system", "only_with", "signature", "grid_types"):
+            setattr(self, name, arrays[name])
+        for name in _CSR:
+            setattr(self, name, (arrays[f"{name}.offsets"], arrays[f"{name}.values"]))
+        self._summarize()
+        return self
+
+    # ---------------- ДОПОМІЖНІ ---------------- #
+
+    def _signatures(self, n: int) -> np.ndarray:
+        """
+        Код обмежень сумісності рядка: однакові коди — однакова поведінка
+        у фільтрі конфліктів. Рядки з виключеннями за id — кожен окремо.
+        """
+        personal = (np.diff(self.excludes[0]) > 0) | (np.diff(self.excluded_by[0]) > 0)
+        keys = [self.system, self.only_with + 1]
+        keys += list(np.packbits(self.excluded_families, axis=1).T)
+        codes = np.where(personal, np.arange(n) + 1, 0).astype(np.int64)
+        for key in keys:
+            key = key.astype(np.int64)
+            codes = codes * (int(key.max(initial=0)) + 1) + key
+            codes = np.unique(codes, return_inverse=True)[1].ravel()
+        return codes
+
+    @staticmethod
+    def _slice(csr: Tuple[np.ndarray, np.ndarray], row: int) -> np.ndarray:
+        offsets, values = csr
+        return values[offsets[row]:offsets[row + 1]]
+
+    def _summarize(self) -> None:
+        # exclusive — є пари, що не можуть бути разом (інакше фільтр конфліктів не потрібен);
+        # trivial — жодних обмежень, перевіряти збірку немає чого
+        self.exclusive = bool(
+            self.excluded_families.any()
+            or len(self.excludes[1])
+            or (self.only_with >= 0).any()
+        )
+        self.trivial = not self.exclusive and not self.required_families.any() and not len(self.requires[1])
+
+    def state(self) -> "BuildState":
+        return BuildState(self)
+
+    # ---------------- ПЕРЕВІРКА ЗБІРКИ ---------------- #
+
+    def validate(self, rows: Iterable[int]) -> Dict[str, Any]:
+        """
+        Перевірка збірки (рядки каталогу, можна з повторами).
+
+        conflicts — пари, що не можуть бути разом (виключене сімейство,
+        виключення за id, чужа система); missing — невиконані requires;
+        unconnected — деталі з роз'ємами, для яких у збірці немає жодного
+        сумісного типу з'єднання. valid — немає конфліктів і пропусків.
+        """
+        rows = np.asarray(list(rows), dtype=np.int64)
+        unique = np.unique(rows)
+        ids = self.ids
+        conflicts: List[Dict[str, Any]] = []
+        missing: List[Dict[str, Any]] = []
+
+        # сімейства: бітсет присутніх проти бітсетів виключених
+        fam = self.family[unique]
+        present = np.zeros(len(self.families), dtype=bool)
+        present[fam] = True
+        first_of_family = {int(f): int(r) for r, f in zip(unique[::-1].tolist(), fam[::-1].tolist())}
+        hits = self.excluded_families[unique] & present
+        for i in np.flatnonzero(hits.any(axis=1)).tolist():
+            row = int(unique[i])
+            for f in np.flatnonzero(hits[i]).tolist():
+                other = first_of_family[f]
+                conflicts.append({
+                    "kind": "incompatible_family",
+                    "id": int(ids[row]),
+                    "with_id": int(ids[other]),
+                    "family": self.families[f],
+                })
+
+        # виключення за id
+        in_build = set(unique.tolist())
+        for row in unique.tolist():
+            for other in self._slice(self.excludes, row).tolist():
+                if other in in_build and other != row:
+                    conflicts.append({"kind": "excludes", "id": int(ids[row]), "with_id": int(ids[other])})
+
+        # системи: only_with вимагає, щоб усі інші деталі були цієї системи
+        systems = self.system[unique]
+        for i in np.flatnonzero(self.only_with[unique] >= 0).tolist():
+            row, required = int(unique[i]), int(self.only_with[unique[i]])
+            foreign = unique[systems != required]
+            foreign = foreign[foreign != row]
+            if len(foreign):
+                conflicts.append({
+                    "kind": "system_type",
+                    "id": int(ids[row]),
+                    "with_id": int(ids[foreign[0]]),
+                    "system_type": self.systems[required],
+                })
+
+        # вимоги
+        need = self.required_families[unique] & ~present
+        for i in np.flatnonzero(need.any(axis=1)).tolist():
+            for f in np.flatnonzero(need[i]).tolist():
+                missing.append({"id": int(ids[unique[i]]), "requires": self.families[f]})
+        for row in unique.tolist():
+            for target in self._slice(self.requires, row).tolist():
+                if self.row_by_id.get(target) not in in_build:
+                    missing.append({"id": int(ids[row]), "requires": target if target >= 0 else None})
+
+        # з'єднання: типи інших деталей збірки (без самої деталі), суміжні з її типами
+        offers = self.offers[rows].astype(np.int64)
+        others = offers.sum(axis=0) - offers > 0
+        mates = (offers @ self.adjacency.astype(np.int64)) > 0
+        has_conn = offers.any(axis=1)
+        lonely = has_conn & ~(mates & others).any(axis=1)
+        unconnected = sorted({int(ids[r]) for r in rows[lonely].tolist()})
+
+        return {
+            "valid": not conflicts and not missing,
+            "conflicts": conflicts,
+            "missing": missing,
+            "unconnected": unconnected,
+        }
+
+
+class BuildState:
+    """
+    Стан збірки під час підбору: що вже вибрано і що через це заборонено.
+
+    conflict_mask(sl) — рядки відра, які конфліктують із вибраними
+    деталями; рахується векторно над бітсетами індексу.
+    """
+
+    def __init__(self, index: CompatibilityIndex):
+        self.index = index
+        self.active = index.exclusive
+        self.present_families = np.zeros(len(index.families), dtype=bool)
+        self.banned_families = np.zeros(len(index.families), dtype=bool)
+        self.blocked_rows: Set[int] = set()
+        self.systems: Set[int] = set()
+        self.required_system: Set[int] = set()
+        self._rows: Set[int] = set()
+
+    def add(self, row: int) -> None:
+        if not self.active or row in self._rows:
+            return
+        index = self.index
+        self._rows.add(row)
+        self.present_families[index.family[row]] = True
+        self.banned_families |= index.excluded_families[row]
+        self.blocked_rows.update(index._slice(index.excludes, row).tolist())
+        self.blocked_rows.update(index._slice(index.excluded_by, row).tolist())
+        self.systems.add(int(index.system[row]))
+        if index.only_with[row] >= 0:
+            self.required_system.add(int(index.only_with[row]))
+
+    def conflict_mask(self, sl: slice) -> Optional[np.ndarray]:
+        """Булева маска конфліктних рядків відра або None, якщо конфліктів бути не може."""
+        if not self._rows:
+            return None
+        index = self.index
+        mask = self.banned_families[index.family[sl]]
+        mask |= (index.excluded_families[sl] & self.present_families).any(axis=1)
+        if self.blocked_rows:
+            blocked = np.fromiter(self.blocked_rows, dtype=np.int64)
+            blocked = blocked[(blocked >= sl.start) & (blocked < sl.stop)]
+            mask[blocked - sl.start] = True
+        for required in self.required_system:
+            mask |= index.system[sl] != required
+        only_with = index.only_with[sl]
+        if self.systems:
+            # кандидат з only_with конфліктує з будь-якою вибраною деталлю іншої системи
+            foreign = np.ones(len(only_with), dtype=bool) if len(self.systems) > 1 else (
+                only_with != next(iter(self.systems))
+            )
+            mask |= (only_with >= 0) & foreign
+        # уже вибрана деталь не конфліктує сама з собою (повторні одиниці)
+        chosen = [row - sl.start for row in self._rows if sl.start <= row < sl.stop]
+        mask[chosen] = False
+        return mask
@@ -0,0 +1,222 @@
+import gzip
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.db.catalog_store import CatalogSnapshot
+from app.services.config_cache import LRUCache
+from app.services.prepared_catalog import default_domain
+
+# Поля картки компонента у списку (Home)
+LIST_FIELDS = ("id", "name", "category", "price", "weight", "image")
+
+# Іменовані проєкції для fields=
+PROJECTIONS: Dict[str, Optional[Tuple[str, ...]]] = {
+    "all": None,
+    "list": LIST_FIELDS,
+}
+
+# Проєкції, які рендеряться й стискаються одразу під час побудови
+COMMON_PROJECTIONS = (None, LIST_FIELDS)
+
+GZIP_LEVEL = 6
+GZIP_MIN_BYTES = 1024
+
+
+class PageError(ValueError):
+    pass
+
+
+def _dumps(value) -> bytes:
+    # той самий формат, що й у JSONResponse FastAPI
+    return json.dumps(value, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+class RenderedPage:
+    __slots__ = ("body", "gzipped", "etag", "gzip_etag", "next_cursor", "total")
+
+    def __init__(self, body: bytes, etag: str, next_cursor: Optional[int], total: int):
+        self.body = body
+        self.gzipped = gzip.compress(body, GZIP_LEVEL, mtime=0) if len(body) >= GZIP_MIN_BYTES else None
+        self.etag = etag
+        # стиснуте й нестиснуте подання — різні байти, тож і різні сильні ETag
+        self.gzip_etag = etag[:-1] + '-gzip"'
+        self.next_cursor = next_cursor
+        self.total = total
+
+
+class ComponentPages:
+    """
+    Сторінки каталогу для GET /components однієї версії знімка.
+
+    Кожен запис для проєкції серіалізується один раз (JSON-фрагмент), тож
+    сторінка — це склеювання готових фрагментів. Фільтри category/domain
+    ідуть через індекс значення → позиції в каталозі. Готові сторінки разом
+    зі стиснутою копією кешуються; ETag = версія каталогу + параметри запиту.
+    """
+
+    def __init__(self, snapshot: CatalogSnapshot):
+        self.version = snapshot.version
+        self.records = snapshot.components
+        self.fields = frozenset(k for comp in self.records for k in comp)
+        # id → перша позиція; курсор завжди вказує на перше входження свого id
+        self._pos_by_id: Dict[Any, int] = {}
+        for pos, comp in enumerate(self.records):
+            self._pos_by_id.setdefault(comp.get("id"), pos)
+
+        self._index: Dict[str, Dict[str, np.ndarray]] = {
+            "category": self._build_index(lambda c: c.get("category") or ""),
+            "domain": self._build_index(lambda c: c.get("domain") or default_domain(c.get("category") or "")),
+        }
+
+        self._lock = threading.Lock()
+        self._fragments: "OrderedDict[Optional[Tuple[str, ...]], List[bytes]]" = OrderedDict()
+        self._pages = LRUCache(256)
+
+        for projection in COMMON_PROJECTIONS:
+            self.page(projection)
+
+    def _build_index(self, key) -> Dict[str, np.ndarray]:
+        groups: Dict[str, List[int]] = {}
+        for pos, comp in enumerate(self.records):
+            groups.setdefault(key(comp), []).append(pos)
+        return {value: np.asarray(rows, dtype=np.int64) for value, rows in groups.items()}
+
+    # ---------------- ПАРАМЕТРИ ---------------- #
+
+    def parse_fields(self, fields: Optional[str]) -> Optional[Tuple[str, ...]]:
+        """fields=None|all|list|поле,поле,... → кортеж полів (id завжди перший) або None."""
+        if not fields:
+            return None
+        if fields in PROJECTIONS:
+            return PROJECTIONS[fields]
+        requested = [f.strip() for f in fields.split(",") if f.strip()]
+        unknown = sorted(set(requested) - self.fields)
+        if unknown:
+            raise PageError(f"Невідомі поля: {', '.join(unknown)}")
+        ordered = ["id"] + [f for f in dict.fromkeys(requested) if f != "id"]
+        return tuple(ordered)
+
+    def _positions(self, filters: Dict[str, Sequence[str]]) -> Optional[np.ndarray]:
+        """Позиції записів під фільтри (None — без фільтрів, увесь каталог)."""
+        positions = None
+        for name, values in filters.items():
+            if not values:
+                continue
+            index = self._index[name]
+            parts = [index[v] for v in values if v in index]
+            rows = np.unique(np.concatenate(parts)) if parts else np.empty(0, dtype=np.int64)
+            positions = rows if positions is None else np.intersect1d(positions, rows, assume_unique=True)
+        return positions
+
+    # ---------------- РЕНДЕР ---------------- #
+
+    def _fragments_for(self, projection: Optional[Tuple[str, ...]]) -> List[bytes]:
+        with self._lock:
+            fragments = self._fragments.get(projection)
+            if fragments is not None:
+                self._fragments.move_to_end(projection)
+                return fragments
+
+        if projection is None:
+            fragments = [_dumps(comp) for comp in self.records]
+        else:
+            fragments = [_dumps({f: comp[f] for f in projection if f in comp}) for comp in self.records]
+
+        with self._lock:
+            self._fragments[projection] = fragments
+            while len(self._fragments) > 16:
+                self._fragments.popitem(last=False)
+        return fragments
+
+    def _is_first(self, pos: int) -> bool:
+        return self._pos_by_id.get(self.records[pos].get("id")) == pos
+
+    def _cursor_stop(self, positions: Optional[np.ndarray], start: int, stop: int, total: int) -> int:
+        """
+        Кінець сторінки, після якого курсор однозначний: останній запис має
+        бути першим входженням свого id (інакше продовження почалося б з
+        першого дубліката й повторило рядки). Сторінка вкорочується до такого
+        запису, а якщо в ній його немає — подовжується до найближчого.
+        """
+        def at(i: int) -> int:
+            return i if positions is None else int(positions[i])
+
+        for i in range(stop - 1, start - 1, -1):
+            if self._is_first(at(i)):
+                return i + 1
+        i = stop
+        while i < total and not self._is_first(at(i)):
+            i += 1
+        return min(i + 1, total)
+
+    def page(
+        self,
+        projection: Optional[Tuple[str, ...]] = None,
+        category: Sequence[str] = (),
+        domain: Sequence[str] = (),
+        cursor: Optional[int] = None,
+        limit: Optional[int] = None,
+    ) -> RenderedPage:
+        """
+        Сторінка у порядку каталогу. cursor — id останнього запису попередньої
+        сторінки; курсор наступної повертається в next_cursor.
+        """
+        category, domain = tuple(sorted(set(category))), tuple(sorted(set(domain)))
+        key = (projection, category, domain, cursor, limit)
+        cached = self._pages.get(key)
+        if cached is not None:
+            return cached
+
+        positions = self._positions({"category": category, "domain": domain})
+        total = len(self.records) if positions is None else len(positions)
+
+        start = 0
+        if cursor is not None:
+            pos = self._pos_by_id.get(cursor)
+            if pos is None:
+                raise PageError("Недійсний курсор")
+            start = pos + 1 if positions is None else int(np.searchsorted(positions, pos, side="right"))
+
+        stop = total if limit is None else min(total, start + limit)
+        if stop < total:
+            stop = self._cursor_stop(positions, start, stop, total)
+        rows = range(start, stop) if positions is None else positions[start:stop].tolist()
+
+        fragments = self._fragments_for(projection)
+        body = b"[" + b",".join(fragments[r] for r in rows) + b"]"
+
+        next_cursor = None
+        if stop < total and stop > start:
+            last = stop - 1 if positions is None else int(positions[stop - 1])
+            next_cursor = self.records[last].get("id")
+
+        query_hash = hashlib.sha256(repr(key).encode("utf-8")).hexdigest()[:12]
+        rendered = RenderedPage(body, f'"{self.version}-{query_hash}"', next_cursor, total)
+        self._pages.put(key, rendered)
+        return rendered
+
+
+_pages: "OrderedDict[str, ComponentPages]" = OrderedDict()
+_pages_lock = threading.Lock()
+_PAGES_MAX = 2
+
+
+def get_component_pages(snapshot: CatalogSnapshot) -> ComponentPages:
+    """Сторінки для версії знімка (будуються один раз на версію)."""
+    pages = _pages.get(snapshot.version)
+    if pages is not None:
+        return pages
+
+    with _pages_lock:
+        pages = _pages.get(snapshot.version)
+        if pages is None:
+            pages = ComponentPages(snapshot)
+            _pages[snapshot.version] = pages
+            while len(_pages) > _PAGES_MAX:
+                _pages.popitem(last=False)
+    return pages
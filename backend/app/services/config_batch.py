@@ -0,0 +1,86 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterator, List, Sequence, Tuple
+
+from app.models.dto import ConfigRequest
+from app.services.config_cache import request_key, result_cache
+from app.services.greedy import GreedyConfigurator
+from app.services.prepared_catalog import PreparedCatalog
+
+# Верхня межа розміру пакета та кількість потоків
+MAX_BATCH_SIZE = 1000
+BATCH_WORKERS = 4
+
+
+def configure_cached(catalog: PreparedCatalog, request: ConfigRequest, key: str) -> Dict:
+    """Результат з кешу або новий прогін на спільному підготовленому каталозі."""
+    result = result_cache.get(key)
+    if result is None:
+        result = GreedyConfigurator(catalog).configure(request)
+        if _cacheable(request, result):
+            result_cache.put(key, result)
+    return result
+
+
+def _cacheable(request: ConfigRequest, result: Dict) -> bool:
+    """
+    Чи залежить результат лише від запиту й версії каталогу.
+
+    Точний підбір обмежений часом: розв'язок, знайдений до дедлайну
+    (optimal=False), і помилка після нього залежать від навантаження
+    машини, тож у кеш потрапляють лише доведено оптимальні.
+    """
+    if (request.solver or "greedy").lower() != "exact":
+        return True
+    return (result.get("solver") or {}).get("optimal") is True
+
+
+def _evaluate(catalog: PreparedCatalog, key: str, request: ConfigRequest) -> Tuple[int, Dict]:
+    """(HTTP-статус, результат): помилка одного запиту не зриває весь пакет."""
+    try:
+        result = configure_cached(catalog, request, key)
+    except Exception as e:
+        print(f"[WARN] Помилка конфігурації в пакеті: {e}")
+        return 500, {"error": f"Внутрішня помилка: {e}"}
+    return (400 if "error" in result else 200), result
+
+
+def configure_batch(
+    catalog: PreparedCatalog,
+    requests: Sequence[ConfigRequest],
+    workers: int = BATCH_WORKERS,
+) -> Iterator[Tuple[int, int, Dict]]:
+    """
+    Результати пакета запитів у порядку надходження: (index, status, result).
+
+    Усі запити обробляються на одному PreparedCatalog; однакові запити
+    (той самий ключ кешу) рахуються один раз. Унікальні розподіляються між
+    потоками, а результати віддаються, щойно готові всі попередні, тож
+    споживач (потокова відповідь) отримує перші елементи до кінця пакета.
+    """
+    keys = [request_key(r, catalog.version) for r in requests]
+
+    first_index: Dict[str, int] = {}
+    for i, key in enumerate(keys):
+        first_index.setdefault(key, i)
+    unique: List[Tuple[str, ConfigRequest]] = [(key, requests[i]) for key, i in first_index.items()]
+
+    if len(unique) <= 1 or workers <= 1:
+        results = (_evaluate(catalog, key, req) for key, req in unique)
+        executor = None
+    else:
+        executor = ThreadPoolExecutor(max_workers=min(workers, len(unique)), thread_name_prefix="config-batch")
+        results = executor.map(lambda item: _evaluate(catalog, *item), unique)
+
+    try:
+        done: Dict[str, Tuple[int, Dict]] = {}
+        pending = iter(zip(unique, results))
+        for i, key in enumerate(keys):
+            # результати унікальних запитів приходять у порядку першої появи
+            while key not in done:
+                (ukey, _), result = next(pending)
+                done[ukey] = result
+            status, result = done[key]
+            yield i, status, result
+    finally:
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
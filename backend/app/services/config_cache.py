@@ -0,0 +1,94 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+from app.models.dto import ConfigRequest
+
+
+class LRUCache:
+    """Обмежений потокобезпечний LRU-кеш з лічильниками влучань, промахів і витіснень."""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._data: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            value = self._data.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+        }
+
+
+def canonical_hash(payload: Any) -> str:
+    raw = json.dumps(payload, sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def blueprint_key(request: ConfigRequest, catalog_version: Optional[str]) -> str:
+    """
+    Ключ blueprint: лише поля, від яких залежить _build_blueprint.
+
+    Порядок functions зберігається — від нього залежить порядок слотів.
+    """
+    sub = request.subFunctions or {}
+    return canonical_hash({
+        "catalog": catalog_version,
+        "functions": list(request.functions),
+        "subFunctions": {f: (sub.get(f) or "").lower() for f in request.functions},
+        "sizeClass": (request.sizeClass or "medium").lower(),
+        "complexityLevel": request.complexityLevel or 2,
+        "terrain": (request.terrain or "indoor").lower(),
+        "decorationLevel": (request.decorationLevel or "normal").lower(),
+        "priority": (request.priority or "").lower(),
+        "sensors": len(request.sensors or []),
+    })
+
+
+def request_key(request: ConfigRequest, catalog_version: Optional[str]) -> str:
+    """Ключ повного результату: увесь запит у канонічній формі + версія каталогу."""
+    return canonical_hash({"catalog": catalog_version, "request": request.dict()})
+
+
+# Спільні на процес кеші. Значення лише читаються — не змінюйте їх після get().
+blueprint_cache = LRUCache(maxsize=256)
+result_cache = LRUCache(maxsize=1024)
+
+
+def cache_stats() -> Dict[str, Dict[str, Any]]:
+    return {"blueprint": blueprint_cache.stats(), "result": result_cache.stats()}
@@ -1,5 +1,22 @@
-from typing import List, Dict, Any, Optional
+import time
+from typing import List, Dict, Any, Optional, Tuple, Union
+
+import numpy as np
+
 from app.models.dto import ConfigRequest
+from app.services.compat_index import BuildState
+from app.services.config_cache import blueprint_cache, blueprint_key
+from app.services.prepared_catalog import ROLE_NAME_KEYWORDS, PreparedCatalog, ranking_priority
+from app.services.solver import (
+    DEFAULT_TIME_LIMIT_MS,
+    MAX_TIME_LIMIT_MS,
+    SOLVER_MODES,
+    Repair,
+    SolverSlot,
+    pareto_front,
+    rank_scores,
+    solve,
+)
 
 # Мапа "людських" підтипів на технічні категорії
 FUNCTION_TO_CATEGORY_MAP = {
@@ -28,6 +45,24 @@ FUNCTION_TO_CATEGORY_MAP = {
     "сканувати": "sensor",
 }
 
+# Рухові категорії, для яких на offroad перевага віддається позашляховим деталям
+LOCOMOTION_CATEGORIES = ("wheel", "tire", "track", "tread")
+
+# Назви водних деталей, що самі є корпусом човна
+HULL_NAME_KEYWORDS = ("корпус", "hull", "човн", "човна")
+
+
+class SelectionSlot:
+    """Слот blueprint: quantity однакових одиниць, кандидати — з першої вдалої спроби."""
+
+    __slots__ = ("key", "quantity", "attempts", "required")
+
+    def __init__(self, key: str, quantity: int, attempts: List[Dict[str, Any]], required: bool = True):
+        self.key = key
+        self.quantity = quantity
+        self.attempts = attempts
+        self.required = required
+
 
 class GreedyConfigurator:
     """
@@ -42,263 +77,117 @@ class GreedyConfigurator:
         "tire_offroad": "tire",
     }
 
-    def __init__(self, components: List[Dict]):
-        self.components = components
-        self._normalize_components()
-        self.component_map = self._build_component_map(self.components)
+    def __init__(self, components: Union[List[Dict], PreparedCatalog], prune_dominated: bool = True):
+        # Нормалізація та розкладка за категоріями робляться один раз у PreparedCatalog;
+        # сам конфігуратор — легке представлення над ним зі станом одного запиту.
+        # prune_dominated=False — пошук серед усіх кандидатів (для перевірки відсікання).
+        self.prune_dominated = prune_dominated
+        if isinstance(components, PreparedCatalog):
+            self.catalog = components
+        else:
+            self.catalog = PreparedCatalog(components)
+        self.components = self.catalog.components
+        self.component_map = self.catalog.component_map
         self._current_terrain: str = "indoor"
-
-    # ---------------- НОРМАЛІЗАЦІЯ ---------------- #
-
-    def _normalize_components(self) -> None:
-        """Додаємо дефолтні значення для полів, щоб уникнути помилок."""
-        for comp in self.components:
-            cat = comp.get("category", "")
-            
-            # domain
-            domain = comp.get("domain")
-            if not domain:
-                if cat in ("water",):
-                    comp["domain"] = "water"
-                elif cat in ("propeller",):
-                    comp["domain"] = "air"
-                elif cat in ("wheel", "tire", "track", "tread"):
-                    comp["domain"] = "ground"
-                else:
-                    comp["domain"] = "universal"
-
-            # family
-            if not comp.get("family"):
-                fam = self._infer_family(comp)
-                if fam:
-                    comp["family"] = fam
-
-            # safety: geometry/scores/connectors
-            if "geometry" not in comp:
-                comp["geometry"] = {}
-            if "scores" not in comp:
-                comp["scores"] = {}
-            if "connectors" not in comp:
-                comp["connectors"] = []
-            if "roles" not in comp:
-                comp["roles"] = []
-
-    def _infer_family(self, comp: Dict) -> Optional[str]:
-        """Евристика для визначення сімейства компонента."""
-        name = (comp.get("name") or "").lower()
-        cat = comp.get("category", "")
-
-        if cat == "structure":
-            if "кри" in name or "пластина-крило" in name or "клин (крило)" in name:
-                return "wing_plate"
-            if "пластина" in name or "plate" in name:
-                return "plate"
-            if "цегл" in name or "brick" in name:
-                return "brick"
-            if "панель" in name or "panel" in name:
-                return "panel"
-            if "техніч" in name or "technic" in name:
-                if "балк" in name or "beam" in name:
-                    return "technic_beam"
-                if "конектор" in name or "connector" in name:
-                    return "technic_connector"
-                if "пін" in name or "pin" in name:
-                    return "technic_pin"
-                if "ось" in name or "вісь" in name or "axle" in name:
-                    return "axle"
-                if "шестерн" in name or "gear" in name:
-                    return "gear"
-            if "шестерн" in name or "gear" in name:
-                return "gear"
-            if "корпус" in name or "hull" in name or "рама" in name:
-                return "hull_frame"
-
-        return None
-
-    # ---------------- БАЗОВІ МЕТОДИ ---------------- #
-
-    def _build_component_map(self, components: List[Dict]) -> Dict[str, List[Dict]]:
-        component_map: Dict[str, List[Dict]] = {}
-        for comp in components:
-            category = comp.get("category", "unknown")
-            component_map.setdefault(category, []).append(comp)
-        return component_map
-
-    # ---------------- ПРІОРИТЕТИ ТА СОРТУВАННЯ ---------------- #
-
-    def _motor_sort_key(self, comp: Dict, priority: str):
-        """Ключ сортування для моторів з урахуванням пріоритету."""
-        elec = comp.get("electronics") or {}
-        rpm = elec.get("rpm_nominal") or 0
-        torque = elec.get("torque_nominal_ncm") or 0
-        price = comp.get("price") or 0
-        weight = comp.get("weight") or 0
-        perf = rpm * torque
-        p = (priority or "").lower()
-
-        if p == "speed":
-            return (rpm, torque, -price)
-        if p == "stability":
-            return (torque, weight, -price)
-        if p == "cheapness":
-            return (-price, perf, torque)
-        if p == "durability":
-            return (weight, torque, -price)
-        return (perf, -price)
+        # вибрані деталі поточного підбору — для відсікання конфліктних кандидатів
+        self._build: BuildState = self.catalog.compat.state()
+        # звіт про з'єднання останнього _finish_rows
+        self._assembly: Optional[Dict[str, Any]] = None
+        # тривалості фаз останнього configure(), мс
+        self.timings: Dict[str, float] = {}
 
     # ---------------- ФІЛЬТРИ ---------------- #
 
-    def _filter_by_domain(self, candidates: List[Dict], allowed_domains: List[str]) -> List[Dict]:
-        """Фільтрація по доменам з урахуванням універсальних компонентів."""
+    def _domain_mask(self, sl: slice, allowed_domains: List[str]) -> Optional[np.ndarray]:
+        """Маска доменів з урахуванням універсальних компонентів (None — без обмежень)."""
         allowed = set(allowed_domains or [])
         if not allowed:
-            return candidates
+            return None
+        cols = self.catalog.columns
+        return cols.domain_lookup(sorted(allowed))[cols.domain[sl]]
 
-        result: List[Dict] = []
-        for c in candidates:
-            dom = c.get("domain", "universal") or "universal"
-            if dom == "universal" or dom in allowed:
-                result.append(c)
-        return result or []
+    def _role_masks(self, category: str, role: Optional[str], sl: slice) -> List[np.ndarray]:
+        """
+        Маски ролі по відру категорії в порядку спроб: перша непорожня
+        (у перетині з кандидатами) звужує вибір, інакше кандидати лишаються як є.
+        """
+        cols = self.catalog.columns
+        fam = cols.family[sl]
+        size = cols.size_class[sl]
 
-    def _apply_role_filter(
-        self,
-        candidates: List[Dict],
-        category: str,
-        role: Optional[str],
-    ) -> List[Dict]:
-        """Застосування фільтрів за роллю компонента."""
-        if not role:
-            return candidates
+        def family(*names: str) -> np.ndarray:
+            return np.isin(fam, cols.family_codes(names))
+
+        def size_in(*sizes: str) -> np.ndarray:
+            return np.isin(size, cols.size_codes(sizes))
+
+        def name_has(role_key: str) -> np.ndarray:
+            return self.catalog.keyword_mask(ROLE_NAME_KEYWORDS[role_key])[sl]
 
         # ---- STRUCTURE ----
         if category == "structure":
-            def family(c): return c.get("family")
-            def geom(c): return (c.get("geometry") or {})
-            def size(c):
-                g = geom(c)
-                return g.get("size_class") or "medium"
-
             if role == "body_plate":
-                filtered = [
-                    c for c in candidates
-                    if family(c) in ("plate", "frame", "wing_plate", "hull_frame")
-                    and size(c) in ("medium", "large")
-                ]
-                return filtered or candidates
-
+                return [family("plate", "frame", "wing_plate", "hull_frame") & size_in("medium", "large")]
             if role == "body_brick":
-                filtered = [
-                    c for c in candidates
-                    if family(c) in ("brick", "panel", "hull_frame")
-                    and size(c) in ("medium", "large")
-                ]
-                return filtered or candidates
-
+                return [family("brick", "panel", "hull_frame") & size_in("medium", "large")]
             if role == "beam":
-                filtered = [c for c in candidates if family(c) == "technic_beam"]
-                return filtered or candidates
-
+                return [family("technic_beam")]
             if role == "axle":
-                filtered = [
-                    c for c in candidates
-                    if family(c) == "axle"
-                    or any((conn.get("type") == "axle") for conn in c.get("connectors", []) or [])
-                ]
-                return filtered or candidates
-
+                return [family("axle") | cols.has_axle_conn[sl]]
             if role == "pin":
-                filtered = [
-                    c for c in candidates
-                    if family(c) == "technic_pin"
-                    or any((conn.get("type") == "pin") for conn in c.get("connectors", []) or [])
-                ]
-                return filtered or candidates
-
+                return [family("technic_pin") | cols.has_pin_conn[sl]]
             if role == "gear":
-                filtered = [c for c in candidates if family(c) == "gear"]
-                return filtered or candidates
-
+                return [family("gear")]
             if role == "small_brick":
-                filtered = [
-                    c for c in candidates
-                    if family(c) == "brick" and size(c) == "small"
-                ]
-                return filtered or candidates
-
+                return [family("brick") & size_in("small")]
             if role == "small_plate":
-                filtered = [
-                    c for c in candidates
-                    if family(c) == "plate" and size(c) == "small"
-                ]
-                return filtered or candidates
-
+                return [family("plate") & size_in("small")]
             if role == "small_detail":
-                filtered = [
-                    c for c in candidates
-                    if size(c) == "small"
-                    and (c.get("primary_role") or "structural") == "structural"
-                ]
-                return filtered or candidates
-
+                return [size_in("small") & cols.is_structural_role[sl]]
             if role == "kit":
-                filtered = [
-                    c for c in candidates
-                    if "набір" in (c.get("name") or "").lower()
-                    or "kit" in (c.get("name") or "").lower()
-                ]
-                return filtered or candidates
-
+                return [name_has("kit")]
             if role == "gearbox":
-                filtered = [
-                    c for c in candidates
-                    if "редуктор" in (c.get("name") or "").lower()
-                    or "gearbox" in (c.get("name") or "").lower()
-                ]
-                if filtered:
-                    return filtered
-                filtered = [c for c in candidates if family(c) == "gear"]
-                return filtered or candidates
-
+                return [name_has("gearbox"), family("gear")]
             if role == "wing":
-                filtered = [
-                    c for c in candidates
-                    if family(c) == "wing_plate"
-                    or "кри" in (c.get("name") or "").lower()
-                ]
-                return filtered or candidates
-
+                return [family("wing_plate") | name_has("wing")]
             if role == "hull":
-                filtered = [
-                    c for c in candidates
-                    if family(c) == "hull_frame"
-                    or "корпус" in (c.get("name") or "").lower()
-                    or "рама" in (c.get("name") or "").lower()
-                ]
-                return filtered or candidates
+                return [family("hull_frame") | name_has("hull")]
 
         # ---- ACCESSORY ----
         if category == "accessory" and role == "lights":
-            filtered = []
-            for c in candidates:
-                n = (c.get("name") or "").lower()
-                if "фар" in n or "light" in n or "led" in n:
-                    filtered.append(c)
-            return filtered or candidates
+            return [name_has("lights")]
+
+        return []
 
-        return candidates
+    def _apply_role_filter(
+        self,
+        mask: np.ndarray,
+        category: str,
+        role: Optional[str],
+        sl: slice,
+    ) -> np.ndarray:
+        """Застосування фільтрів за роллю компонента."""
+        if not role:
+            return mask
+        for role_mask in self._role_masks(category, role, sl):
+            filtered = mask & role_mask
+            if filtered.any():
+                return filtered
+        return mask
 
     # ---------------- ПОКРАЩЕНИЙ ВИБІР КОМПОНЕНТІВ ---------------- #
 
-    def _find_best_component(
+    def _candidate_mask(
         self,
         category: str,
-        priority: str,
         name_hint: str = "",
         role: Optional[str] = None,
         allowed_domains: Optional[List[str]] = None,
-    ) -> Optional[Dict]:
-        """Покращений метод вибору компонента з гарантією сумісності."""
+    ) -> Optional[Tuple[str, np.ndarray]]:
+        """
+        Кандидати на слот: (базова категорія, булева маска по її відру)
+        або None, якщо підходящих компонентів немає.
+        """
         original_category = category
         base_category = self.ALIAS_CATEGORY.get(category, category)
 
@@ -306,152 +195,108 @@ class GreedyConfigurator:
         if original_category in ("wing", "wing_plate") and not role:
             role = "wing"
 
-        candidates = self.component_map.get(base_category, [])
-        if not candidates:
+        sl = self.catalog.bucket(base_category)
+        if sl.stop == sl.start:
             return None
+        cols = self.catalog.columns
+        mask = np.ones(sl.stop - sl.start, dtype=bool)
 
         # Спеціальна обробка offroad-поверхні для рухових елементів
-        terrain = getattr(self, "_current_terrain", "indoor")
-        if terrain == "offroad" and base_category in ("wheel", "tire", "track", "tread"):
-            offroad_candidates: List[Dict] = []
-            for c in candidates:
-                meta = c.get("meta") or {}
-                tags = meta.get("tags") or []
-                name_l = (c.get("name") or "").lower()
-                if (
-                    "off-road" in tags
-                    or "offroad" in tags
-                    or "terrain_rough" in tags
-                    or "off-road" in name_l
-                    or "offroad" in name_l
-                ):
-                    offroad_candidates.append(c)
-            if offroad_candidates:
-                candidates = offroad_candidates
-
-
-        p = (priority or "").lower()
+        if self._current_terrain == "offroad" and base_category in LOCOMOTION_CATEGORIES:
+            offroad = cols.is_offroad[sl]
+            if offroad.any():
+                mask = mask & offroad
 
         # Фільтрація за доменами
         if allowed_domains is not None:
-            candidates = self._filter_by_domain(candidates, allowed_domains)
-            if not candidates:
-                return None
+            domain_mask = self._domain_mask(sl, allowed_domains)
+            if domain_mask is not None:
+                mask = mask & domain_mask
+                if not mask.any():
+                    return None
 
         # Фільтрація за роллю
-        candidates = self._apply_role_filter(candidates, base_category, role)
+        mask = self._apply_role_filter(mask, base_category, role, sl)
 
         # Пошук за назвою
         if name_hint:
-            hint = name_hint.lower()
-            filtered = [
-                c for c in candidates
-                if hint in (c.get("name") or "").lower()
-            ]
-            if filtered:
-                candidates = filtered
+            filtered = mask & self.catalog.name_mask(base_category, name_hint)
+            if filtered.any():
+                mask = filtered
+
+        # Конфлікти з уже вибраними деталями (індекс сумісності)
+        conflicts = self._build.conflict_mask(sl)
+        if conflicts is not None:
+            mask = mask & ~conflicts
+            if not mask.any():
+                return None
 
-        # Спеціальний фільтр для крил
-        if original_category in ("wing", "wing_plate") and not role:
-            wings = [
-                c for c in candidates
-                if "кри" in (c.get("name") or "").lower()
-                or (c.get("family") == "wing_plate")
-            ]
-            if wings:
-                candidates = wings
+        return base_category, mask
 
-        if not candidates:
+    def _find_best_row(
+        self,
+        category: str,
+        priority: str,
+        name_hint: str = "",
+        role: Optional[str] = None,
+        allowed_domains: Optional[List[str]] = None,
+    ) -> Optional[int]:
+        """
+        Вибір компонента: фільтри — булеві маски над колонками відра категорії,
+        переможець — argmin позиції в рейтингу. Повертає рядок каталогу.
+        """
+        found = self._candidate_mask(category, name_hint, role, allowed_domains)
+        if found is None:
             return None
+        base_category, mask = found
+        if self._prunes(name_hint):
+            mask = mask & self.catalog.dominant[ranking_priority(priority)][self.catalog.bucket(base_category)]
+        # Вибір за готовим рейтингом (category, priority) без сортування кандидатів
+        return self.catalog.best_row(base_category, priority, mask)
+
+    def _prunes(self, name_hint: Optional[str]) -> bool:
+        # пошук за довільним текстом не збігається з групами домінування
+        return self.prune_dominated and not name_hint
+
+    def _slot_candidates(self, slot: "SelectionSlot") -> Optional[Tuple[str, np.ndarray, bool]]:
+        """(категорія, маска, чи можна відсікати доміновані) першої непорожньої спроби, як у жадібного."""
+        for attempt in slot.attempts:
+            found = self._candidate_mask(**attempt)
+            if found is not None and found[1].any():
+                return found[0], found[1], self._prunes(attempt.get("name_hint"))
+        return None
 
-        # Спеціальна обробка offroad-поверхні для рухових елементів
-        terrain = getattr(self, "_current_terrain", "indoor")
-        if terrain == "offroad" and base_category in ("wheel", "tire", "track", "tread"):
-            offroad_candidates: List[Dict] = []
-            for c in candidates:
-                meta = c.get("meta") or {}
-                tags = meta.get("tags") or []
-                name_l = (c.get("name") or "").lower()
-                if (
-                    "off-road" in tags
-                    or "offroad" in tags
-                    or "terrain_rough" in tags
-                    or "off-road" in name_l
-                    or "offroad" in name_l
-                ):
-                    offroad_candidates.append(c)
-            if offroad_candidates:
-                candidates = offroad_candidates
-
-
-        # ---- Мотори ----
-        if base_category == "motor":
-            sorted_candidates = sorted(
-                candidates,
-                key=lambda c: self._motor_sort_key(c, p),
-                reverse=True,
-            )
-            return sorted_candidates[0]
-
-        # ---- Структурні деталі ----
-        if base_category == "structure":
-            def struct_key(c: Dict):
-                geom = c.get("geometry") or {}
-                scores = c.get("scores") or {}
-
-                stud_len = geom.get("stud_length") or 0
-                stud_wid = geom.get("stud_width") or 0
-                studs_total = stud_len * stud_wid
-
-                strength = scores.get("structural_strength") or 0
-                cost_eff = scores.get("cost_efficiency") or 0
-                conn_vers = scores.get("connection_versatility") or 0
-                price = c.get("price") or 0
-
-                if not any([studs_total, strength, cost_eff, conn_vers]):
-                    if p == "cheapness":
-                        return (-price,)
-                    return (-price,)
-
-                if p == "cheapness":
-                    return (cost_eff, strength, conn_vers, -price)
-                if p == "durability":
-                    return (strength, conn_vers, studs_total, -price)
-                return (strength, conn_vers, studs_total, -price)
-
-            sorted_candidates = sorted(
-                candidates,
-                key=struct_key,
-                reverse=True,
-            )
-            return sorted_candidates[0] if sorted_candidates else None
-
-        # ---- Загальний випадок ----
-        def general_score(c: Dict):
-            scores = c.get("scores") or {}
-            price = c.get("price") or 0
-            weight = c.get("weight") or 0
-
-            if p == "cheapness":
-                return (-price, scores.get("cost_efficiency") or 0)
-            if p == "durability":
-                return (scores.get("structural_strength") or 0, -price)
-            if p == "speed":
-                elec = c.get("electronics") or {}
-                rpm = elec.get("rpm_nominal") or 0
-                return (rpm, -price)
-            if p == "stability":
-                elec = c.get("electronics") or {}
-                torque = elec.get("torque_nominal_ncm") or 0
-                return (torque, weight, -price)
-            return (-price,)
-
-        sorted_candidates = sorted(
-            candidates,
-            key=general_score,
-            reverse=True,
-        )
-        return sorted_candidates[0] if sorted_candidates else None
+    def _selection_slots(self, blueprint: Dict[str, Dict[str, Any]], request: ConfigRequest) -> List["SelectionSlot"]:
+        """Слоти підбору з blueprint: кожен — спроби пошуку по черзі, від найвужчої."""
+        slots: List[SelectionSlot] = []
+        for key, info in blueprint.items():
+            quantity = info.get("quantity", 0)
+            if quantity <= 0:
+                continue
+
+            if ":" in key:
+                base_category, role = key.split(":", 1)
+            else:
+                base_category, role = key, None
+
+            domains = info.get("domains") or ["universal", "ground", "air", "water"]
+            name_hint = info.get("name_hint") or ""
+
+            # Спеціальна обробка сенсорів: по слоту на сенсор, запасний варіант — будь-який сенсор
+            if base_category == "sensor":
+                for sensor_name in request.sensors:
+                    slots.append(SelectionSlot(key, 1, [
+                        dict(category=base_category, name_hint=sensor_name, allowed_domains=["universal"]),
+                        dict(category=base_category, allowed_domains=["universal"]),
+                    ], required=False))
+                continue
+
+            # запасний варіант — компонент без доменних обмежень
+            slots.append(SelectionSlot(key, quantity, [
+                dict(category=base_category, name_hint=name_hint, role=role, allowed_domains=domains),
+                dict(category=base_category, name_hint=name_hint, role=role, allowed_domains=None),
+            ]))
+        return slots
 
     # ---------------- ПОКРАЩЕНИЙ BLUEPRINT ---------------- #
 
@@ -632,94 +477,298 @@ class GreedyConfigurator:
 
         return bp
 
+    def _get_blueprint(self, request: ConfigRequest) -> Dict[str, Dict[str, Any]]:
+        """Blueprint із LRU-кешу (залежить лише від кількох дискретних полів запиту)."""
+        key = blueprint_key(request, self.catalog.version)
+        blueprint = blueprint_cache.get(key)
+        if blueprint is None:
+            blueprint = self._build_blueprint(request)
+            blueprint_cache.put(key, blueprint)
+        return blueprint
+
     # ---------------- НОВІ МЕТОДИ ДЛЯ ГАРАНТІЇ СУМІСНОСТІ ---------------- #
 
-    def _ensure_wheel_tire_compatibility(self, components: List[Dict]) -> List[Dict]:
+    def _category_count(self, rows: List[int], category: str) -> int:
+        code = self.catalog.columns.category_code.get(category)
+        if code is None or not rows:
+            return 0
+        return int(np.count_nonzero(self.catalog.columns.category[rows] == code))
+
+    def _ensure_wheel_tire_compatibility(self, rows: List[int]) -> List[int]:
         """Гарантує, що кожна шина має відповідне колесо і навпаки."""
-        wheels = [c for c in components if c.get("category") == "wheel"]
-        tires = [c for c in components if c.get("category") == "tire"]
+        wheels = self._category_count(rows, "wheel")
+        tires = self._category_count(rows, "tire")
         
         # Якщо є шини, але немає коліс - додаємо колеса
         if tires and not wheels:
-            wheel_comp = self._find_best_component(
+            wheel_row = self._find_best_row(
                 category="wheel",
                 priority="balanced",
                 allowed_domains=["ground", "universal"],
             )
-            if wheel_comp:
-                components.extend([wheel_comp] * len(tires))
+            if wheel_row is not None:
+                rows.extend([wheel_row] * tires)
         
         # Якщо є колеса, але немає шин - додаємо шини
         if wheels and not tires:
-            tire_comp = self._find_best_component(
+            tire_row = self._find_best_row(
                 category="tire", 
                 priority="balanced",
                 allowed_domains=["ground", "universal"],
             )
-            if tire_comp:
-                components.extend([tire_comp] * len(wheels))
+            if tire_row is not None:
+                rows.extend([tire_row] * wheels)
         
-        return components
+        return rows
 
-    def _ensure_hull_components(self, components: List[Dict], request: ConfigRequest) -> List[Dict]:
+    def _ensure_hull_components(self, rows: List[int], request: ConfigRequest) -> List[int]:
         """Гарантує наявність корпусних елементів та основи (hull) для водних роботів."""
+        cols = self.catalog.columns
+        idx = np.asarray(rows, dtype=np.int64)
+        is_water = cols.category[idx] == cols.category_code.get("water", -1)
+
         # Вже обрані корпусні елементи / основа
-        hull_components: List[Dict] = []
-        for c in components:
-            if c.get("is_base"):
-                hull_components.append(c)
-                continue
-            family = c.get("family")
-            category = c.get("category")
-            name_l = (c.get("name") or "").lower()
-            if family in ["hull_frame", "body_plate", "body_brick"]:
-                hull_components.append(c)
-            elif category == "water" and any(k in name_l for k in ["корпус", "hull", "човн", "човна"]):
-                hull_components.append(c)
+        hull_like = (
+            cols.is_base[idx]
+            | np.isin(cols.family[idx], cols.family_codes(["hull_frame", "body_plate", "body_brick"]))
+            | (is_water & self.catalog.keyword_mask(HULL_NAME_KEYWORDS)[idx])
+        )
+        hull_count = int(np.count_nonzero(hull_like))
 
         # Якщо немає базового корпусу для плавучості - підбираємо з категорії water
-        has_base_hull = any(c.get("is_base") or c.get("category") == "water" for c in hull_components)
+        has_base_hull = bool(np.any(hull_like & (cols.is_base[idx] | is_water)))
         if not has_base_hull:
-            base_hull = self._find_best_component(
+            base_hull = self._find_best_row(
                 category="water",
                 priority=request.priority or "stability",
                 name_hint="корпус",
                 allowed_domains=["water"],
             )
-            if base_hull:
-                components.append(base_hull)
-                hull_components.append(base_hull)
+            if base_hull is not None:
+                rows.append(base_hull)
+                hull_count += 1
 
         # Додаємо додаткові корпусні елементи, якщо їх замало
-        if len(hull_components) < 3:
-            extra_hull = self._find_best_component(
+        if hull_count < 3:
+            extra_hull = self._find_best_row(
                 category="structure",
                 priority=request.priority or "stability",
                 role="body_plate",
                 allowed_domains=["water", "universal"],
             )
-            if extra_hull:
-                components.append(extra_hull)
+            if extra_hull is not None:
+                rows.append(extra_hull)
 
-        return components
+        return rows
 
 
-    def _ensure_component_compatibility(self, components: List[Dict], request: ConfigRequest) -> List[Dict]:
+    def _ensure_component_compatibility(self, rows: List[int], request: ConfigRequest) -> List[int]:
         """Головний метод гарантії сумісності всіх компонентів."""
-        components = self._ensure_wheel_tire_compatibility(components)
+        rows = self._ensure_wheel_tire_compatibility(rows)
         
         # Перевіряємо чи є водні функції
         has_water = any("плавати" in f.lower() for f in request.functions)
         if has_water:
-            components = self._ensure_hull_components(components, request)
+            rows = self._ensure_hull_components(rows, request)
             
-        return components
+        return rows
+
+    def _totals(self, row_list: List[int]) -> Tuple[Dict[int, Dict], Any, Any]:
+        """(записи, ціна, вага) фінального списку."""
+        # повні записи потрібні лише тут: по одному на різний рядок,
+        # навіть якщо компонент узято кілька разів
+        records = self.catalog.fetch(row_list)
+        cost = sum((records[r].get("price") or 0) for r in row_list)
+        weight = sum((records[r].get("weight") or 0) for r in row_list)
+        return records, cost, weight
+
+    def _finish_rows(self, chosen_rows: List[int], request: ConfigRequest, has_fly: bool) -> List[int]:
+        """Добір сумісних деталей, відкидання недоречних доменів і кріплень для з'єднань."""
+        # ---- ГАРАНТІЯ СУМІСНОСТІ КОМПОНЕНТІВ ----
+        chosen_rows = self._ensure_component_compatibility(list(chosen_rows), request)
+
+        # ---- Фільтрація недоречних доменів ----
+        # повітряні деталі без функції "літати" відкидаються; водні лишаються
+        rows = np.asarray(chosen_rows, dtype=np.int64)
+        if not has_fly:
+            rows = rows[~self.catalog.columns.is_air[rows]]
+
+        # ---- З'єднання: парування роз'ємів (звіт), на запит — піни й осі ----
+        row_list = rows.tolist()
+        self._assembly = None
+        if request.assemblyTopUp:
+            row_list, self._assembly = self.catalog.assembly.top_up(row_list)
+        elif request.assemblyReport:
+            self._assembly = self.catalog.assembly.plan(row_list)
+        return row_list
+
+    # ---------------- ТОЧНИЙ ПІДБІР ---------------- #
+
+    def _solver_slots(
+        self, slots: List[SelectionSlot], priority: str, has_fly: bool, from_greedy: bool = False
+    ) -> List[SolverSlot]:
+        """
+        Слоти задачі про рюкзак: ті самі кандидати й рейтинги, що й у жадібного
+        підбору. from_greedy — перший кандидат кожного слота має бути вибором
+        жадібного підбору (для ремонту його розв'язку).
+        """
+        cols = self.catalog.columns
+        solver_slots: List[SolverSlot] = []
+        for slot in slots:
+            found = self._slot_candidates(slot)
+            if found is None:
+                if slot.required:
+                    raise Exception(f"Не вдалося знайти компонент: {slot.key}")
+                continue
+            category, mask, prune = found
+            if not has_fly:
+                sl = self.catalog.bucket(category)
+                air = cols.is_air[sl]
+                if from_greedy and air[self.catalog.best_row(category, priority, mask) - sl.start]:
+                    continue  # жадібний вибір однаково відкинеться разом зі слотом
+                # повітряні деталі однаково відкинуться — на них не варто витрачати бюджет
+                mask = mask & ~air
+                if not mask.any():
+                    continue
+            rows, places, total = self.catalog.ranked_rows(category, priority, mask, prune=prune)
+            solver_slots.append(SolverSlot(
+                slot.key, slot.quantity, rows, cols.price[rows], cols.weight[rows], rank_scores(places, total), total
+            ))
+        return solver_slots
+
+    def _solve_exact(
+        self, slots: List[SelectionSlot], request: ConfigRequest, priority: str, has_fly: bool
+    ) -> Dict[str, Any]:
+        """
+        Підбір як задача про рюкзак із вибором: по кандидату на слот з
+        найбільшою сумарною оцінкою в межах бюджету й ваги.
+
+        Оцінка кандидата — його місце в рейтингу слота за пріоритетом
+        (1.0 — вибір жадібного підбору), помножене на кількість одиниць.
+        Деталі, які додає гарантія сумісності (шини, корпус), у слоти не
+        входять: їхню вартість резервуємо й розв'язуємо повторно.
+        """
+        limit = request.solverTimeLimitMs or DEFAULT_TIME_LIMIT_MS
+        start = time.perf_counter()
+        deadline = start + min(max(limit, 1), MAX_TIME_LIMIT_MS) / 1000
+
+        solver_slots = self._solver_slots(slots, priority, has_fly)
+        cols = self.catalog.columns
+        units = sum(slot.quantity for slot in solver_slots) or 1
+
+        reserve_cost = reserve_weight = 0.0
+        for _ in range(3):
+            solved = solve(solver_slots, request.budget - reserve_cost, request.weight - reserve_weight, deadline)
+            solution = solved["solution"]
+            if solution is None:
+                min_cost = sum(slot.min_cost for slot in solver_slots) + reserve_cost
+                return {
+                    "error": (
+                        f"Не знайдено конфігурації в межах бюджету {request.budget:.2f} грн "
+                        f"і ваги {request.weight:.2f} г (мінімальна вартість — {min_cost:.2f} грн). "
+                        f"Спробуйте зменшити складність або оберіть менше функцій."
+                    )
+                }
+            chosen_rows = solution.rows(solver_slots)
+            final = self._finish_rows(chosen_rows, request, has_fly)
+            extra_cost = float(cols.price[final].sum()) - solution.cost
+            extra_weight = float(cols.weight[final].sum()) - solution.weight
+            if solution.cost + extra_cost <= request.budget and solution.weight + extra_weight <= request.weight:
+                break
+            reserve_cost, reserve_weight = max(extra_cost, 0.0), max(extra_weight, 0.0)
+
+        info: Dict[str, Any] = {
+            "mode": "exact",
+            "optimal": solved["optimal"],
+            "score": round(solution.score / units, 4),
+            "nodes": solved["nodes"],
+            "candidates": {
+                "before": sum(slot.total for slot in solver_slots),
+                "after": sum(len(slot.rows) for slot in solver_slots),
+            },
+        }
+        if request.paretoFront:
+            front = pareto_front(solver_slots, request.budget - reserve_cost, request.weight - reserve_weight, deadline)
+            info["pareto"] = [
+                {
+                    "total_price": round(point.cost + reserve_cost, 2),
+                    "total_weight": round(point.weight + reserve_weight, 2),
+                    "score": round(point.score / units, 4),
+                }
+                for point in front
+            ]
+        info["elapsed_ms"] = round((time.perf_counter() - start) * 1000, 3)
+        return {"rows": chosen_rows, "solver": info}
+
+    # ---------------- РЕМОНТ БЮДЖЕТУ ---------------- #
+
+    def _repair(
+        self,
+        slots: List[SelectionSlot],
+        request: ConfigRequest,
+        priority: str,
+        has_fly: bool,
+        cost: float,
+        weight: float,
+    ) -> Optional[Tuple[List[int], Dict[str, Any]]]:
+        """
+        Жадібний розв'язок, що перевищує бюджет чи вагу, → дешевші заміни
+        в окремих слотах (див. solver.Repair). Повертає (рядки, звіт) або
+        None, якщо замінами обмеження не виконати.
+        """
+        solver_slots = self._solver_slots(slots, priority, has_fly, from_greedy=True)
+        cols = self.catalog.columns
+
+        # деталі поза слотами (гарантія сумісності) — як резерв бюджету й ваги
+        extra_cost = cost - sum(slot.cost[0] for slot in solver_slots)
+        extra_weight = weight - sum(slot.weight[0] for slot in solver_slots)
+        for _ in range(3):
+            repair = Repair(solver_slots, request.budget - extra_cost, request.weight - extra_weight)
+            solution = repair.run()
+            if solution is None:
+                return None
+            row_list = self._finish_rows(solution.rows(solver_slots), request, has_fly)
+            final_cost = float(cols.price[row_list].sum())
+            final_weight = float(cols.weight[row_list].sum())
+            if final_cost <= request.budget and final_weight <= request.weight:
+                break
+            extra_cost = final_cost - solution.cost
+            extra_weight = final_weight - solution.weight
+
+        downgraded = []
+        for slot, k in zip(solver_slots, solution.choice):
+            if k == 0:
+                continue
+            downgraded.append({
+                "slot": slot.key,
+                "quantity": slot.quantity,
+                "from_id": self.catalog.records[slot.rows[0]].get("id"),
+                "to_id": self.catalog.records[slot.rows[k]].get("id"),
+                "saved_price": round(slot.cost[0] - slot.cost[k], 2),
+                "saved_weight": round(slot.weight[0] - slot.weight[k], 2),
+            })
+        units = sum(slot.quantity for slot in solver_slots) or 1
+        return row_list, {
+            "downgraded": downgraded,
+            "steps": repair.steps,
+            "score": round(solution.score / units, 4),
+        }
 
     def configure(self, request: ConfigRequest) -> Dict[str, Any]:
         """Покращений основний метод конфігурації з кращою обробкою помилок."""
         if not request.functions or request.budget is None or request.weight is None:
             return {"error": "Будь ласка, заповніть усі обов'язкові параметри."}
 
+        self.timings = {}
+        self._build = self.catalog.compat.state()
+        mark = time.perf_counter()
+
+        def phase(name: str) -> None:
+            nonlocal mark
+            now = time.perf_counter()
+            self.timings[name] = (now - mark) * 1000
+            mark = now
+
         # зберігаємо поточний тип поверхні для подальшого підбору компонентів
         try:
             self._current_terrain = (request.terrain or "indoor").lower()
@@ -727,103 +776,67 @@ class GreedyConfigurator:
             self._current_terrain = "indoor"
 
         try:
-            blueprint = self._build_blueprint(request)
+            blueprint = self._get_blueprint(request)
         except Exception as e:
             return {"error": f"Помилка при плануванні конфігурації: {str(e)}"}
+        phase("blueprint")
 
-        chosen_components: List[Dict] = []
-        current_cost = 0.0
-        current_weight = 0.0
+        # під час підбору працюємо з номерами рядків каталогу, записи — лише наприкінці
+        chosen_rows: List[int] = []
         priority = (request.priority or "").lower()
 
         has_fly = any("літати" in f.lower() for f in request.functions)
         has_swim = any("плавати" in f.lower() for f in request.functions)
 
-        try:
-            for key, info in blueprint.items():
-                quantity = info.get("quantity", 0)
-                if quantity <= 0:
-                    continue
-
-                if ":" in key:
-                    base_category, role = key.split(":", 1)
-                else:
-                    base_category, role = key, None
-
-                domains = info.get("domains") or ["universal", "ground", "air", "water"]
-                name_hint = info.get("name_hint") or ""
-
-                # Спеціальна обробка сенсорів
-                if base_category == "sensor":
-                    for sensor_name in request.sensors:
-                        component = self._find_best_component(
-                            category=base_category,
-                            priority=priority,
-                            name_hint=sensor_name,
-                            role=None,
-                            allowed_domains=["universal"],
-                        )
-                        if not component:
-                            # Спробуємо знайти будь-який сенсор як запасний варіант
-                            component = self._find_best_component(
-                                category=base_category,
-                                priority=priority,
-                                allowed_domains=["universal"],
-                            )
-                            if not component:
-                                continue
-                        
-                        chosen_components.append(component)
-                        current_cost += component.get("price") or 0
-                        current_weight += component.get("weight") or 0
-                    continue
+        mode = (request.solver or "greedy").lower()
+        if mode not in SOLVER_MODES:
+            return {"error": f"Невідомий режим підбору: {request.solver}"}
+        solver_info: Optional[Dict[str, Any]] = None
 
-                component = self._find_best_component(
-                    category=base_category,
-                    priority=priority,
-                    name_hint=name_hint,
-                    role=role,
-                    allowed_domains=domains,
-                )
-                
-                if not component:
-                    # Спробуємо знайти компонент без доменних обмежень
-                    component = self._find_best_component(
-                        category=base_category,
-                        priority=priority,
-                        name_hint=name_hint,
-                        role=role,
-                        allowed_domains=None,
+        try:
+            if mode == "exact":
+                solved = self._solve_exact(self._selection_slots(blueprint, request), request, priority, has_fly)
+                if "error" in solved:
+                    return solved
+                chosen_rows, solver_info = solved["rows"], solved["solver"]
+            else:
+                for slot in self._selection_slots(blueprint, request):
+                    row = next(
+                        (r for r in (self._find_best_row(priority=priority, **a) for a in slot.attempts) if r is not None),
+                        None,
                     )
-                    if not component:
-                        raise Exception(f"Не вдалося знайти компонент: {key}")
-
-                for _ in range(quantity):
-                    chosen_components.append(component)
-                    current_cost += component.get("price") or 0
-                    current_weight += component.get("weight") or 0
+                    if row is None:
+                        if slot.required:
+                            raise Exception(f"Не вдалося знайти компонент: {slot.key}")
+                        continue
+                    chosen_rows.extend([row] * slot.quantity)
+                    self._build.add(row)
 
         except Exception as e:
             return {"error": f"Помилка підбору компонентів: {str(e)}"}
 
-        # ---- ГАРАНТІЯ СУМІСНОСТІ КОМПОНЕНТІВ ----
-        chosen_components = self._ensure_component_compatibility(chosen_components, request)
-
-        # ---- Фільтрація недоречних доменів ----
-        def is_forbidden(c: Dict) -> bool:
-            cat = (c.get("category") or "").lower()
-            dom = (c.get("domain") or "universal").lower()
-            if not has_fly and (cat in ("propeller", "wing") or dom == "air"):
-                return True
-            if not has_swim and (cat == "water" or dom == "water"):
-                return False
-            return False
+        phase("selection")
 
-        filtered_components = [c for c in chosen_components if not is_forbidden(c)]
+        row_list = self._finish_rows(chosen_rows, request, has_fly)
+        phase("compatibility")
 
         # ---- Фінальний перерахунок ----
-        current_cost = sum((c.get("price") or 0) for c in filtered_components)
-        current_weight = sum((c.get("weight") or 0) for c in filtered_components)
+        records, current_cost, current_weight = self._totals(row_list)
+
+        # ---- Ремонт перевищення: дешевші заміни в окремих слотах ----
+        repair_info: Optional[Dict[str, Any]] = None
+        over = current_cost > request.budget or current_weight > request.weight
+        if over and mode == "greedy" and request.budgetRepair:
+            try:
+                repaired = self._repair(
+                    self._selection_slots(blueprint, request), request, priority, has_fly, current_cost, current_weight
+                )
+            except Exception as e:
+                return {"error": f"Помилка підбору компонентів: {str(e)}"}
+            if repaired is not None:
+                row_list, repair_info = repaired
+                records, current_cost, current_weight = self._totals(row_list)
+            phase("repair")
 
         # Перевірка бюджету та ваги
         if current_cost > request.budget:
@@ -843,16 +856,26 @@ class GreedyConfigurator:
             }
 
         # Створення фінального списку з унікальними ID
-        final_list = []
-        for i, comp in enumerate(filtered_components):
-            comp_copy = dict(comp)
-            comp_copy["unique_id"] = f"{comp['id']}-{i}"
-            final_list.append(comp_copy)
+        final_list = [
+            {**records[r], "unique_id": f"{records[r]['id']}-{i}"} for i, r in enumerate(row_list)
+        ]
+        phase("serialization")
 
-        return {
+        result = {
             "selected": final_list,
             "total_price": round(current_cost, 2),
             "total_weight": round(current_weight, 2),
             "remaining_budget": round(request.budget - current_cost, 2),
             "warning": "Конфігурація успішно створена з гарантією сумісності компонентів!" if has_swim else None
-        }
\ No newline at end of file
+        }
+        if solver_info is not None:
+            result["solver"] = solver_info
+        if repair_info is not None:
+            result["repair"] = repair_info
+        if self._assembly is not None:
+            result["assembly"] = self._assembly
+        if not self.catalog.compat.trivial:
+            report = self.catalog.compat.validate(row_list)
+            if not report["valid"]:
+                result["compatibility"] = report
+        return result
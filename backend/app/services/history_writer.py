@@ -0,0 +1,195 @@
+import queue
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from app.db.history_store import get_history_store, save_history
+
+_STOP = object()
+
+
+class HistoryWriter:
+    """
+    Фоновий записувач історії (write-behind).
+
+    Запити лише кладуть записи в обмежену чергу; єдиний потік-записувач
+    збирає їх у пачки (за розміром або за часом) і пише кожну пачку однією
+    транзакцією — один fsync на пачку. Якщо черга переповнена або записувач
+    уже зупинено (завершення процесу), запис робиться синхронно, щоб нічого
+    не загубити. flush() чекає, поки буде записано все, що покладено раніше.
+    """
+
+    def __init__(self, maxsize: int = 10000, batch_size: int = 200, flush_interval: float = 0.2):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=maxsize)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._stopped = False
+
+        self.enqueued = 0
+        self.written = 0
+        self.batches = 0
+        self.overflow_writes = 0
+        self.errors = 0
+        self.last_flush_ms = 0.0
+        self.max_flush_ms = 0.0
+        self._total_flush_ms = 0.0
+
+    # ---------------- ЖИТТЄВИЙ ЦИКЛ ---------------- #
+
+    def start(self) -> None:
+        with self._lock:
+            self._stopped = False
+            self._start_thread()
+
+    def _start_thread(self) -> None:
+        """Запускає потік, якщо він не працює (викликається під self._lock)."""
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="history-writer", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: Optional[float] = 10.0) -> None:
+        """Дописує все, що лишилось у черзі, і зупиняє потік."""
+        with self._lock:
+            thread = self._thread
+            self._thread = None
+            self._stopped = True
+        if thread is None or not thread.is_alive():
+            return
+        self._queue.put(_STOP)
+        thread.join(timeout)
+
+    # ---------------- ЗАПИС ---------------- #
+
+    def _put(self, entries: List[Dict]) -> List[Dict]:
+        """
+        Кладе записи в чергу; повертає ті, що треба записати синхронно.
+
+        Перевірка зупинки й put_nowait — під тим самим замком, що й stop():
+        інакше запис міг би лягти в чергу вже за _STOP і загубитися.
+        """
+        with self._lock:
+            if self._stopped:
+                return list(entries)
+            if self._thread is None:
+                self._start_thread()
+            overflow: List[Dict] = []
+            for entry in entries:
+                try:
+                    self._queue.put_nowait(entry)
+                    self.enqueued += 1
+                except queue.Full:
+                    overflow.append(entry)
+            self.overflow_writes += len(overflow)
+            return overflow
+
+    def enqueue(self, entry: Dict) -> None:
+        if self._put([entry]):
+            save_history(entry)
+
+    def enqueue_many(self, entries: List[Dict]) -> None:
+        """Пакетне додавання; те, що не вмістилося в чергу, пишеться однією транзакцією."""
+        rest = self._put(entries)
+        if rest:
+            get_history_store().append_many(rest)
+
+    def flush(self, timeout: Optional[float] = 5.0) -> bool:
+        """
+        Чекає, поки буде записано все, що покладено в чергу до виклику.
+        False — не дочекались за timeout.
+        """
+        thread = self._thread
+        if thread is None or not thread.is_alive():
+            return self._queue.empty()
+        done = threading.Event()
+        try:
+            self._queue.put(done, timeout=timeout)
+        except queue.Full:
+            return False
+        return done.wait(timeout)
+
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            if item is _STOP:
+                break
+            if isinstance(item, threading.Event):
+                item.set()
+                continue
+            batch: List[Dict] = [item]
+            waiters: List[threading.Event] = []
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                if isinstance(item, threading.Event):
+                    # flush(): пачку пишемо одразу, не чекаючи flush_interval
+                    waiters.append(item)
+                    break
+                batch.append(item)
+            self._flush(batch)
+            for done in waiters:
+                done.set()
+
+        # дренаж: усе, що встигли покласти до зупинки
+        rest: List[Dict] = []
+        waiters: List[threading.Event] = []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if isinstance(item, threading.Event):
+                waiters.append(item)
+            elif item is not _STOP:
+                rest.append(item)
+        for i in range(0, len(rest), self.batch_size):
+            self._flush(rest[i:i + self.batch_size])
+        for done in waiters:
+            done.set()
+
+    def _flush(self, batch: List[Dict]) -> None:
+        start = time.perf_counter()
+        try:
+            get_history_store().append_many(batch)
+            self.written += len(batch)
+        except Exception as e:
+            self.errors += 1
+            print(f"[WARN] Не вдалося записати історію ({len(batch)} записів): {e}")
+            return
+        elapsed = (time.perf_counter() - start) * 1000
+        self.batches += 1
+        self.last_flush_ms = elapsed
+        self.max_flush_ms = max(self.max_flush_ms, elapsed)
+        self._total_flush_ms += elapsed
+
+    # ---------------- МЕТРИКИ ---------------- #
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": self._thread is not None and self._thread.is_alive(),
+            "queue_depth": self._queue.qsize(),
+            "queue_capacity": self._queue.maxsize,
+            "enqueued": self.enqueued,
+            "written": self.written,
+            "batches": self.batches,
+            "overflow_writes": self.overflow_writes,
+            "errors": self.errors,
+            "last_flush_ms": round(self.last_flush_ms, 3),
+            "avg_flush_ms": round(self._total_flush_ms / self.batches, 3) if self.batches else 0.0,
+            "max_flush_ms": round(self.max_flush_ms, 3),
+            "avg_batch_size": round(self.written / self.batches, 2) if self.batches else 0.0,
+        }
+
+
+history_writer = HistoryWriter()
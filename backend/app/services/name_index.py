@@ -0,0 +1,109 @@
+import unicodedata
+from typing import Optional, Sequence
+
+import numpy as np
+
+# Триграма пакується в uint64: 3 кодові точки Unicode по 21 біту
+_SHIFT = np.uint64(21)
+
+
+def normalize_name(text: str) -> str:
+    """NFC + нижній регістр: однаково для назв і запитів (кирилиця й латиниця)."""
+    return unicodedata.normalize("NFC", text or "").lower()
+
+
+def _gram_code(a: int, b: int, c: int) -> int:
+    return (a << 42) | (b << 21) | c
+
+
+class NameIndex:
+    """
+    Інвертований триграмний індекс назв компонентів.
+
+    Posting-списки зберігаються у форматі CSR (grams / offsets / postings),
+    рядки в кожному списку відсортовані. Оскільки каталог згрупований
+    за категоріями, список для категорії — це підзріз, знайдений
+    двійковим пошуком, а не окрема копія.
+
+    Запит на підрядок довжиною >= 3 — перетин списків його триграм
+    з дочитуванням лише кандидатів; коротші запити скануються напряму.
+    """
+
+    def __init__(self, names: Sequence[str]):
+        self.names: Sequence[str] = [normalize_name(n) for n in names]
+        n = len(self.names)
+
+        lengths = np.fromiter((len(s) for s in self.names), dtype=np.int64, count=n)
+        text = "\x00".join(self.names)
+        cps = np.frombuffer(text.encode("utf-32-le"), dtype="<u4").astype(np.uint64)
+
+        if len(cps) < 3:
+            self.grams = np.empty(0, dtype=np.uint64)
+            self.offsets = np.zeros(1, dtype=np.int64)
+            self.postings = np.empty(0, dtype=np.int32)
+            return
+
+        grams = (cps[:-2] << (_SHIFT * np.uint64(2))) | (cps[1:-1] << _SHIFT) | cps[2:]
+        # кожна назва займає len + 1 позицію (разом із роздільником \x00)
+        rows = np.repeat(np.arange(n, dtype=np.int32), lengths + 1)[: len(grams)]
+        valid = (cps[:-2] != 0) & (cps[1:-1] != 0) & (cps[2:] != 0)
+        grams, rows = grams[valid], rows[valid]
+
+        order = np.lexsort((rows, grams))
+        grams, rows = grams[order], rows[order]
+        if len(grams):
+            # одна пара (триграма, рядок) на назву, навіть якщо триграма повторюється
+            keep = np.ones(len(grams), dtype=bool)
+            keep[1:] = (grams[1:] != grams[:-1]) | (rows[1:] != rows[:-1])
+            grams, rows = grams[keep], rows[keep]
+
+        self.grams, first = np.unique(grams, return_index=True)
+        self.offsets = np.append(first, len(grams)).astype(np.int64)
+        self.postings = rows
+
+    @classmethod
+    def from_arrays(cls, names: Sequence[str], grams: np.ndarray, offsets: np.ndarray,
+                    postings: np.ndarray) -> "NameIndex":
+        """Індекс поверх готових масивів; names — уже нормалізовані назви."""
+        self = cls.__new__(cls)
+        self.names = names
+        self.grams, self.offsets, self.postings = grams, offsets, postings
+        return self
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def _posting(self, gram: int, start: int, stop: int) -> np.ndarray:
+        i = int(np.searchsorted(self.grams, np.uint64(gram)))
+        if i == len(self.grams) or int(self.grams[i]) != gram:
+            return self.postings[:0]
+        post = self.postings[self.offsets[i]:self.offsets[i + 1]]
+        lo, hi = np.searchsorted(post, (start, stop))
+        return post[lo:hi]
+
+    def search(self, query: str, rows: Optional[slice] = None) -> np.ndarray:
+        """Відсортовані рядки (у межах rows), назви яких містять query."""
+        query = normalize_name(query)
+        start = 0 if rows is None else rows.start
+        stop = len(self.names) if rows is None else rows.stop
+
+        if len(query) < 3:
+            return np.fromiter(
+                (i for i in range(start, stop) if query in self.names[i]),
+                dtype=np.int32,
+            )
+
+        codes = [ord(ch) for ch in query]
+        grams = {_gram_code(*codes[i:i + 3]) for i in range(len(codes) - 2)}
+        lists = sorted((self._posting(g, start, stop) for g in grams), key=len)
+
+        result = lists[0]
+        for post in lists[1:]:
+            if not len(result):
+                break
+            result = np.intersect1d(result, post, assume_unique=True)
+
+        # триграми потрібні, але не достатні — дочитуємо лише кандидатів
+        if len(query) > 3 and len(result):
+            result = result[[query in self.names[i] for i in result.tolist()]]
+        return result
@@ -0,0 +1,507 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.db.catalog_binary import (
+    BinaryCatalog, LazyRecords, cached_loader, load_compiled_synthetic, pack_strings, record_loader,
+)
+from app.db.catalog_store import CatalogSnapshot
+from app.services.assembly import FASTENER_EXCLUDE, FASTENER_FAMILY, FASTENER_KEYWORDS, AssemblyPlanner
+from app.services.catalog_columns import CatalogColumns, encode
+from app.services.compat_index import COMPAT_ARRAYS, CompatibilityIndex
+from app.services.name_index import NameIndex
+from app.services.solver import nondominated
+
+
+# ---------------- НОРМАЛІЗАЦІЯ ---------------- #
+
+def infer_family(comp: Dict) -> Optional[str]:
+    """Евристика для визначення сімейства компонента."""
+    name = (comp.get("name") or "").lower()
+    cat = comp.get("category", "")
+
+    if cat == "structure":
+        if "кри" in name or "пластина-крило" in name or "клин (крило)" in name:
+            return "wing_plate"
+        if "пластина" in name or "plate" in name:
+            return "plate"
+        if "цегл" in name or "brick" in name:
+            return "brick"
+        if "панель" in name or "panel" in name:
+            return "panel"
+        if "техніч" in name or "technic" in name:
+            if "балк" in name or "beam" in name:
+                return "technic_beam"
+            if "конектор" in name or "connector" in name:
+                return "technic_connector"
+            if "пін" in name or "pin" in name:
+                return "technic_pin"
+            if "ось" in name or "вісь" in name or "axle" in name:
+                return "axle"
+            if "шестерн" in name or "gear" in name:
+                return "gear"
+        if "шестерн" in name or "gear" in name:
+            return "gear"
+        if "корпус" in name or "hull" in name or "рама" in name:
+            return "hull_frame"
+
+    return None
+
+
+def default_domain(category: str) -> str:
+    if category in ("water",):
+        return "water"
+    if category in ("propeller",):
+        return "air"
+    if category in ("wheel", "tire", "track", "tread"):
+        return "ground"
+    return "universal"
+
+
+def normalize_component(comp: Dict) -> Dict:
+    """
+    Повертає запис із дефолтними значеннями полів.
+
+    Вхідний словник не змінюється: якщо чогось бракує, створюється
+    поверхнева копія, інакше повертається той самий об'єкт.
+    """
+    patch: Dict = {}
+
+    if not comp.get("domain"):
+        patch["domain"] = default_domain(comp.get("category", ""))
+
+    if not comp.get("family"):
+        fam = infer_family(comp)
+        if fam:
+            patch["family"] = fam
+
+    # safety: geometry/scores/connectors
+    for key, empty in (("geometry", {}), ("scores", {}), ("connectors", []), ("roles", [])):
+        if key not in comp:
+            patch[key] = empty
+
+    if not patch:
+        return comp
+    normalized = dict(comp)
+    normalized.update(patch)
+    return normalized
+
+
+# ---------------- ПРІОРИТЕТИ ТА СОРТУВАННЯ ---------------- #
+
+# Пріоритети, для яких будуються окремі рейтинги; все інше — рейтинг за замовчуванням ("")
+RANKING_PRIORITIES = ("speed", "stability", "cheapness", "durability", "")
+
+
+def ranking_priority(priority: Optional[str]) -> str:
+    p = (priority or "").lower()
+    return p if p in RANKING_PRIORITIES else ""
+
+
+def ranking_keys(cols: CatalogColumns, category: str, priority: str, rows: slice) -> List[np.ndarray]:
+    """
+    Колонки ключа сортування (від головної до молодшої) для рядків відра.
+
+    Відповідають кортежам, за якими кандидати сортувались за спаданням:
+      motor:     speed (rpm, torque, -price), stability (torque, weight, -price),
+                 cheapness (-price, rpm*torque, torque), durability (weight, torque, -price),
+                 інше (rpm*torque, -price);
+      structure: cheapness (cost_eff, strength, conn_vers, -price),
+                 інше (strength, conn_vers, studs, -price); деталі без жодної
+                 з цих характеристик порівнюються лише за (-price,);
+      решта:     cheapness (-price, cost_eff), durability (strength, -price),
+                 speed (rpm, -price), stability (torque, weight, -price), інше (-price,).
+    """
+    price = -cols.price[rows]
+    weight = cols.weight[rows]
+    rpm = cols.rpm_nominal[rows]
+    torque = cols.torque_nominal_ncm[rows]
+    strength = cols.scores["structural_strength"][rows]
+    cost_eff = cols.scores["cost_efficiency"][rows]
+    conn_vers = cols.scores["connection_versatility"][rows]
+
+    if category == "motor":
+        perf = rpm * torque
+        return {
+            "speed": [rpm, torque, price],
+            "stability": [torque, weight, price],
+            "cheapness": [price, perf, torque],
+            "durability": [weight, torque, price],
+        }.get(priority, [perf, price])
+
+    if category == "structure":
+        studs = cols.stud_length[rows] * cols.stud_width[rows]
+        if priority == "cheapness":
+            keys = [cost_eff, strength, conn_vers, price]
+        else:
+            keys = [strength, conn_vers, studs, price]
+        # кортеж (-price,) менший за будь-який довший з тим самим першим елементом,
+        # тому решта позицій доповнюється -inf
+        empty = (studs == 0) & (strength == 0) & (cost_eff == 0) & (conn_vers == 0)
+        if empty.any():
+            keys = [np.where(empty, price, keys[0])] + [np.where(empty, -np.inf, k) for k in keys[1:]]
+        return keys
+
+    return {
+        "cheapness": [price, cost_eff],
+        "durability": [strength, price],
+        "speed": [rpm, price],
+        "stability": [torque, weight, price],
+    }.get(priority, [price])
+
+
+# Ключові слова в назвах для ролей, що визначаються за назвою
+ROLE_NAME_KEYWORDS = {
+    "kit": ("набір", "kit"),
+    "gearbox": ("редуктор", "gearbox"),
+    "wing": ("кри",),
+    "hull": ("корпус", "рама"),
+    "lights": ("фар", "light", "led"),
+}
+
+# Колонки, якими фільтри підбору звужують кандидатів (разом із ROLE_NAME_KEYWORDS):
+# будь-яка маска без пошуку за назвою — об'єднання груп з однаковими значеннями
+DOMINANCE_COLUMNS = (
+    "category", "domain", "family", "size_class",
+    "is_offroad", "has_axle_conn", "has_pin_conn", "is_structural_role", "is_air",
+)
+
+
+def descending_order(keys: List[np.ndarray]) -> np.ndarray:
+    """Стабільний порядок за спаданням ключів (рівні лишаються в порядку каталогу)."""
+    return np.lexsort([-k for k in reversed(keys)])
+
+
+# ---------------- ПІДГОТОВЛЕНИЙ КАТАЛОГ ---------------- #
+
+class PreparedCatalog:
+    """
+    Нормалізований каталог, розкладений за категоріями.
+
+    Будується один раз на версію каталогу і далі лише читається,
+    тому один екземпляр безпечно ділять усі запити процесу.
+
+    Записи впорядковані за категорією (records), тож кожна категорія —
+    суцільний діапазон рядків, а колонки відра — зрізи без копіювання.
+
+    Розділення на «гарячу» і «холодну» частини: підбір працює лише з
+    колонками, рейтингами й індексом назв, а повні записи (components,
+    records) — ліниві представлення над записами знімка, що нормалізуються
+    при зверненні, тобто лише для вибраних компонентів під час серіалізації.
+    Нормалізовані копії всього каталогу існують тільки під час побудови.
+    """
+
+    def __init__(self, components: Iterable[Dict], version: Optional[str] = None):
+        start = time.perf_counter()
+
+        self.version = version
+        # записи знімка спільні й незмінні, тож не копіюються
+        raw: Sequence[Dict] = components if isinstance(components, (list, tuple)) else tuple(components)
+        normalized = [normalize_component(c) for c in raw]
+
+        # стабільне групування за категорією: у межах відра порядок каталогу
+        categories = [c.get("category", "unknown") for c in normalized]
+        cat_codes, cat_vocab, _ = encode(categories)
+        order = np.argsort(cat_codes, kind="stable")
+        # records[i] == components[order[i]]
+        self.order = order
+        load = cached_loader(raw.__getitem__, normalize_component)
+        self.components = LazyRecords(load, len(raw))
+        self.records = LazyRecords(load, len(raw), order)
+
+        ordered = [normalized[i] for i in order.tolist()]
+        del normalized
+        self.columns = CatalogColumns(ordered)
+        self.name_index = NameIndex([c.get("name") or "" for c in ordered])
+        self.compat = CompatibilityIndex(ordered, self.columns)
+        del ordered
+
+        counts = np.bincount(cat_codes, minlength=len(cat_vocab))
+        bounds = np.concatenate(([0], np.cumsum(counts)))
+        self.buckets: Dict[str, slice] = {
+            cat: slice(int(bounds[i]), int(bounds[i + 1])) for i, cat in enumerate(cat_vocab)
+        }
+        self.component_map: Dict[str, LazyRecords] = {
+            cat: self.records[sl] for cat, sl in self.buckets.items()
+        }
+
+        # Рейтинги (category, priority): порядок і позиція кожного рядка відра
+        self.rankings: Dict[Tuple[str, str], np.ndarray] = {}
+        self._rank_pos: Dict[Tuple[str, str], np.ndarray] = {}
+        for cat, sl in self.buckets.items():
+            for p in RANKING_PRIORITIES:
+                ranking = descending_order(ranking_keys(self.columns, cat, p, sl))
+                pos = np.empty(len(ranking), dtype=np.int64)
+                pos[ranking] = np.arange(len(ranking))
+                self.rankings[(cat, p)] = ranking
+                self._rank_pos[(cat, p)] = pos
+
+        self._keyword_masks: Dict[Tuple[str, ...], np.ndarray] = {}
+        self.dominant = self._build_dominance()
+        self.assembly = self._build_assembly()
+
+        self.build_time_ms = (time.perf_counter() - start) * 1000
+
+    @classmethod
+    def from_binary(cls, binary: BinaryCatalog) -> "PreparedCatalog":
+        """
+        Каталог поверх скомпільованого знімка (див. app.db.catalog_binary).
+
+        Колонки, рейтинги й індекс назв — масиви, відображені з файлу,
+        без перерахунку; записи декодуються й нормалізуються лише при
+        зверненні (на практиці — для вибраних компонентів).
+        """
+        start = time.perf_counter()
+        self = cls.__new__(cls)
+        meta = binary.meta
+
+        self.version = binary.version
+        self.order = binary.array("order")
+        load = record_loader(binary.raw_table, normalize_component)
+        self.components = LazyRecords(load, binary.size)
+        self.records = LazyRecords(load, binary.size, self.order)
+        self.columns = CatalogColumns.from_arrays(
+            meta["vocabs"], {name: binary.array(f"col.{name}") for name in meta["columns"]}
+        )
+        self.name_index = NameIndex.from_arrays(
+            binary.strings("names"),
+            binary.array("names.grams"),
+            binary.array("names.gram_offsets"),
+            binary.array("names.postings"),
+        )
+
+        if "compat.ids" in binary:
+            self.compat = CompatibilityIndex.from_arrays(
+                meta["compat"], {name: binary.array(f"compat.{name}") for name in COMPAT_ARRAYS}, self.columns
+            )
+        else:
+            # знімок старішого формату — індекс з записів (декодує весь каталог)
+            self.compat = CompatibilityIndex(list(self.records), self.columns)
+
+        bounds = binary.array("bucket_bounds")
+        self.buckets = {
+            cat: slice(int(bounds[i]), int(bounds[i + 1])) for i, cat in enumerate(meta["buckets"])
+        }
+        self.component_map = {cat: self.records[sl] for cat, sl in self.buckets.items()}
+
+        self.rankings = {}
+        self._rank_pos = {}
+        for p in RANKING_PRIORITIES:
+            ranking, pos = binary.array(f"rank.{p}"), binary.array(f"rank_pos.{p}")
+            for cat, sl in self.buckets.items():
+                self.rankings[(cat, p)] = ranking[sl]
+                self._rank_pos[(cat, p)] = pos[sl]
+
+        self._keyword_masks = {}
+        if all(f"dominant.{p}" in binary for p in RANKING_PRIORITIES):
+            self.dominant = {p: binary.array(f"dominant.{p}") for p in RANKING_PRIORITIES}
+        else:
+            self.dominant = self._build_dominance()
+        self.assembly = self._build_assembly()
+        self.build_time_ms = (time.perf_counter() - start) * 1000
+        return self
+
+    def _dominance_groups(self) -> np.ndarray:
+        """
+        Номер групи рядка: однакові значення всіх DOMINANCE_COLUMNS, ключових
+        слів ролей і підпису обмежень сумісності (compat.signature).
+        """
+        cols = self.columns
+        keys = [getattr(cols, name) for name in DOMINANCE_COLUMNS]
+        keys += [self.keyword_mask(words) for words in ROLE_NAME_KEYWORDS.values()]
+        combined = np.zeros(len(self.records), dtype=np.int64)
+        for key in keys:
+            key = key.astype(np.int64) + 1  # size_class без словника — -1
+            combined = combined * (int(key.max(initial=0)) + 1) + key
+        groups = np.unique(combined, return_inverse=True)[1].ravel().astype(np.int64)
+        signature = self.compat.signature.astype(np.int64)
+        combined = groups * (int(signature.max(initial=0)) + 1) + signature
+        return np.unique(combined, return_inverse=True)[1].ravel()
+
+    def _build_dominance(self) -> Dict[str, np.ndarray]:
+        """
+        Недоміновані рядки для кожного рейтингу.
+
+        Рядок домінований, якщо в його групі є інший, вищий у рейтингу,
+        не дорожчий і не важчий. Фільтри підбору (крім пошуку за назвою)
+        беруть групи цілком, тож домінований рядок ніколи не виграє слот
+        і не потрібен точному підбору чи ремонту бюджету.
+        """
+        n = len(self.records)
+        groups = self._dominance_groups()
+        dominant: Dict[str, np.ndarray] = {}
+        for p in RANKING_PRIORITIES:
+            pos = np.empty(n, dtype=np.int64)
+            for cat, sl in self.buckets.items():
+                pos[sl] = self._rank_pos[(cat, p)]
+            order = np.lexsort((pos, groups))
+            keep = np.zeros(n, dtype=bool)
+            for part in np.split(order, np.flatnonzero(np.diff(groups[order])) + 1):
+                if len(part):
+                    keep[part[nondominated(self.columns.price[part], self.columns.weight[part])]] = True
+            dominant[p] = keep
+        return dominant
+
+    def _build_assembly(self) -> AssemblyPlanner:
+        """Планувальник з'єднань: кріплення — рядки FASTENER_FAMILY за ключовими словами назви."""
+        cols = self.columns
+        code = cols.family_code.get(FASTENER_FAMILY, -1)
+        fastener = (cols.family == code) & ~self.keyword_mask(FASTENER_EXCLUDE)
+        masks = {kind: fastener & self.keyword_mask(words) for kind, words in FASTENER_KEYWORDS.items()}
+        return AssemblyPlanner(self.compat, cols.price, masks)
+
+    def __len__(self) -> int:
+        return len(self.components)
+
+    # ---------------- ЗАПИТИ ---------------- #
+
+    def bucket(self, category: str) -> slice:
+        return self.buckets.get(category, slice(0, 0))
+
+    def fetch(self, rows: Iterable[int]) -> Dict[int, Dict]:
+        """Повні записи для рядків: кожен різний рядок читається один раз."""
+        return {row: self.records[row] for row in set(rows)}
+
+    def keyword_mask(self, keywords: Tuple[str, ...]) -> np.ndarray:
+        """
+        Прапорець «назва містить хоч одне з ключових слів» для всіх рядків.
+
+        Призначено для сталих наборів слів (ролі), тому результат кешується.
+        """
+        mask = self._keyword_masks.get(keywords)
+        if mask is None:
+            mask = np.zeros(len(self.records), dtype=bool)
+            for keyword in keywords:
+                mask[self.name_index.search(keyword)] = True
+            self._keyword_masks[keywords] = mask
+        return mask
+
+    def name_mask(self, category: str, hint: str) -> np.ndarray:
+        """Маска рядків відра, назва яких містить hint (без урахування регістру)."""
+        sl = self.bucket(category)
+        mask = np.zeros(sl.stop - sl.start, dtype=bool)
+        mask[self.name_index.search(hint, sl) - sl.start] = True
+        return mask
+
+    def best_row(self, category: str, priority: Optional[str], mask: Optional[np.ndarray] = None) -> Optional[int]:
+        """
+        Рядок найкращого кандидата за рейтингом (category, priority).
+
+        mask — булева маска по відру категорії (None — усе відро);
+        вибір — argmin позиції в готовому рейтингу, тобто O(n) без сортування.
+        """
+        sl = self.bucket(category)
+        if sl.stop == sl.start:
+            return None
+        key = (category, ranking_priority(priority))
+        if mask is None:
+            return sl.start + int(self.rankings[key][0])
+        local = np.flatnonzero(mask)
+        if not len(local):
+            return None
+        return sl.start + int(local[np.argmin(self._rank_pos[key][local])])
+
+    def ranked_rows(
+        self, category: str, priority: Optional[str], mask: np.ndarray, prune: bool = False
+    ) -> Tuple[np.ndarray, np.ndarray, int]:
+        """
+        Рядки відра під маскою від найкращого за рейтингом (category, priority):
+        (рядки, їхні місця серед усіх рядків під маскою, кількість рядків під
+        маскою). prune — лише недоміновані рядки; місця від цього не змінюються.
+        """
+        sl = self.bucket(category)
+        p = ranking_priority(priority)
+        local = np.flatnonzero(mask)
+        rank_pos = self._rank_pos[(category, p)]
+        total = len(local)
+        if prune:
+            all_pos = np.sort(rank_pos[local])
+            local = local[self.dominant[p][sl.start + local]]
+            pos = rank_pos[local]
+            order = np.argsort(pos, kind="stable")
+            places = np.searchsorted(all_pos, pos[order])
+        else:
+            order = np.argsort(rank_pos[local], kind="stable")
+            places = np.arange(total)
+        return sl.start + local[order], places, total
+
+    def candidate_counts(self) -> Dict[str, Dict[str, Dict[str, int]]]:
+        """Кандидатів до й після відкидання домінованих: {рейтинг: {категорія: {before, after}}}."""
+        return {
+            p or "default": {
+                cat: {"before": sl.stop - sl.start, "after": int(np.count_nonzero(self.dominant[p][sl]))}
+                for cat, sl in self.buckets.items()
+            }
+            for p in RANKING_PRIORITIES
+        }
+
+
+def export_arrays(catalog: PreparedCatalog) -> Tuple[Dict, Dict[str, np.ndarray]]:
+    """(meta, масиви) підготовленого каталогу для скомпільованого знімка."""
+    vocabs, columns = catalog.columns.export()
+    arrays: Dict[str, np.ndarray] = {f"col.{name}": arr for name, arr in columns.items()}
+    arrays["order"] = np.asarray(catalog.order, dtype=np.int64)
+
+    buckets = list(catalog.buckets)
+    arrays["bucket_bounds"] = np.array(
+        [0] + [catalog.buckets[cat].stop for cat in buckets], dtype=np.int64
+    )
+    # рейтинги відер однієї пріоритетності склеєні в порядку відер
+    for p in RANKING_PRIORITIES:
+        arrays[f"rank.{p}"] = np.concatenate([catalog.rankings[(cat, p)] for cat in buckets] or [np.empty(0, np.int64)])
+        arrays[f"rank_pos.{p}"] = np.concatenate([catalog._rank_pos[(cat, p)] for cat in buckets] or [np.empty(0, np.int64)])
+
+    for p in RANKING_PRIORITIES:
+        arrays[f"dominant.{p}"] = catalog.dominant[p]
+
+    compat_meta, compat = catalog.compat.export()
+    arrays.update({f"compat.{name}": arr for name, arr in compat.items()})
+
+    names = pack_strings(list(catalog.name_index.names))
+    arrays["names.blob"] = names["blob"]
+    arrays["names.offsets"] = names["offsets"]
+    arrays["names.grams"] = catalog.name_index.grams
+    arrays["names.gram_offsets"] = catalog.name_index.offsets
+    arrays["names.postings"] = catalog.name_index.postings
+
+    meta = {"vocabs": vocabs, "columns": list(columns), "buckets": buckets, "compat": compat_meta}
+    return meta, arrays
+
+
+_prepared: "OrderedDict[str, PreparedCatalog]" = OrderedDict()
+_prepared_lock = threading.Lock()
+_PREPARED_MAX = 2
+
+
+def get_prepared_catalog(snapshot: CatalogSnapshot) -> PreparedCatalog:
+    """Підготовлений каталог для версії знімка (будується один раз на версію)."""
+    catalog = _prepared.get(snapshot.version)
+    if catalog is not None:
+        return catalog
+
+    with _prepared_lock:
+        catalog = _prepared.get(snapshot.version)
+        if catalog is None:
+            if snapshot.binary is not None:
+                catalog = PreparedCatalog.from_binary(snapshot.binary)
+            else:
+                catalog = PreparedCatalog(snapshot.components, version=snapshot.version)
+            _prepared[snapshot.version] = catalog
+            while len(_prepared) > _PREPARED_MAX:
+                _prepared.popitem(last=False)
+    return catalog
+
+
+def compiled_synthetic_catalog(snapshot: CatalogSnapshot, n: int, seed: Optional[int]) -> Optional[PreparedCatalog]:
+    """
+    Синтетичний каталог (n, seed) зі знімка, скомпільованого
+    `python -m app.db.catalog_binary --synthetic n --seed seed`, якщо він є:
+    без генерації й побудови індексів, сторінки mmap спільні для процесів.
+    """
+    if seed is None:
+        return None
+    binary = load_compiled_synthetic(snapshot.version, n, seed)
+    return PreparedCatalog.from_binary(binary) if binary is not None else None
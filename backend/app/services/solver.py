@@ -0,0 +1,351 @@
+import heapq
+import time
+from bisect import bisect_left, bisect_right
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+# Режими підбору компонентів
+SOLVER_MODES = ("greedy", "exact")
+
+DEFAULT_TIME_LIMIT_MS = 200
+MAX_TIME_LIMIT_MS = 5000
+PARETO_MAX_POINTS = 12
+
+# Крок ціни між точками фронту Парето (ціни — у копійках)
+PARETO_STEP = 0.01
+
+# Скільки найкращих кандидатів перевіряти на домінування поштучно;
+# решта спершу відсіюється векторно по їхній «драбині»
+PRUNE_HEAD = 1024
+
+# Як часто (у вузлах перебору) перевіряти годинник
+CLOCK_CHECK_NODES = 256
+
+EPS = 1e-9
+
+
+def rank_scores(places: np.ndarray, total: int) -> np.ndarray:
+    """Оцінка кандидата за місцем у рейтингу слота: 1.0 — найкращий, далі рівномірно до 1/total."""
+    return 1.0 - np.asarray(places, dtype=np.float64) / max(total, 1)
+
+
+def nondominated(cost: np.ndarray, weight: np.ndarray) -> np.ndarray:
+    """
+    Індекси кандидатів, не домінованих за (ціна, вага, оцінка).
+
+    Кандидати впорядковані від найкращого, тож кандидат домінований, якщо
+    хтось раніший не дорожчий і не важчий. «Драбина» — попередні кандидати,
+    не доміновані за (ціна, вага): ціни зростають, ваги спадають.
+    """
+    stair_cost: List[float] = []
+    stair_weight: List[float] = []
+    kept: List[int] = []
+
+    def visit(i: int) -> None:
+        c, w = float(cost[i]), float(weight[i])
+        j = bisect_right(stair_cost, c) - 1
+        if j >= 0 and stair_weight[j] <= w:
+            return
+        kept.append(i)
+        k = e = bisect_left(stair_cost, c)
+        while e < len(stair_cost) and stair_weight[e] >= w:
+            e += 1
+        stair_cost[k:e] = [c]
+        stair_weight[k:e] = [w]
+
+    n = len(cost)
+    head = min(n, PRUNE_HEAD)
+    for i in range(head):
+        visit(i)
+    if head < n:
+        rest = np.arange(head, n)
+        j = np.searchsorted(np.asarray(stair_cost), cost[rest], side="right") - 1
+        beaten = (j >= 0) & (np.asarray(stair_weight)[np.maximum(j, 0)] <= weight[rest])
+        for i in rest[~beaten].tolist():
+            visit(i)
+    return np.asarray(kept, dtype=np.int64)
+
+
+class SolverSlot:
+    """
+    Слот задачі: обрати одного кандидата на quantity одиниць.
+
+    cost, weight, score — для всього слота (одиниця × quantity); кандидати
+    впорядковані за спаданням оцінки, доміновані відкинуто. total — скільки
+    кандидатів було в слоті до будь-якого відкидання.
+    """
+
+    __slots__ = (
+        "key", "quantity", "total", "rows", "cost", "weight", "score",
+        "min_cost", "min_weight", "_by_cost", "_by_weight",
+    )
+
+    def __init__(
+        self,
+        key: str,
+        quantity: int,
+        rows: np.ndarray,
+        unit_cost: np.ndarray,
+        unit_weight: np.ndarray,
+        unit_score: np.ndarray,
+        total: Optional[int] = None,
+    ):
+        keep = nondominated(unit_cost, unit_weight)
+        score = unit_score[keep] * quantity
+        self.key = key
+        self.quantity = quantity
+        self.total = len(rows) if total is None else total
+        self.rows: List[int] = rows[keep].tolist()
+        self.cost: List[float] = (unit_cost[keep] * quantity).tolist()
+        self.weight: List[float] = (unit_weight[keep] * quantity).tolist()
+        self.score: List[float] = score.tolist()
+        self.min_cost = min(self.cost)
+        self.min_weight = min(self.weight)
+        self._by_cost = self._best_under(self.cost)
+        self._by_weight = self._best_under(self.weight)
+
+    def _best_under(self, amounts: List[float]):
+        """(відсортовані витрати, найкраща оцінка серед кандидатів не дорожчих за кожну)."""
+        order = sorted(range(len(amounts)), key=amounts.__getitem__)
+        best, running = [], float("-inf")
+        for i in order:
+            running = max(running, self.score[i])
+            best.append(running)
+        return [amounts[i] for i in order], best
+
+    def best_score(self, cost_cap: float, weight_cap: float) -> float:
+        """Верхня межа оцінки слота, якщо на нього лишилось cost_cap і weight_cap."""
+        bound = float("inf")
+        for (amounts, best), cap in ((self._by_cost, cost_cap), (self._by_weight, weight_cap)):
+            i = bisect_right(amounts, cap + EPS) - 1
+            if i < 0:
+                return float("-inf")
+            bound = min(bound, best[i])
+        return bound
+
+
+class Solution:
+    __slots__ = ("choice", "cost", "weight", "score")
+
+    def __init__(self, choice: Sequence[int], cost: float, weight: float, score: float):
+        self.choice = tuple(choice)
+        self.cost = cost
+        self.weight = weight
+        self.score = score
+
+    def rows(self, slots: Sequence[SolverSlot]) -> List[int]:
+        """Рядки каталогу по одиницях, у порядку слотів."""
+        rows: List[int] = []
+        for slot, j in zip(slots, self.choice):
+            rows.extend([slot.rows[j]] * slot.quantity)
+        return rows
+
+
+class BranchAndBound:
+    """
+    Точний розв'язувач задачі про рюкзак із вибором (multiple-choice knapsack)
+    з двома обмеженнями — ціна й вага.
+
+    Пошук у глибину: слоти — від найвпливовішого (найбільший розкид оцінок),
+    кандидати — від найкращого, тож перший знайдений допустимий розв'язок
+    зазвичай уже добрий. Гілка відтинається, якщо навіть найкращі доступні
+    за залишком бюджету й ваги кандидати решти слотів не дають кращої оцінки.
+    Після дедлайну повертається найкращий знайдений розв'язок (optimal=False).
+    """
+
+    def __init__(self, slots: Sequence[SolverSlot], budget: float, weight_cap: float, deadline: float):
+        self.order = sorted(range(len(slots)), key=lambda i: -(max(slots[i].score) - min(slots[i].score)))
+        self.slots = [slots[i] for i in self.order]
+        self.budget = budget
+        self.weight_cap = weight_cap
+        self.deadline = deadline
+
+        n = len(self.slots)
+        self._min_cost = [0.0] * (n + 1)
+        self._min_weight = [0.0] * (n + 1)
+        self._max_score = [0.0] * (n + 1)
+        for d in range(n - 1, -1, -1):
+            self._min_cost[d] = self._min_cost[d + 1] + self.slots[d].min_cost
+            self._min_weight[d] = self._min_weight[d + 1] + self.slots[d].min_weight
+            self._max_score[d] = self._max_score[d + 1] + self.slots[d].score[0]
+
+        self.best: Optional[Solution] = None
+        self.nodes = 0
+        self.timed_out = False
+        self._choice = [0] * n
+
+    def solve(self) -> Optional[Solution]:
+        if self._min_cost[0] <= self.budget and self._min_weight[0] <= self.weight_cap:
+            self._search(0, 0.0, 0.0, 0.0)
+        if self.best is None:
+            return None
+        # вибір — у вихідному порядку слотів
+        choice = [0] * len(self.order)
+        for d, i in enumerate(self.order):
+            choice[i] = self.best.choice[d]
+        return Solution(choice, self.best.cost, self.best.weight, self.best.score)
+
+    @property
+    def optimal(self) -> bool:
+        return not self.timed_out
+
+    def _bound(self, depth: int, cost: float, weight: float) -> float:
+        spare_cost = self.budget - cost - self._min_cost[depth]
+        spare_weight = self.weight_cap - weight - self._min_weight[depth]
+        total = 0.0
+        for slot in self.slots[depth:]:
+            total += slot.best_score(spare_cost + slot.min_cost, spare_weight + slot.min_weight)
+        return total
+
+    def _search(self, depth: int, cost: float, weight: float, score: float) -> None:
+        self.nodes += 1
+        if self.nodes % CLOCK_CHECK_NODES == 0 and time.perf_counter() > self.deadline:
+            self.timed_out = True
+        if self.timed_out:
+            return
+
+        if depth == len(self.slots):
+            if self.best is None or score > self.best.score + EPS:
+                self.best = Solution(self._choice, cost, weight, score)
+            return
+
+        if self.best is not None and score + self._bound(depth, cost, weight) <= self.best.score + EPS:
+            return
+
+        slot = self.slots[depth]
+        rest_cost = self._min_cost[depth + 1]
+        rest_weight = self._min_weight[depth + 1]
+        rest_score = self._max_score[depth + 1]
+        for j in range(len(slot.rows)):
+            # кандидати — за спаданням оцінки: далі лише гірше
+            if self.best is not None and score + slot.score[j] + rest_score <= self.best.score + EPS:
+                break
+            c = cost + slot.cost[j]
+            w = weight + slot.weight[j]
+            if c + rest_cost > self.budget or w + rest_weight > self.weight_cap:
+                continue
+            self._choice[depth] = j
+            self._search(depth + 1, c, w, score + slot.score[j])
+            if self.timed_out:
+                return
+
+
+def solve(slots: Sequence[SolverSlot], budget: float, weight_cap: float, deadline: float) -> Dict:
+    """Найкращий розв'язок у межах бюджету й ваги: {solution, optimal, nodes}."""
+    bnb = BranchAndBound(slots, budget, weight_cap, deadline)
+    solution = bnb.solve()
+    return {"solution": solution, "optimal": bnb.optimal, "nodes": bnb.nodes}
+
+
+def pareto_front(
+    slots: Sequence[SolverSlot],
+    budget: float,
+    weight_cap: float,
+    deadline: float,
+    max_points: int = PARETO_MAX_POINTS,
+) -> List[Solution]:
+    """
+    Фронт Парето «ціна — оцінка» методом ε-обмежень: кожна наступна точка —
+    найкращий розв'язок, строго дешевший за попередній. Точки — від
+    найдорожчої; без повного перебору (дедлайн) фронт може бути неповним.
+    """
+    front: List[Solution] = []
+    cap = budget
+    while len(front) < max_points and time.perf_counter() < deadline:
+        solution = solve(slots, cap, weight_cap, deadline)["solution"]
+        if solution is None:
+            break
+        if front and solution.score >= front[-1].score - EPS:
+            front[-1] = solution  # та сама оцінка дешевше — попередня точка домінована
+        else:
+            front.append(solution)
+        cap = solution.cost - PARETO_STEP
+    return front
+
+
+# ---------------- РЕМОНТ БЮДЖЕТУ ---------------- #
+
+class Repair:
+    """
+    Швидкий ремонт жадібного розв'язку, що не влазить у бюджет чи вагу.
+
+    Починаючи з найкращих кандидатів (вибір жадібного підбору), по одному
+    замінює кандидата слота на гірший і дешевший/легший. Варіанти заміни
+    лежать у купі за «виграшем на одиницю втраченої оцінки»; виграш — частка
+    поточного перевищення, яку заміна знімає (по кожному порушеному
+    обмеженню, не більше 1). Після кожної заміни підсумки оновлюються
+    інкрементно, а варіант з вершини купи перед застосуванням переоцінюється
+    за поточним станом (застарілий повертається в купу з новою оцінкою).
+    """
+
+    def __init__(self, slots: Sequence[SolverSlot], budget: float, weight_cap: float):
+        self.slots = slots
+        self.budget = budget
+        self.weight_cap = weight_cap
+        self.choice = [0] * len(slots)
+        self.cost = sum(slot.cost[0] for slot in slots)
+        self.weight = sum(slot.weight[0] for slot in slots)
+        self.score = sum(slot.score[0] for slot in slots)
+        self.steps = 0
+
+    def feasible(self) -> bool:
+        return self.cost <= self.budget and self.weight <= self.weight_cap
+
+    def _option(self, i: int) -> Optional[tuple]:
+        """Найкраща заміна для слота i за поточним станом: (виграш/втрата, кандидат) або None."""
+        slot, cur = self.slots[i], self.choice[i]
+        over_cost = self.cost - self.budget
+        over_weight = self.weight - self.weight_cap
+        best = None
+        for k in range(cur + 1, len(slot.rows)):
+            saved_cost = slot.cost[cur] - slot.cost[k]
+            saved_weight = slot.weight[cur] - slot.weight[k]
+            # не ламаємо обмеження, яке вже виконується
+            if over_cost <= 0 and saved_cost < over_cost:
+                continue
+            if over_weight <= 0 and saved_weight < over_weight:
+                continue
+            gain = 0.0
+            if over_cost > 0:
+                gain += min(saved_cost / over_cost, 1.0)
+            if over_weight > 0:
+                gain += min(saved_weight / over_weight, 1.0)
+            if gain <= 0:
+                continue
+            ratio = gain / max(slot.score[cur] - slot.score[k], EPS)
+            if best is None or ratio > best[0]:
+                best = (ratio, k)
+        return best
+
+    def run(self) -> Optional[Solution]:
+        """Ремонтований розв'язок або None, якщо заміни вичерпано, а обмеження порушені."""
+        heap = []
+        for i in range(len(self.slots)):
+            option = self._option(i)
+            if option is not None:
+                heapq.heappush(heap, (-option[0], i, option[1]))
+
+        while not self.feasible():
+            if not heap:
+                return None
+            neg_ratio, i, k = heapq.heappop(heap)
+            option = self._option(i)
+            if option is None:
+                continue
+            if option[1] != k or abs(option[0] + neg_ratio) > EPS:
+                heapq.heappush(heap, (-option[0], i, option[1]))
+                continue
+
+            slot, cur = self.slots[i], self.choice[i]
+            self.cost += slot.cost[k] - slot.cost[cur]
+            self.weight += slot.weight[k] - slot.weight[cur]
+            self.score += slot.score[k] - slot.score[cur]
+            self.choice[i] = k
+            self.steps += 1
+
+            option = self._option(i)
+            if option is not None:
+                heapq.heappush(heap, (-option[0], i, option[1]))
+
+        return Solution(self.choice, self.cost, self.weight, self.score)
@@ -0,0 +1,135 @@
+import random
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+
+SYNTHETIC_DIR = Path(__file__).resolve().parent.parent / "data" / "synthetic"
+
+
+class SyntheticPlan:
+    """
+    Компактний опис синтетичного датасету: донор і змінені поля кожного елемента.
+
+    Повний набір визначається (каталог, n, seed), тож на диск зберігаються
+    лише ці масиви, а записи матеріалізуються з донорів за потреби.
+    """
+
+    def __init__(self, donor_idx: np.ndarray, price_f: np.ndarray, weight_f: np.ndarray,
+                 speed_f: np.ndarray, first_id: int, seed: int):
+        self.donor_idx = donor_idx
+        self.price_f = price_f
+        self.weight_f = weight_f
+        self.speed_f = speed_f
+        self.first_id = first_id
+        self.seed = seed
+
+    def __len__(self) -> int:
+        return len(self.donor_idx)
+
+    @classmethod
+    def generate(cls, real_data: Sequence[Dict], count: int, seed: int) -> "SyntheticPlan":
+        rng = np.random.default_rng(seed)
+        first_id = max(c["id"] for c in real_data) + 1 if real_data else 1
+        return cls(
+            donor_idx=rng.integers(0, len(real_data), size=count, dtype=np.int32),
+            price_f=rng.uniform(0.8, 1.2, size=count),
+            weight_f=rng.uniform(0.9, 1.1, size=count),
+            speed_f=rng.uniform(0.9, 1.1, size=count),
+            first_id=first_id,
+            seed=seed,
+        )
+
+    # ---------------- ДИСК ---------------- #
+
+    def save(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.stem + ".tmp.npz")
+        np.savez(
+            tmp,
+            donor_idx=self.donor_idx,
+            price_f=self.price_f,
+            weight_f=self.weight_f,
+            speed_f=self.speed_f,
+            meta=np.array([self.first_id, self.seed], dtype=np.int64),
+        )
+        tmp.replace(path)
+
+    @classmethod
+    def load(cls, path: Path) -> "SyntheticPlan":
+        with np.load(path) as data:
+            first_id, seed = (int(v) for v in data["meta"])
+            return cls(data["donor_idx"], data["price_f"], data["weight_f"], data["speed_f"], first_id, seed)
+
+    # ---------------- МАТЕРІАЛІЗАЦІЯ ---------------- #
+
+    def item(self, real_data: Sequence[Dict], i: int) -> Dict:
+        """
+        i-й синтетичний запис. Поверхнева копія донора: вкладені структури
+        (connectors, geometry, meta, ...) спільні з донором і не копіюються.
+        """
+        donor = real_data[int(self.donor_idx[i])]
+        new_id = self.first_id + i
+        new_item = dict(donor)
+        new_item["id"] = new_id
+        new_item["name"] = f"{donor['name']} (Gen-{new_id})"
+        new_item["price"] = round(donor["price"] * float(self.price_f[i]))
+        new_item["weight"] = round(donor["weight"] * float(self.weight_f[i]), 2)
+        if donor.get("speed"):
+            new_item["speed"] = int(donor["speed"] * float(self.speed_f[i]))
+        return new_item
+
+    def iter_chunks(self, real_data: Sequence[Dict], chunk_size: int) -> Iterator[List[Dict]]:
+        for start in range(0, len(self), chunk_size):
+            stop = min(start + chunk_size, len(self))
+            yield [self.item(real_data, i) for i in range(start, stop)]
+
+
+def plan_path(catalog_version: str, n: int, seed: int) -> Path:
+    return SYNTHETIC_DIR / f"{catalog_version}-{n}-{seed}.npz"
+
+
+def get_plan(real_data: Sequence[Dict], n: int, seed: int,
+             catalog_version: Optional[str] = None, persist: bool = False) -> SyntheticPlan:
+    """План на n - len(real_data) синтетичних елементів; з диска, якщо вже збережений."""
+    count = max(0, n - len(real_data))
+    path = plan_path(catalog_version, n, seed) if catalog_version else None
+
+    if path is not None and path.exists():
+        return SyntheticPlan.load(path)
+
+    plan = SyntheticPlan.generate(real_data, count, seed)
+    if persist and path is not None:
+        plan.save(path)
+    return plan
+
+
+def iter_synthetic(real_data: Sequence[Dict], n: int, seed: Optional[int] = None,
+                   chunk_size: int = 50000, catalog_version: Optional[str] = None,
+                   persist: bool = False) -> Iterator[List[Dict]]:
+    """
+    Потоково віддає датасет із n елементів частинами по chunk_size.
+
+    Спершу йдуть реальні компоненти (без копіювання — знімок каталогу
+    незмінний), далі синтетичні. Однакові (каталог, n, seed) дають
+    однаковий датасет.
+    """
+    if not real_data:
+        return
+    if seed is None:
+        seed = random.randrange(2 ** 31)
+
+    real = list(real_data[:n])
+    for start in range(0, len(real), chunk_size):
+        yield real[start:start + chunk_size]
+
+    plan = get_plan(real_data, n, seed, catalog_version=catalog_version, persist=persist)
+    yield from plan.iter_chunks(real_data, chunk_size)
+
+
+def generate_synthetic(real_data: Sequence[Dict], n: int, seed: Optional[int] = None, **kwargs) -> List[Dict]:
+    """Увесь датасет одним списком (див. iter_synthetic)."""
+    dataset: List[Dict] = []
+    for chunk in iter_synthetic(real_data, n, seed, **kwargs):
+        dataset.extend(chunk)
+    return dataset
@@ -0,0 +1,96 @@
+import json
+import random
+from pathlib import Path
+
+import pytest
+
+from app.models.dto import ConfigRequest
+from app.services.assembly import hopcroft_karp
+from app.services.greedy import GreedyConfigurator
+
+CATALOG = Path(__file__).resolve().parent.parent / "app" / "data" / "lego_components.json"
+BASELINE = Path(__file__).resolve().parent / "data" / "baseline_configure.json"
+
+
+def _kuhn(left_group, groups, n_right):
+    """Розмір максимального парування простими збільшуючими шляхами (еталон)."""
+    match_r = [-1] * n_right
+
+    def augment(l, seen):
+        for r in groups[left_group[l]]:
+            if r in seen:
+                continue
+            seen.add(r)
+            if match_r[r] == -1 or augment(match_r[r], seen):
+                match_r[r] = l
+                return True
+        return False
+
+    return sum(augment(l, set()) for l in range(len(left_group)))
+
+
+# ---------------- ПАРУВАННЯ ---------------- #
+
+def test_hopcroft_karp_finds_maximum_matching():
+    rnd = random.Random(1)
+    for _ in range(2000):
+        n_right, n_groups, n_left = rnd.randint(0, 30), rnd.randint(1, 30), rnd.randint(0, 40)
+        groups = [rnd.sample(range(n_right), rnd.randint(0, min(n_right, 4))) for _ in range(n_groups)]
+        left_group = [rnd.randrange(n_groups) for _ in range(n_left)]
+
+        match = hopcroft_karp(left_group, groups, n_right)
+        used = [r for r in match if r >= 0]
+        assert len(used) == len(set(used))
+        assert all(r == -1 or r in groups[left_group[l]] for l, r in enumerate(match))
+        assert len(used) == _kuhn(left_group, groups, n_right)
+
+
+def test_hopcroft_karp_handles_long_augmenting_paths():
+    # ланцюжок: жадібний старт забирає сусідню праву вершину, і останній лівій
+    # лишається лише шлях через увесь ланцюжок (глибина, недосяжна для рекурсії)
+    n = 2000
+    groups = [[i + 1, i] if i + 1 < n else [i] for i in range(n)]
+    match = hopcroft_karp(list(range(n)), groups, n)
+    assert sorted(match) == list(range(n))
+
+
+# ---------------- ЗБІРКА В configure() ---------------- #
+
+@pytest.fixture(scope="module")
+def configurator():
+    return GreedyConfigurator(json.loads(CATALOG.read_text(encoding="utf-8")))
+
+
+def _requests(**overrides):
+    cases = json.loads(BASELINE.read_text(encoding="utf-8"))
+    return [ConfigRequest(**dict(case["request"], **overrides)) for case in cases]
+
+
+def test_assembly_report_is_default_and_leaves_build_unchanged(configurator):
+    for plain, reported in zip(_requests(assemblyReport=False), _requests()):
+        expected = configurator.configure(plain)
+        result = configurator.configure(reported)
+        assert "assembly" not in expected
+        if "error" in expected:
+            assert result == expected
+            continue
+        report = result.pop("assembly")
+        assert result == expected
+        assert report["added"] == []
+        assert report["feasible"] == (not report["unmatched"])
+        assert report["connections"] <= report["demand"]
+
+
+def test_top_up_adds_reported_fasteners(configurator):
+    topped = 0
+    for request in _requests(assemblyTopUp=True):
+        result = configurator.configure(request)
+        if "error" in result:
+            continue
+        report = result["assembly"]
+        ids = [c["id"] for c in result["selected"]]
+        for added in report["added"]:
+            topped += 1
+            assert ids.count(added["id"]) >= added["quantity"]
+        assert result["total_price"] <= request.budget
+    assert topped
@@ -0,0 +1,68 @@
+import time
+
+import jwt
+import pytest
+from fastapi import HTTPException
+
+from app.api.auth import routes_auth
+from app.api.auth.token_cache import TokenCache
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    cache = TokenCache()
+    monkeypatch.setattr(routes_auth, "token_cache", cache)
+    return cache
+
+
+# ---------------- КЕШ ТОКЕНІВ ---------------- #
+
+def test_cached_token_is_served_until_exp():
+    cache = TokenCache()
+    cache.put("t", "s", "u", time.time() + 60)
+    cache.put("old", "s", "u", time.time() - 1)
+    cache.put("no-exp", "s", "u", None)
+
+    assert cache.get("t", "s") == (True, "u")
+    assert cache.get("old", "s") == (False, None)
+    assert cache.get("no-exp", "s") == (False, None)
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["expired"], stats["size"]) == (1, 2, 1, 1)
+
+
+def test_secret_change_drops_cached_tokens():
+    cache = TokenCache()
+    cache.put("t", "s1", "u", time.time() + 60)
+    assert cache.get("t", "s2") == (False, None)
+    assert cache.get("t", "s1") == (False, None)
+
+
+def test_cache_is_bounded():
+    cache = TokenCache(maxsize=2)
+    for token in ("a", "b", "c"):
+        cache.put(token, "s", token, time.time() + 60)
+    assert cache.get("a", "s") == (False, None)
+    assert cache.get("c", "s") == (True, "c")
+    assert cache.stats()["evictions"] == 1
+
+
+# ---------------- decode_token ---------------- #
+
+def test_repeat_decode_skips_signature_check(cache, monkeypatch):
+    token = routes_auth.generate_token("u")
+    calls = []
+    decode = jwt.decode
+    monkeypatch.setattr(jwt, "decode", lambda *a, **kw: calls.append(1) or decode(*a, **kw))
+
+    assert [routes_auth.decode_token(token) for _ in range(3)] == ["u"] * 3
+    assert len(calls) == 1
+
+
+def test_rotated_secret_rejects_cached_token(cache, monkeypatch):
+    token = routes_auth.generate_token("u")
+    assert routes_auth.decode_token(token) == "u"
+
+    monkeypatch.setattr(routes_auth, "SECRET_KEY", "rotated")
+    with pytest.raises(HTTPException) as error:
+        routes_auth.decode_token(token)
+    assert error.value.status_code == 401
@@ -0,0 +1,187 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from app.db import catalog_binary
+from app.db.catalog_binary import compile_catalog
+from app.db.catalog_store import CatalogSnapshot
+from app.services import benchmark_scaling, benchmark_suite
+from app.services.benchmark_scaling import compare, fit_exponent, geometric_sizes
+from app.services.benchmark_suite import PHASES, build_scenarios, latency_summary, run_suite
+from app.services.synthetic import generate_synthetic
+
+CATALOG = Path(__file__).resolve().parent.parent / "app" / "data" / "lego_components.json"
+
+
+def _assert_summary_of(summary, samples):
+    # у звіті зразки округлено до 4 знаків, а зведення рахується до округлення
+    expected = latency_summary(samples)
+    assert set(summary) == set(expected)
+    for key, value in expected.items():
+        assert summary[key] == pytest.approx(value, abs=1e-3)
+
+
+class _Repo:
+    def get_snapshot(self) -> CatalogSnapshot:
+        return CatalogSnapshot("test-v1", tuple(json.loads(CATALOG.read_text(encoding="utf-8"))))
+
+
+@pytest.fixture
+def repo(monkeypatch):
+    monkeypatch.setattr(benchmark_suite, "Repo", _Repo)
+
+
+# ---------------- МАТРИЦЯ СЦЕНАРІЇВ ---------------- #
+
+def test_latency_summary_percentiles():
+    summary = latency_summary(list(range(100, 0, -1)))
+    assert summary == {"mean": 50.5, "p50": 50.5, "p95": 95.05, "p99": 99.01, "min": 1.0, "max": 100.0}
+    assert latency_summary([]) == {}
+
+
+def test_scenarios_are_cartesian_product_of_dimensions():
+    assert len(build_scenarios()) == len(benchmark_suite.FUNCTION_SCENARIOS) * 4 * 3 * 3
+    scenarios = build_scenarios(priorities=["speed"], functions=["drive", "drive_fly_scan"], terrains=["indoor"])
+    assert [s["name"] for s in scenarios] == [
+        f"{func}/speed/indoor/c{level}" for func in ("drive", "drive_fly_scan") for level in (1, 2, 3)
+    ]
+    assert [bool(s["request"].sensors) for s in scenarios] == [False] * 3 + [True] * 3
+
+
+def test_suite_report_is_consistent_with_its_samples(repo, tmp_path):
+    out = tmp_path / "suite.json"
+    report = run_suite(warmup=1, repetitions=5, priorities=["speed", "cheapness"], functions=["drive"],
+                       terrains=["indoor"], complexity=[2], out=out)
+
+    assert json.loads(out.read_text(encoding="utf-8")) == report
+    assert report["meta"]["scenarios"] == len(report["scenarios"]) == 2
+    samples = []
+    for scenario in report["scenarios"]:
+        assert scenario["success"]
+        assert len(scenario["samples_ms"]) == 5
+        _assert_summary_of(scenario["latency_ms"], scenario["samples_ms"])
+        assert set(scenario["phases_ms"]) == set(PHASES)
+        samples.extend(scenario["samples_ms"])
+    _assert_summary_of(report["summary"]["latency_ms"], samples)
+    assert report["summary"]["failed_scenarios"] == 0
+
+
+def test_suite_on_synthetic_catalog_reports_generation(repo, tmp_path, monkeypatch):
+    monkeypatch.setattr("app.services.synthetic.SYNTHETIC_DIR", tmp_path / "synthetic")
+    report = run_suite(n=500, seed=3, warmup=0, repetitions=2, priorities=["speed"], functions=["fly"],
+                       terrains=["indoor"], complexity=[1])
+    assert (report["meta"]["n"], report["meta"]["seed"]) == (500, 3)
+    assert not report["meta"]["compiled"]
+    assert report["setup_ms"]["generation"] > 0
+
+
+def test_suite_opens_compiled_synthetic_snapshot(repo, tmp_path, monkeypatch):
+    monkeypatch.setattr(catalog_binary, "COMPILED_DIR", tmp_path / "compiled")
+    snapshot = _Repo().get_snapshot()
+    dataset = generate_synthetic(snapshot.components, 500, 3, catalog_version=snapshot.version)
+    compile_catalog(dataset, catalog_binary.synthetic_version(snapshot.version, 500, 3),
+                    catalog_binary.synthetic_path(snapshot.version, 500, 3))
+
+    report = run_suite(n=500, seed=3, warmup=0, repetitions=2, priorities=["speed"], functions=["fly"],
+                       terrains=["indoor"], complexity=[1])
+    assert report["meta"]["compiled"]
+    assert (report["meta"]["n"], report["setup_ms"]["generation"]) == (500, 0.0)
+
+
+# ---------------- КРИВІ МАСШТАБУВАННЯ ---------------- #
+
+def _scaling_report(times, exponent=1.0):
+    points = [{"n": n, "index_build": t, "selection": t, "configure": t} for n, t in times.items()]
+    return {"points": points, "exponents": {"index_build": exponent, "selection": exponent, "configure": exponent}}
+
+
+def test_geometric_sizes_end_at_max_n():
+    assert geometric_sizes() == list(benchmark_scaling.DEFAULT_SIZES)
+    assert geometric_sizes(10, 500) == [10, 100, 500]
+
+
+def test_fit_exponent_uses_measurable_tail():
+    sizes = [10, 100, 1000, 10000, 100000]
+    assert fit_exponent(sizes, [3e-6 * n ** 2 for n in sizes]) == 2.0
+    # на малих n — стала частина, показник оцінюється лише по n >= 1000
+    assert fit_exponent(sizes, [5.0, 5.0, 1.0, 10.0, 100.0]) == 1.0
+    assert fit_exponent(sizes, [0.001] * 5) is None
+
+
+def test_compare_flags_slower_points_and_steeper_curves():
+    baseline = _scaling_report({1000: 1.0, 10000: 10.0})
+    assert compare(_scaling_report({1000: 1.1, 10000: 11.0}), baseline)["passed"]
+
+    slower = compare(_scaling_report({1000: 1.0, 10000: 14.0}), baseline)
+    assert not slower["passed"]
+    assert [p["passed"] for p in slower["phases"]["selection"]["points"]] == [True, False]
+
+    steeper = compare(_scaling_report({1000: 1.0, 10000: 10.0}, exponent=1.3), baseline)
+    assert not steeper["passed"]
+    assert not steeper["phases"]["configure"]["exponent"]["passed"]
+
+    # відкриття скомпільованого знімка не порівнюється з генерацією й побудовою індексів
+    compiled = _scaling_report({1000: 1.0, 10000: 10.0})
+    compiled["points"][1]["compiled"] = True
+    compiled["points"][1]["index_build"] = 100.0
+    assert compare(compiled, baseline)["passed"]
+
+    # точки, нижчі за поріг шуму таймера, не оцінюються
+    assert compare(_scaling_report({10: 0.04}), _scaling_report({10: 0.01}))["passed"]
+
+
+def test_baselines_round_trip_and_reject_path_names(tmp_path, monkeypatch):
+    monkeypatch.setattr(benchmark_scaling, "BASELINE_DIR", tmp_path / "baselines")
+    report = _scaling_report({1000: 1.0})
+    benchmark_scaling.save_baseline("main-1.0", report)
+
+    assert benchmark_scaling.list_baselines() == ["main-1.0"]
+    assert benchmark_scaling.load_baseline("main-1.0") == report
+    with pytest.raises(FileNotFoundError):
+        benchmark_scaling.load_baseline("other")
+    for name in ("../escape", "a/b", "", ".hidden"):
+        with pytest.raises(ValueError):
+            benchmark_scaling.save_baseline(name, report)
+
+
+def test_cli_exit_status_is_the_regression_gate(tmp_path, monkeypatch):
+    monkeypatch.setattr(benchmark_scaling, "BASELINE_DIR", tmp_path / "baselines")
+    runs = iter([_scaling_report({1000: 1.0, 10000: 10.0}), _scaling_report({1000: 1.05, 10000: 10.0}),
+                 _scaling_report({1000: 2.0, 10000: 20.0})])
+    monkeypatch.setattr(benchmark_scaling, "run_scaling", lambda *a, **kw: next(runs))
+
+    assert benchmark_scaling.main(["--save", "base"]) == 0
+    assert benchmark_scaling.main(["--compare", "base"]) == 0
+    assert benchmark_scaling.main(["--compare", "base"]) == 1
+
+
+def test_scaling_run_reports_every_size(tmp_path, monkeypatch):
+    monkeypatch.setattr(benchmark_scaling, "Repo", _Repo)
+    monkeypatch.setattr("app.services.synthetic.SYNTHETIC_DIR", tmp_path / "synthetic")
+    report = benchmark_scaling.run_scaling([100, 10], repetitions=1)
+    assert [p["n"] for p in report["points"]] == [10, 100]
+    assert set(report["exponents"]) == set(benchmark_scaling.PHASES)
+
+
+def test_assembly_scaling_reports_plan_and_top_up(monkeypatch):
+    monkeypatch.setattr(benchmark_scaling, "Repo", _Repo)
+    report = benchmark_scaling.run_assembly_scaling([100, 10], repetitions=2)
+    assert [p["n"] for p in report["points"]] == [10, 100]
+    assert all(p["demand"] > 0 for p in report["points"])
+    assert set(report["exponents"]) == set(benchmark_scaling.ASSEMBLY_PHASES)
+
+
+def test_scaling_report_progress_covers_assembly_curve(tmp_path, monkeypatch):
+    monkeypatch.setattr(benchmark_scaling, "Repo", _Repo)
+    monkeypatch.setattr("app.services.synthetic.SYNTHETIC_DIR", tmp_path / "synthetic")
+    events = []
+    report = benchmark_scaling.scaling_report([10, 100], repetitions=1, assembly=True, assembly_sizes=[20, 10],
+                                              progress=lambda phase, percent: events.append((phase, percent)))
+
+    assert [p["n"] for p in report["assembly"]["points"]] == [10, 20]
+    percents = [percent for _, percent in events]
+    assert percents == sorted(percents)
+    assert events[-1] == ("done", 100.0) and [phase for phase, _ in events].count("done") == 1
+    assembly = [percent for phase, percent in events if phase.startswith("assembly")]
+    assert assembly and min(assembly) >= 100.0 - benchmark_scaling.ASSEMBLY_SHARE
@@ -0,0 +1,504 @@
+import copy
+import hashlib
+import json
+import random
+import shutil
+import threading
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from app.db import catalog_binary
+from app.db.catalog_binary import LazyRecords, cached_loader, compile_catalog, compiled_path, load_compiled
+from app.db.catalog_changes import CatalogChangeLog, record_hash
+from app.db.catalog_store import CatalogSnapshot, CatalogStore
+from app.models.dto import ConfigRequest
+from app.services.greedy import GreedyConfigurator
+from app.services.name_index import NameIndex
+from app.services.prepared_catalog import (
+    PreparedCatalog, compiled_synthetic_catalog, get_prepared_catalog, normalize_component,
+)
+from app.services import synthetic
+from app.services.synthetic import generate_synthetic, iter_synthetic
+
+CATALOG = Path(__file__).resolve().parent.parent / "app" / "data" / "lego_components.json"
+BASELINE = Path(__file__).resolve().parent / "data" / "baseline_configure.json"
+BASELINE_SPARSE = Path(__file__).resolve().parent / "data" / "baseline_sparse.json"
+
+
+def _components():
+    return json.loads(CATALOG.read_text(encoding="utf-8"))
+
+
+# ---------------- СХОВИЩЕ КАТАЛОГУ ---------------- #
+
+def test_store_reloads_only_when_content_changes(tmp_path):
+    catalog = tmp_path / "lego_components.json"
+    shutil.copy(CATALOG, catalog)
+    store = CatalogStore(catalog)
+
+    first = store.get()
+    assert store.get() is first
+    assert list(first.components) == _components()
+
+    # mtime змінився, вміст — ні: той самий знімок
+    catalog.write_bytes(catalog.read_bytes())
+    assert store.get() is first
+
+    components = _components()[:10]
+    catalog.write_text(json.dumps(components, ensure_ascii=False), encoding="utf-8")
+    second = store.get()
+    assert second.version != first.version
+    assert list(second.components) == components
+    assert store.reloads == 2
+
+
+def test_store_keeps_last_snapshot_on_broken_file(tmp_path):
+    catalog = tmp_path / "lego_components.json"
+    shutil.copy(CATALOG, catalog)
+    store = CatalogStore(catalog)
+    first = store.get()
+
+    catalog.write_text('[{"id": 1', encoding="utf-8")
+    assert store.get() is first
+
+
+def test_missing_file_gives_empty_snapshot(tmp_path):
+    store = CatalogStore(tmp_path / "missing.json")
+    assert store.get().components == ()
+    assert store.version == "empty"
+
+
+# ---------------- ПІДГОТОВЛЕНИЙ КАТАЛОГ ---------------- #
+
+def test_normalize_component_copies_only_when_needed():
+    full = {"id": 1, "category": "wheel", "domain": "ground", "family": "x",
+            "geometry": {}, "scores": {}, "connectors": [], "roles": []}
+    assert normalize_component(full) is full
+
+    bare = {"id": 2, "category": "wheel", "name": "Колесо"}
+    normalized = normalize_component(bare)
+    assert bare == {"id": 2, "category": "wheel", "name": "Колесо"}
+    assert normalized == dict(bare, domain="ground", geometry={}, scores={}, connectors=[], roles=[])
+
+
+def test_prepared_catalog_leaves_snapshot_records_intact():
+    components = _components()
+    original = copy.deepcopy(components)
+    catalog = PreparedCatalog(tuple(components))
+
+    assert components == original
+    assert all(c["domain"] and "geometry" in c and "roles" in c for c in catalog.components)
+    for category, records in catalog.component_map.items():
+        assert [c["id"] for c in records] == [c["id"] for c in components if c.get("category", "unknown") == category]
+
+
+def test_prepared_catalog_is_built_once_per_version():
+    components = tuple(_components())
+    first = get_prepared_catalog(CatalogSnapshot("test-v1", components))
+    assert get_prepared_catalog(CatalogSnapshot("test-v1", components)) is first
+    assert get_prepared_catalog(CatalogSnapshot("test-v2", components)) is not first
+
+
+# ---------------- РЕЙТИНГИ ---------------- #
+
+def _reference_key(category, comp, priority):
+    """Ключі сортування конфігуратора до рейтингів (еталон): кандидат — max за ключем."""
+    elec = comp.get("electronics") or {}
+    scores = comp.get("scores") or {}
+    geom = comp.get("geometry") or {}
+    rpm = elec.get("rpm_nominal") or 0
+    torque = elec.get("torque_nominal_ncm") or 0
+    price = comp.get("price") or 0
+    weight = comp.get("weight") or 0
+    strength = scores.get("structural_strength") or 0
+    cost_eff = scores.get("cost_efficiency") or 0
+    conn_vers = scores.get("connection_versatility") or 0
+
+    if category == "motor":
+        return {
+            "speed": (rpm, torque, -price),
+            "stability": (torque, weight, -price),
+            "cheapness": (-price, rpm * torque, torque),
+            "durability": (weight, torque, -price),
+        }.get(priority, (rpm * torque, -price))
+    if category == "structure":
+        studs = (geom.get("stud_length") or 0) * (geom.get("stud_width") or 0)
+        if not any([studs, strength, cost_eff, conn_vers]):
+            return (-price,)
+        if priority == "cheapness":
+            return (cost_eff, strength, conn_vers, -price)
+        return (strength, conn_vers, studs, -price)
+    return {
+        "cheapness": (-price, cost_eff),
+        "durability": (strength, -price),
+        "speed": (rpm, -price),
+        "stability": (torque, weight, -price),
+    }.get(priority, (-price,))
+
+
+def _reference_best(category, candidates, priority):
+    return sorted(candidates, key=lambda c: _reference_key(category, c, priority), reverse=True)[0]
+
+
+def _sparse_catalog(seed):
+    """Каталог із випадково відсутніми, нульовими й однаковими полями (багато рівних ключів)."""
+    rnd = random.Random(seed)
+    records = copy.deepcopy(_components())
+    for c in records:
+        for field in ("electronics", "scores", "geometry"):
+            if rnd.random() < 0.2:
+                c.pop(field, None)
+        if rnd.random() < 0.2:
+            c["price"] = rnd.choice([0, None, 10])
+        if isinstance(c.get("scores"), dict) and rnd.random() < 0.3:
+            c["scores"] = {k: 0 for k in c["scores"]}
+    return records
+
+
+def _assert_best_rows_match_baseline(catalog, seed):
+    rnd = random.Random(seed)
+    for category, sl in catalog.buckets.items():
+        records = catalog.records[sl]
+        for priority in ("speed", "stability", "cheapness", "durability", "", "whatever"):
+            row = catalog.best_row(category, priority)
+            assert catalog.records[row] == _reference_best(category, records, priority)
+            for _ in range(20):
+                mask = np.array([rnd.random() < 0.3 for _ in records], dtype=bool)
+                if not mask.any():
+                    assert catalog.best_row(category, priority, mask) is None
+                    continue
+                row = catalog.best_row(category, priority, mask)
+                expected = _reference_best(category, [c for c, m in zip(records, mask) if m], priority)
+                assert catalog.records[row] == expected
+
+
+def test_best_row_matches_sorting_by_baseline_keys():
+    _assert_best_rows_match_baseline(PreparedCatalog(_components()), 3)
+
+
+def test_best_row_matches_baseline_with_missing_and_zero_fields():
+    for seed in range(3):
+        _assert_best_rows_match_baseline(PreparedCatalog(_sparse_catalog(seed)), seed)
+
+
+# ---------------- КОЛОНКИ ---------------- #
+
+def test_columns_follow_records():
+    catalog = PreparedCatalog(_sparse_catalog(7))
+    cols = catalog.columns
+    for row, comp in enumerate(catalog.records):
+        elec = comp.get("electronics") or {}
+        assert cols.price[row] == float(comp.get("price") or 0)
+        assert cols.weight[row] == float(comp.get("weight") or 0)
+        assert cols.rpm_nominal[row] == float(elec.get("rpm_nominal") or 0)
+        assert cols.category_vocab[cols.category[row]] == comp.get("category", "unknown")
+        assert cols.domain_vocab[cols.domain[row]] == comp["domain"]
+        assert cols.family_vocab[cols.family[row]] == (comp.get("family") or "")
+        assert cols.has_axle_conn[row] == any(c.get("type") == "axle" for c in comp["connectors"])
+        assert cols.is_air[row] == (comp.get("category") in ("propeller", "wing") or comp["domain"] == "air")
+
+
+def test_configure_on_sparse_catalog_matches_baseline():
+    """tests/data/baseline_sparse.json — результати конфігуратора до пришвидшень на _sparse_catalog(0)."""
+    configurator = GreedyConfigurator(_sparse_catalog(0))
+    repaired = 0
+    for case in json.loads(BASELINE_SPARSE.read_text(encoding="utf-8")):
+        request = ConfigRequest(**case["request"])
+        result = configurator.configure(request)
+        result.pop("assembly", None)  # звіт про з'єднання не змінює саму збірку
+        expected = case["result"]
+        if "repair" in result:
+            # перевищення тепер ремонтується: дешевша збірка в межах бюджету й ваги замість помилки
+            repaired += 1
+            assert expected["error"].startswith(("Бюджет перевищено", "Вагу перевищено"))
+            assert result["total_price"] <= request.budget
+            assert result["total_weight"] <= request.weight
+            continue
+        if "error" in expected:
+            assert result == expected
+            continue
+        assert sorted(result) == expected["keys"]
+        assert [c["id"] for c in result["selected"]] == expected["ids"]
+        for key in ("total_price", "total_weight", "remaining_budget", "warning"):
+            assert result[key] == expected[key]
+    assert repaired
+
+
+# ---------------- ІНДЕКС НАЗВ ---------------- #
+
+def _scan(names, query, rows):
+    return [i for i in range(rows.start, rows.stop) if query.lower() in names[i].lower()]
+
+
+def test_name_index_matches_substring_scan():
+    catalog = PreparedCatalog(_components())
+    names = [c.get("name") or "" for c in catalog.records]
+    index = NameIndex(names)
+    rnd = random.Random(4)
+
+    queries = ["", "a", "мо", "кри", "Мотор", "LEGO", "technic", "xyzq", "  ", "колесо гусениці"]
+    for _ in range(200):
+        name = rnd.choice(names)
+        start = rnd.randrange(len(name) + 1)
+        queries.append(name[start:start + rnd.randint(1, 8)])
+
+    whole = slice(0, len(names))
+    for query in queries:
+        assert index.search(query).tolist() == _scan(names, query, whole)
+        for sl in catalog.buckets.values():
+            assert index.search(query, sl).tolist() == _scan(names, query, sl)
+
+
+def test_name_index_normalizes_unicode():
+    index = NameIndex(["Мотор середній", "Колесо"])
+    # «й» з комбінованим знаком (NFD) і верхній регістр
+    assert index.search("СЕРЕДНІ\u0438\u0306").tolist() == [0]
+    assert index.search("КОЛ").tolist() == [1]
+
+
+# ---------------- СИНТЕТИЧНИЙ ДАТАСЕТ ---------------- #
+
+def test_synthetic_dataset_is_seeded_and_leaves_catalog_intact():
+    components = _components()
+    original = copy.deepcopy(components)
+    dataset = generate_synthetic(components, 1500, 7)
+
+    assert len(dataset) == 1500
+    assert dataset[:len(components)] == components
+    assert len({c["id"] for c in dataset}) == 1500
+    assert dataset == generate_synthetic(components, 1500, 7)
+    assert dataset != generate_synthetic(components, 1500, 8)
+    assert components == original
+
+
+def test_synthetic_chunks_and_persisted_plan_give_same_dataset(tmp_path, monkeypatch):
+    monkeypatch.setattr(synthetic, "SYNTHETIC_DIR", tmp_path / "synthetic")
+    components = _components()
+    dataset = generate_synthetic(components, 1500, 7)
+
+    chunks = list(iter_synthetic(components, 1500, 7, chunk_size=100, catalog_version="v1", persist=True))
+    assert all(len(chunk) <= 100 for chunk in chunks)
+    assert [c for chunk in chunks for c in chunk] == dataset
+    assert synthetic.plan_path("v1", 1500, 7).exists()
+    assert generate_synthetic(components, 1500, 7, catalog_version="v1") == dataset
+
+
+# ---------------- ЖУРНАЛ ЗМІН ---------------- #
+
+def _priced(**prices):
+    return [{"id": int(i[1:]), "price": p} for i, p in prices.items()]
+
+
+def test_change_log_composes_chain_of_versions(tmp_path):
+    log = CatalogChangeLog(tmp_path / "changes.json")
+    log.record("v1", _priced(c1=1, c2=2, c3=3))
+    log.record("v2", _priced(c1=1, c2=20, c4=4))       # 2 змінено, 3 видалено, 4 додано
+    log.record("v3", _priced(c1=1, c2=20, c3=3, c5=5))  # 3 повернувся, 4 зник, 5 додано
+
+    assert log.since("v3") == (set(), set(), set())
+    assert log.since("v2") == ({3, 5}, set(), {4})
+    # 3 видалили й повернули — для клієнта v1 це зміна; 4 клієнт не бачив
+    assert log.since("v1") == ({5}, {2, 3}, set())
+    assert log.since("v0") is None
+
+
+def test_change_log_survives_restart(tmp_path):
+    path = tmp_path / "changes.json"
+    CatalogChangeLog(path).record("v1", _priced(c1=1, c2=2))
+
+    log = CatalogChangeLog(path)
+    assert log.head == "v1"
+    log.record("v2", _priced(c1=10, c2=2))
+    assert log.since("v1") == (set(), {1}, set())
+
+
+
+def test_workers_sharing_change_log_keep_one_chain(tmp_path):
+    path = tmp_path / "changes.json"
+    first, second = CatalogChangeLog(path), CatalogChangeLog(path)
+    first.record("v1", _priced(c1=1, c2=2))
+    second.record("v2", _priced(c1=1, c2=20))
+    first.record("v3", _priced(c1=1, c2=20, c3=3))  # поверх v2 іншого воркера, а не власного v1
+
+    assert first.since("v2") == ({3}, set(), set())
+    assert first.since("v1") == ({3}, {2}, set())
+    assert CatalogChangeLog(path).head == "v3"
+
+
+
+def test_concurrent_writers_do_not_clobber_each_other(tmp_path):
+    path = tmp_path / "changes.json"
+    errors = []
+
+    def worker(w):
+        log = CatalogChangeLog(path)
+        try:
+            for v in range(20):
+                log.record(f"w{w}-v{v}", _priced(c1=w, c2=v))
+        except Exception as e:
+            errors.append(e)
+
+    workers = [threading.Thread(target=worker, args=(w,)) for w in range(4)]
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join(30)
+
+    assert errors == []
+    log = CatalogChangeLog(path)
+    assert log.head.endswith("-v19")
+    # тимчасові файли в кожного запису свої й не лишаються після заміни
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["changes.json", "changes.json.lock"]
+
+
+def test_change_log_keeps_max_changes(tmp_path):
+    log = CatalogChangeLog(tmp_path / "changes.json", max_changes=2)
+    for v in range(4):
+        log.record(f"v{v}", _priced(c1=v))
+    assert log.since("v0") is None
+    assert log.since("v1") == (set(), {1}, set())
+
+
+def test_stored_hashes_replace_hashing_records(tmp_path):
+    log = CatalogChangeLog(tmp_path / "changes.json")
+    log.record("v1", _priced(c1=1, c2=2))
+    # записи не читаються, коли хеші вже є
+    log.record("v2", None, lambda: {1: "a", 3: "b"})
+    assert log.since("v1") == ({3}, {1}, {2})
+
+
+def test_store_records_each_new_version(tmp_path):
+    catalog = tmp_path / "lego_components.json"
+    catalog.write_text(json.dumps(_priced(c1=1, c2=2)), encoding="utf-8")
+    store = CatalogStore(catalog)
+    first = store.get().version
+
+    catalog.write_text(json.dumps(_priced(c1=1, c2=3)), encoding="utf-8")
+    store.get()
+    assert (tmp_path / "lego_components.changes.json").exists()
+    assert store.changes.since(first) == (set(), {2}, set())
+
+
+# ---------------- СКОМПІЛЬОВАНИЙ ЗНІМОК ---------------- #
+
+@pytest.fixture
+def compiled_dir(tmp_path, monkeypatch):
+    path = tmp_path / "compiled"
+    monkeypatch.setattr(catalog_binary, "COMPILED_DIR", path)
+    return path
+
+
+def _baseline_requests(n=20):
+    cases = json.loads(BASELINE.read_text(encoding="utf-8"))
+    return [ConfigRequest(**case["request"]) for case in cases[:n]]
+
+
+def _same_results(a: PreparedCatalog, b: PreparedCatalog) -> None:
+    left, right = GreedyConfigurator(a), GreedyConfigurator(b)
+    for request in _baseline_requests():
+        assert left.configure(request) == right.configure(request)
+
+
+def test_binary_snapshot_round_trip(tmp_path, compiled_dir):
+    components = _components()
+    path = compile_catalog(components, "v1", tmp_path / "catalog.bin")
+    binary = catalog_binary.BinaryCatalog(path)
+
+    assert binary.version == "v1"
+    assert list(binary.raw_records) == components
+    assert binary.record_hashes() == {c["id"]: record_hash(c) for c in components}
+    _same_results(PreparedCatalog.from_binary(binary), PreparedCatalog(components, version="v1"))
+
+
+def test_binary_snapshot_matches_json_on_synthetic_catalog(tmp_path, compiled_dir):
+    dataset = generate_synthetic(_components(), 3000, 5)
+    binary = catalog_binary.BinaryCatalog(compile_catalog(dataset, "syn", tmp_path / "syn.bin"))
+    prepared = PreparedCatalog.from_binary(binary)
+
+    _same_results(prepared, PreparedCatalog(dataset, version="syn"))
+    # записи декодуються лише для вибраних компонентів, а не для всього каталогу
+    assert prepared.records._load.cache_info().currsize < len(dataset) // 10
+
+
+def test_store_uses_compiled_snapshot_without_decoding_records(tmp_path, compiled_dir):
+    components = _components()
+    catalog = tmp_path / "lego_components.json"
+    shutil.copy(CATALOG, catalog)
+    version = hashlib.sha256(catalog.read_bytes()).hexdigest()[:16]
+    compile_catalog(components, version, compiled_path(catalog, version))
+
+    store = CatalogStore(catalog)
+    snapshot = store.get()
+    assert snapshot.version == version
+    assert snapshot.binary is not None
+    # журнал змін бере збережені хеші, записи не декодуються
+    assert store.changes.head == version
+    assert snapshot.binary.raw_records._load.cache_info().misses == 0
+    assert list(snapshot.components) == components
+
+
+def test_stale_or_broken_snapshot_is_ignored(tmp_path, compiled_dir):
+    catalog = tmp_path / "lego_components.json"
+    compile_catalog(_components(), "old", compiled_path(catalog, "new"))
+    assert load_compiled(catalog, "new") is None
+
+    compiled_path(catalog, "bad").write_bytes(b"not a snapshot")
+    assert load_compiled(catalog, "bad") is None
+
+
+def test_compiled_synthetic_dataset_replaces_generation(compiled_dir):
+    snapshot = CatalogSnapshot("v1", tuple(_components()))
+    assert compiled_synthetic_catalog(snapshot, 2000, 3) is None
+
+    dataset = generate_synthetic(snapshot.components, 2000, 3, catalog_version=snapshot.version)
+    compile_catalog(dataset, catalog_binary.synthetic_version("v1", 2000, 3),
+                    catalog_binary.synthetic_path("v1", 2000, 3))
+    compiled = compiled_synthetic_catalog(snapshot, 2000, 3)
+    assert compiled is not None
+    assert len(compiled) == 2000
+    _same_results(compiled, PreparedCatalog(dataset))
+
+
+# ---------------- ГАРЯЧІ Й ХОЛОДНІ ДАНІ ---------------- #
+
+def test_lazy_records_load_only_accessed_rows():
+    loaded = []
+    load = cached_loader(lambda pos: loaded.append(pos) or {"pos": pos})
+    records = LazyRecords(load, 10)
+
+    view = records[2:8][::2]
+    assert len(view) == 3
+    assert loaded == []
+    assert [r["pos"] for r in view] == [2, 4, 6]
+    assert view[-1] is records[6]
+    assert loaded == [2, 4, 6]
+    with pytest.raises(IndexError):
+        view[3]
+
+    ordered = LazyRecords(load, 10, np.array([9, 0, 4]))
+    assert [r["pos"] for r in ordered[1:]] == [0, 4]
+
+
+def test_prepared_catalog_keeps_records_cold():
+    components = _components()
+    catalog = PreparedCatalog(components, version="test-v1")
+    assert catalog.records._load.cache_info().currsize == 0
+    assert catalog.components[5] == normalize_component(components[5])
+
+    configurator = GreedyConfigurator(catalog)
+    selected = set()
+    for request in _baseline_requests():
+        result = configurator.configure(request)
+        selected.update(c["id"] for c in result.get("selected", []))
+    # нормалізовано лише записи, що дійшли до фінального перерахунку, а не весь каталог
+    assert len(selected) <= catalog.records._load.cache_info().currsize < len(components) // 4
+
+
+def test_fetch_reads_each_distinct_row_once():
+    catalog = PreparedCatalog(_components(), version="test-v1")
+    records = catalog.fetch([3, 7, 3, 3])
+    assert sorted(records) == [3, 7]
+    assert records[3] is catalog.records[3]
+    assert catalog.records._load.cache_info().misses == 2
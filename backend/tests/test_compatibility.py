@@ -0,0 +1,111 @@
+import copy
+import json
+import random
+from pathlib import Path
+
+import pytest
+
+from app.models.dto import ConfigRequest
+from app.services.compat_index import CompatibilityIndex
+from app.services.greedy import GreedyConfigurator
+from app.services.prepared_catalog import PreparedCatalog
+
+CATALOG = Path(__file__).resolve().parent.parent / "app" / "data" / "lego_components.json"
+BASELINE = Path(__file__).resolve().parent / "data" / "baseline_configure.json"
+
+
+def _load(path):
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+@pytest.fixture(scope="module")
+def components():
+    return _load(CATALOG)
+
+
+@pytest.fixture(scope="module")
+def constrained(components):
+    """Каталог із випадковими excludes, incompatible_families і only_with_system_type."""
+    rnd = random.Random(5)
+    families = sorted({c.get("family") or "" for c in components} - {""})
+    ids = [c["id"] for c in components]
+    records = copy.deepcopy(components)
+    for c in records:
+        r = rnd.random()
+        if r < 0.05:
+            c["excludes"] = rnd.sample(ids, 2)
+        elif r < 0.08:
+            c["compatibility"] = {"only_with_system_type": rnd.choice(["technic", "system"]), "incompatible_families": []}
+        elif r < 0.12:
+            c["compatibility"] = {"only_with_system_type": None, "incompatible_families": [rnd.choice(families)]}
+        if rnd.random() < 0.1:
+            c["system_type"] = "system"
+    return PreparedCatalog(records)
+
+
+def _pair(components, **second):
+    """Два записи каталогу; другий — з полями second."""
+    a, b = copy.deepcopy(components[0]), copy.deepcopy(components[1])
+    b.update(second)
+    index = PreparedCatalog([a, b]).compat
+    return index, index.row_by_id[a["id"]], index.row_by_id[b["id"]]
+
+
+# ---------------- ПЕРЕВІРКА ЗБІРКИ ---------------- #
+
+def test_excludes_conflict_in_both_directions(components):
+    index, a, b = _pair(components, excludes=[components[0]["id"]])
+    report = index.validate([a, b])
+    assert not report["valid"]
+    assert [c["kind"] for c in report["conflicts"]] == ["excludes"]
+    assert index.validate([a, a])["valid"]
+
+
+def test_incompatible_family_conflict(components):
+    family = components[0]["family"]
+    index, a, b = _pair(components, compatibility={"incompatible_families": [family], "only_with_system_type": None})
+    conflicts = index.validate([a, b])["conflicts"]
+    assert conflicts == [{"kind": "incompatible_family", "id": components[1]["id"],
+                          "with_id": components[0]["id"], "family": family}]
+
+
+def test_requires_reports_missing_components(components):
+    index, a, b = _pair(components, requires=[components[0]["id"], 10 ** 9])
+    report = index.validate([b])
+    assert {m["requires"] for m in report["missing"]} == {components[0]["id"], 10 ** 9}
+    assert index.validate([a, b])["missing"] == [{"id": components[1]["id"], "requires": 10 ** 9}]
+
+
+def test_build_state_mask_matches_validate(constrained):
+    index = constrained.compat
+    rnd = random.Random(1)
+    for _ in range(60):
+        rows = rnd.sample(range(len(constrained)), rnd.randint(1, 6))
+        if index.validate(rows)["conflicts"]:
+            continue
+        state = index.state()
+        for row in rows:
+            state.add(row)
+        for sl in constrained.buckets.values():
+            mask = state.conflict_mask(sl)
+            for i in range(sl.start, sl.stop):
+                assert bool(mask[i - sl.start]) == bool(index.validate(rows + [i])["conflicts"])
+
+
+def test_index_survives_export(constrained):
+    index = constrained.compat
+    meta, arrays = index.export()
+    restored = CompatibilityIndex.from_arrays(meta, arrays, constrained.columns)
+    rnd = random.Random(2)
+    for _ in range(200):
+        rows = rnd.sample(range(len(constrained)), rnd.randint(1, 8))
+        assert restored.validate(rows) == index.validate(rows)
+
+
+def test_configure_avoids_conflicting_parts(constrained):
+    configurator = GreedyConfigurator(constrained)
+    for case in _load(BASELINE):
+        result = configurator.configure(ConfigRequest(**case["request"]))
+        if "error" in result:
+            continue
+        assert not result.get("compatibility", {}).get("conflicts")
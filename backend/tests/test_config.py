@@ -0,0 +1,268 @@
+import json
+from pathlib import Path
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api import routes_config
+from app.db.catalog_store import CatalogSnapshot
+from app.db import history_store
+from app.db.history_store import HistoryStore
+from app.models.dto import ConfigRequest
+from app.services import config_batch, config_cache
+from app.services.bom import compact_result, expand_result
+from app.services.config_batch import configure_batch
+from app.services.config_cache import LRUCache, blueprint_key, request_key
+from app.services.greedy import GreedyConfigurator
+from app.services.history_writer import HistoryWriter
+from app.services.prepared_catalog import PreparedCatalog
+
+CATALOG = Path(__file__).resolve().parent.parent / "app" / "data" / "lego_components.json"
+BASELINE = Path(__file__).resolve().parent / "data" / "baseline_configure.json"
+
+
+def _components():
+    return json.loads(CATALOG.read_text(encoding="utf-8"))
+
+
+def _requests(**overrides):
+    cases = json.loads(BASELINE.read_text(encoding="utf-8"))
+    return [ConfigRequest(**dict(case["request"], **overrides)) for case in cases]
+
+
+@pytest.fixture(autouse=True)
+def empty_caches():
+    # кеші спільні на процес — кожен тест починає з порожніх
+    for cache in (config_cache.blueprint_cache, config_cache.result_cache):
+        cache.clear()
+        cache.hits = cache.misses = cache.evictions = 0
+    yield
+
+
+# ---------------- LRU ---------------- #
+
+def test_lru_evicts_least_recently_used():
+    cache = LRUCache(maxsize=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1  # "a" тепер свіжіший за "b"
+    cache.put("c", 3)
+
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == (1, 3)
+    assert len(cache) == 2
+
+
+def test_lru_stats_count_hits_misses_and_evictions():
+    cache = LRUCache(maxsize=1)
+    cache.put("a", 1)
+    cache.get("a")
+    cache.get("x")
+    cache.put("b", 2)
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["evictions"]) == (1, 1, 1)
+    assert (stats["size"], stats["maxsize"], stats["hit_rate"]) == (1, 1, 0.5)
+
+
+# ---------------- КЛЮЧІ ---------------- #
+
+def test_blueprint_key_ignores_fields_outside_blueprint():
+    base = _requests()[0]
+    other = ConfigRequest(**dict(base.dict(), budget=base.budget + 100, weight=base.weight + 100))
+    assert blueprint_key(base, "v1") == blueprint_key(other, "v1")
+    assert request_key(base, "v1") != request_key(other, "v1")
+
+
+def test_keys_depend_on_function_order_and_catalog_version():
+    base = next(r for r in _requests() if len(r.functions) > 1)
+    swapped = ConfigRequest(**dict(base.dict(), functions=list(reversed(base.functions))))
+    assert blueprint_key(base, "v1") != blueprint_key(swapped, "v1")
+    assert blueprint_key(base, "v1") != blueprint_key(base, "v2")
+    assert request_key(base, "v1") != request_key(base, "v2")
+
+
+def test_cached_blueprints_give_same_results():
+    catalog = PreparedCatalog(_components(), version="test-v1")
+    requests = _requests()
+    cold = [GreedyConfigurator(catalog).configure(r) for r in requests]
+    assert config_cache.blueprint_cache.stats()["size"] > 0
+
+    warm = [GreedyConfigurator(catalog).configure(r) for r in requests]
+    assert warm == cold
+    assert config_cache.blueprint_cache.hits >= len(requests)
+
+
+# ---------------- ПАКЕТ ЗАПИТІВ ---------------- #
+
+class _CountingConfigurator(GreedyConfigurator):
+    calls = []
+
+    def configure(self, request):
+        self.calls.append(request)
+        if request.priority == "boom":
+            raise RuntimeError("boom")
+        return super().configure(request)
+
+
+@pytest.fixture
+def counting(monkeypatch):
+    _CountingConfigurator.calls = []
+    monkeypatch.setattr(config_batch, "GreedyConfigurator", _CountingConfigurator)
+    return _CountingConfigurator.calls
+
+
+def test_batch_keeps_request_order_and_computes_duplicates_once(counting):
+    catalog = PreparedCatalog(_components(), version="test-v1")
+    unique = _requests()
+    requests = unique + unique[::-1] + unique[:5]
+
+    items = list(configure_batch(catalog, requests, workers=4))
+    assert [i for i, _, _ in items] == list(range(len(requests)))
+    assert len(counting) == len(unique)
+
+    expected = [GreedyConfigurator(catalog).configure(r) for r in requests]
+    assert [result for _, _, result in items] == expected
+    assert [status for _, status, _ in items] == [400 if "error" in r else 200 for r in expected]
+
+
+def test_batch_item_error_does_not_fail_the_batch(counting):
+    catalog = PreparedCatalog(_components(), version="test-v1")
+    good = _requests()[:3]
+    requests = good[:1] + [ConfigRequest(**dict(good[0].dict(), priority="boom"))] + good[1:]
+
+    items = list(configure_batch(catalog, requests, workers=2))
+    assert [status for _, status, _ in items][1] == 500
+    assert "boom" in items[1][2]["error"]
+    assert [result for _, _, result in items[:1] + items[2:]] == [
+        GreedyConfigurator(catalog).configure(r) for r in good
+    ]
+
+
+
+class _FixedConfigurator:
+    result = {}
+
+    def __init__(self, catalog):
+        pass
+
+    def configure(self, request):
+        return self.result
+
+
+@pytest.mark.parametrize("solver, result, cached", [
+    ("greedy", {"selected": []}, True),
+    ("exact", {"selected": [], "solver": {"optimal": True}}, True),
+    # розв'язок, знайдений до дедлайну, і помилка після нього залежать від навантаження
+    ("exact", {"selected": [], "solver": {"optimal": False}}, False),
+    ("exact", {"error": "Не знайдено збірки в межах бюджету"}, False),
+])
+def test_only_reproducible_results_are_cached(monkeypatch, solver, result, cached):
+    monkeypatch.setattr(_FixedConfigurator, "result", result)
+    monkeypatch.setattr(config_batch, "GreedyConfigurator", _FixedConfigurator)
+    request = ConfigRequest(**dict(_requests()[0].dict(), solver=solver))
+
+    assert config_batch.configure_cached(None, request, "key") == result
+    assert (config_cache.result_cache.get("key") is not None) == cached
+
+
+# ---------------- /config ---------------- #
+
+class _Repo:
+    def get_snapshot(self) -> CatalogSnapshot:
+        return CatalogSnapshot("test-v1", tuple(_components()))
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    store = HistoryStore(tmp_path / "history.sqlite3")
+    monkeypatch.setattr(history_store, "_store", store)
+    return store
+
+
+@pytest.fixture
+def writer(store, monkeypatch):
+    writer = HistoryWriter()
+    monkeypatch.setattr(routes_config, "history_writer", writer)
+    yield writer
+    writer.stop()
+
+
+@pytest.fixture
+def client(writer, monkeypatch):
+    monkeypatch.setattr(routes_config, "Repo", _Repo)
+    app = FastAPI()
+    app.include_router(routes_config.router)
+    return TestClient(app)
+
+
+def _successful_request():
+    configurator = GreedyConfigurator(_components())
+    return next(r for r in _requests(budget=6000.0) if "error" not in configurator.configure(r))
+
+
+def test_repeated_request_is_served_from_result_cache(client):
+    request = _successful_request()
+    first = client.post("/config", json=request.dict())
+    second = client.post("/config", json=request.dict())
+    assert first.status_code == second.status_code == 200
+    assert first.json() == second.json()
+
+    stats = client.get("/config/cache").json()
+    assert set(stats) == {"blueprint", "result"}
+    assert (stats["result"]["size"], stats["result"]["hits"]) == (1, 1)
+
+
+def test_bom_format_and_compact_history(client, store, writer):
+    request = _successful_request().dict()
+    full = client.post("/config", json=request).json()
+    bom = client.post("/config", params={"format": "bom"}, json=request).json()
+    assert bom == compact_result(full)
+    assert client.post("/config", params={"format": "xml"}, json=request).status_code == 400
+
+    writer.stop()
+    stored = [entry["result"] for entry in store.list_user("anonymous")[0]]
+    assert stored == [bom, bom]
+    assert expand_result(stored[0]) == full
+
+
+def test_batch_route_returns_items_in_order(client, store, writer):
+    requests = _requests()
+    body = client.post("/config/batch", json={"requests": [r.dict() for r in requests]}).json()
+
+    assert [item["index"] for item in body] == list(range(len(requests)))
+    ok = [item for item in body if item["status"] == 200]
+    failed = [item for item in body if item["status"] == 400]
+    assert ok and failed
+    assert all("result" in item for item in ok) and all("error" in item for item in failed)
+
+    writer.stop()
+    assert len(store.list_user("anonymous")[0]) == len(ok)
+
+
+def test_batch_route_streams_ndjson(client):
+    requests = _requests()[:6]
+    plain = client.post("/config/batch", json={"requests": [r.dict() for r in requests]}).json()
+    streamed = client.post("/config/batch", json={"requests": [r.dict() for r in requests], "stream": True})
+
+    assert streamed.headers["content-type"].startswith("application/x-ndjson")
+    assert [json.loads(line) for line in streamed.text.splitlines()] == plain
+
+
+def test_batch_size_is_checked(client, monkeypatch):
+    monkeypatch.setattr(routes_config, "MAX_BATCH_SIZE", 2)
+    request = _successful_request().dict()
+    assert client.post("/config/batch", json={"requests": []}).status_code == 400
+    assert client.post("/config/batch", json={"requests": [request] * 3}).status_code == 400
+    assert client.post("/config/batch", json={"requests": [request] * 2}).status_code == 200
+
+
+def test_validate_route_checks_built_configuration(client):
+    built = client.post("/config", json=_successful_request().dict()).json()
+    ids = [c["id"] for c in built["selected"]]
+
+    report = client.post("/config/validate", json={"component_ids": ids}).json()
+    assert report["valid"]
+    assert set(report) >= {"valid", "conflicts", "missing"}
+    assert client.post("/config/validate", json={"component_ids": ids + [10 ** 9]}).status_code == 400
@@ -0,0 +1,139 @@
+import json
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from app.models.dto import ConfigRequest
+from app.services.bom import compact_result, expand_result, format_result
+from app.services.greedy import GreedyConfigurator
+from app.services.prepared_catalog import PreparedCatalog
+from app.services.solver import nondominated
+from app.services.synthetic import generate_synthetic
+
+CATALOG = Path(__file__).resolve().parent.parent / "app" / "data" / "lego_components.json"
+BASELINE = Path(__file__).resolve().parent / "data" / "baseline_configure.json"
+
+
+def _load(path):
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def _requests(**overrides):
+    return [ConfigRequest(**dict(case["request"], **overrides)) for case in _load(BASELINE)]
+
+
+def _without_timings(result):
+    """Результат без полів, що залежать від часу чи кількості переглянутих кандидатів."""
+    result = dict(result)
+    if "solver" in result:
+        result["solver"] = {
+            k: v for k, v in result["solver"].items() if k not in ("elapsed_ms", "nodes", "candidates")
+        }
+    return result
+
+
+@pytest.fixture(scope="module")
+def components():
+    return _load(CATALOG)
+
+
+# ---------------- ВІДКИДАННЯ ДОМІНОВАНИХ ---------------- #
+
+def test_nondominated_matches_pairwise_check():
+    rng = np.random.default_rng(0)
+    for n in (1, 5, 50, 400):
+        for _ in range(20):
+            cost = rng.integers(1, 30, n).astype(float)
+            weight = rng.integers(1, 30, n).astype(float)
+            expected = [
+                i for i in range(n)
+                if not any(cost[j] <= cost[i] and weight[j] <= weight[i] for j in range(i))
+            ]
+            assert nondominated(cost, weight).tolist() == expected
+
+
+@pytest.fixture(scope="module")
+def synthetic_catalog(components):
+    return PreparedCatalog(generate_synthetic(components, 3000, 5, catalog_version="test"))
+
+
+def _assert_same_with_and_without_pruning(catalog, requests):
+    pruned = GreedyConfigurator(catalog)
+    full = GreedyConfigurator(catalog, prune_dominated=False)
+    for request in requests:
+        assert _without_timings(pruned.configure(request)) == _without_timings(full.configure(request))
+
+
+@pytest.mark.parametrize("extra", [{}, {"budgetRepair": False}])
+def test_pruning_does_not_change_greedy_results(synthetic_catalog, extra):
+    _assert_same_with_and_without_pruning(synthetic_catalog, _requests(budget=8000.0, **extra))
+
+    counts = synthetic_catalog.candidate_counts()
+    assert all(c["after"] <= c["before"] for per_cat in counts.values() for c in per_cat.values())
+    assert sum(c["after"] for c in counts["speed"].values()) < sum(c["before"] for c in counts["speed"].values())
+
+
+def test_pruning_does_not_change_exact_results(components):
+    # без відсікання точний пошук на синтетиці впирається в ліміт часу — перевірка на реальному каталозі
+    _assert_same_with_and_without_pruning(
+        PreparedCatalog(components), _requests(budget=8000.0, solver="exact", solverTimeLimitMs=5000)
+    )
+
+
+# ---------------- СУМІСНІСТЬ ІЗ ПОПЕРЕДНЬОЮ ВЕРСІЄЮ ---------------- #
+
+def test_default_results_match_baseline(components):
+    """
+    Без нових прапорців configure() дає те саме, що й конфігуратор до
+    пришвидшень: tests/data/baseline_configure.json записано ним на цьому
+    каталозі (набір деталей, підсумки, попередження чи помилка). Різниця —
+    звіт про з'єднання та відремонтовані збірки замість помилок перевищення.
+    """
+    configurator = GreedyConfigurator(components)
+    repaired = 0
+    for case in _load(BASELINE):
+        request = ConfigRequest(**case["request"])
+        result = configurator.configure(request)
+        result.pop("assembly", None)  # звіт про з'єднання не змінює саму збірку
+        expected = case["result"]
+        if "repair" in result:
+            # перевищення тепер ремонтується: дешевша збірка в межах бюджету й ваги замість помилки
+            repaired += 1
+            assert expected["error"].startswith(("Бюджет перевищено", "Вагу перевищено"))
+            assert result["total_price"] <= request.budget
+            assert result["total_weight"] <= request.weight
+            continue
+        if "error" in expected:
+            assert result == expected
+            continue
+        assert sorted(result) == expected["keys"]
+        assert [c["id"] for c in result["selected"]] == expected["ids"]
+        for key in ("total_price", "total_weight", "remaining_budget", "warning"):
+            assert result[key] == expected[key]
+    assert repaired
+
+
+def test_shared_catalog_keeps_no_state_between_requests(components):
+    catalog = PreparedCatalog(components)
+    requests = _requests()
+    forward = [GreedyConfigurator(catalog).configure(r) for r in requests]
+    backward = [GreedyConfigurator(catalog).configure(r) for r in reversed(requests)]
+    assert forward == backward[::-1]
+
+
+# ---------------- СПЕЦИФІКАЦІЯ (bom) ---------------- #
+
+def test_bom_round_trip_restores_full_result(components):
+    configurator = GreedyConfigurator(components)
+    for request in _requests():
+        result = configurator.configure(request)
+        compact = compact_result(result)
+        if "error" in result:
+            assert compact == result
+            continue
+        assert sum(line["quantity"] for line in compact["lines"]) == len(result["selected"])
+        assert len(compact["components"]) == len({c["id"] for c in result["selected"]})
+        assert json.dumps(expand_result(compact)) == json.dumps(result)
+        assert format_result(compact, "full") == result
+        assert format_result(result, "bom") == compact
@@ -0,0 +1,276 @@
+import json
+import multiprocessing
+import threading
+import time
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.auth.routes_auth import generate_token
+from app.api.history import routes_history
+from app.db import history_store
+from app.db.history_store import HistoryStore
+from app.services.bom import compact_result
+from app.services.history_writer import HistoryWriter
+
+
+def _entries(user_id, n, start=0):
+    return [{"user_id": user_id, "timestamp": str(i)} for i in range(start, start + n)]
+
+
+def _timestamps(entries):
+    return [e["timestamp"] for e in entries]
+
+
+# ---------------- ЗАПИС І ЧИТАННЯ ---------------- #
+
+def test_list_user_is_chronological_and_per_user(tmp_path):
+    store = HistoryStore(tmp_path / "history.sqlite3")
+    store.append_many(_entries("u", 3))
+    store.append({"user_id": "v", "timestamp": "x"})
+    store.append_many(_entries("u", 2, start=3))
+
+    entries, cursor = store.list_user("u")
+    assert _timestamps(entries) == ["0", "1", "2", "3", "4"]
+    assert cursor is None
+    assert _timestamps(store.list_user("v")[0]) == ["x"]
+
+
+def test_list_user_pages_from_newest(tmp_path):
+    store = HistoryStore(tmp_path / "history.sqlite3")
+    store.append_many(_entries("u", 7))
+
+    pages, cursor = [], None
+    while True:
+        page, cursor = store.list_user("u", limit=3, cursor=cursor)
+        pages.append(_timestamps(page))
+        if cursor is None:
+            break
+    assert pages == [["4", "5", "6"], ["1", "2", "3"], ["0"]]
+
+
+# ---------------- ОЧИЩЕННЯ ---------------- #
+
+def test_clear_hides_only_earlier_entries_of_the_user(tmp_path):
+    store = HistoryStore(tmp_path / "history.sqlite3")
+    store.append_many(_entries("u", 3) + _entries("v", 2))
+    store.clear_user("u")
+
+    assert store.list_user("u") == ([], None)
+    assert len(store.list_user("v")[0]) == 2
+
+    store.append_many(_entries("u", 1, start=10))
+    assert _timestamps(store.list_user("u")[0]) == ["10"]
+
+
+def test_compact_removes_only_tombstoned_rows(tmp_path):
+    store = HistoryStore(tmp_path / "history.sqlite3")
+    store.append_many(_entries("u", 3) + _entries("v", 2))
+    store.clear_user("u")
+    store.append_many(_entries("u", 1, start=10))
+
+    assert store.compact() == 3
+    assert _timestamps(store.list_user("u")[0]) == ["10"]
+    assert len(store.list_user("v")[0]) == 2
+
+
+# ---------------- ІМПОРТ history.json ---------------- #
+
+def test_legacy_history_is_imported_once(tmp_path):
+    legacy = tmp_path / "history.json"
+    legacy.write_text(json.dumps(_entries("u", 4)), encoding="utf-8")
+
+    store = HistoryStore(tmp_path / "history.sqlite3")
+    assert len(store.list_user("u")[0]) == 4
+    assert not legacy.exists()
+    assert (tmp_path / "history.json.migrated").exists()
+
+    # файл повернули (відкат деплою) — позначка не дає імпортувати вдруге
+    legacy.write_text(json.dumps(_entries("u", 4)), encoding="utf-8")
+    store = HistoryStore(tmp_path / "history.sqlite3")
+    assert len(store.list_user("u")[0]) == 4
+
+
+def _open_store(path, barrier):
+    barrier.wait()
+    HistoryStore(path)
+
+
+def test_concurrent_workers_import_legacy_history_once(tmp_path):
+    (tmp_path / "history.json").write_text(json.dumps(_entries("u", 200)), encoding="utf-8")
+    path = tmp_path / "history.sqlite3"
+
+    barrier = multiprocessing.Barrier(4)
+    workers = [multiprocessing.Process(target=_open_store, args=(path, barrier)) for _ in range(4)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(30)
+
+    assert [worker.exitcode for worker in workers] == [0, 0, 0, 0]
+    assert len(HistoryStore(path).list_user("u")[0]) == 200
+
+
+# ---------------- /history ---------------- #
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    store = HistoryStore(tmp_path / "history.sqlite3")
+    monkeypatch.setattr(history_store, "_store", store)
+    return store
+
+
+@pytest.fixture
+def writer(store):
+    # довгий інтервал: без flush() пачка чекала б у записувачі секунди
+    writer = HistoryWriter(flush_interval=5.0)
+    yield writer
+    writer.stop()
+
+
+@pytest.fixture
+def client(store, writer, monkeypatch):
+    monkeypatch.setattr(routes_history, "history_writer", writer)
+    app = FastAPI()
+    app.include_router(routes_history.router)
+    return TestClient(app)
+
+
+def test_list_route_pages_with_next_cursor(client, store):
+    token = generate_token("u")
+    store.append_many(_entries("u", 5))
+
+    full = client.get("/history/list", headers={"token": token})
+    assert _timestamps(full.json()) == ["0", "1", "2", "3", "4"]
+    assert "X-Next-Cursor" not in full.headers
+
+    first = client.get("/history/list", params={"limit": 3}, headers={"token": token})
+    cursor = first.headers["X-Next-Cursor"]
+    second = client.get("/history/list", params={"limit": 3, "cursor": cursor}, headers={"token": token})
+    assert _timestamps(first.json()) == ["2", "3", "4"]
+    assert _timestamps(second.json()) == ["0", "1"]
+    assert "X-Next-Cursor" not in second.headers
+
+
+def test_list_route_expands_compact_results(client, store):
+    token = generate_token("u")
+    full = {"selected": [{"id": 1, "category": "wheel", "unique_id": f"1-{i}"} for i in range(4)], "total_price": 4}
+    store.append({"user_id": "u", "timestamp": "0", "result": compact_result(full)})
+
+    assert client.get("/history/list", headers={"token": token}).json()[0]["result"] == full
+    bom = client.get("/history/list", params={"format": "bom"}, headers={"token": token}).json()[0]["result"]
+    assert bom["lines"] == [{"component_id": 1, "quantity": 4, "role": "wheel"}]
+    assert client.get("/history/list", params={"format": "xml"}, headers={"token": token}).status_code == 400
+
+
+def test_clear_route_and_missing_token(client, store):
+    token = generate_token("u")
+    store.append_many(_entries("u", 3))
+
+    assert client.get("/history/list").status_code == 401
+    assert client.delete("/history/clear", headers={"token": token}).status_code == 200
+    assert client.get("/history/list", headers={"token": token}).json() == []
+
+
+
+def test_clear_removes_entries_still_in_the_queue(client, store, writer):
+    token = generate_token("u")
+    writer.enqueue_many(_entries("u", 30))
+
+    assert client.delete("/history/clear", headers={"token": token}).status_code == 200
+    writer.flush()
+    assert store.list_user("u") == ([], None)
+
+
+def test_list_sees_own_queued_entries(client, writer):
+    token = generate_token("u")
+    writer.enqueue_many(_entries("u", 5))
+
+    response = client.get("/history/list", headers={"token": token})
+    assert _timestamps(response.json()) == ["0", "1", "2", "3", "4"]
+
+# ---------------- ФОНОВИЙ ЗАПИСУВАЧ ---------------- #
+
+def test_stop_writes_every_enqueued_entry_in_order(store):
+    writer = HistoryWriter(batch_size=7, flush_interval=5.0)
+    for entry in _entries("u", 50):
+        writer.enqueue(entry)
+    writer.stop()
+
+    assert _timestamps(store.list_user("u")[0]) == [str(i) for i in range(50)]
+    stats = writer.stats()
+    assert (stats["enqueued"], stats["written"], stats["queue_depth"]) == (50, 50, 0)
+    assert stats["batches"] >= 50 // 7
+    assert not stats["running"]
+
+
+def test_full_queue_falls_back_to_synchronous_write(store, monkeypatch):
+    entered, release = threading.Event(), threading.Event()
+    append_many = store.append_many
+
+    def slow_append_many(batch):
+        if threading.current_thread().name == "history-writer":
+            entered.set()
+            release.wait(10)
+        return append_many(batch)
+
+    monkeypatch.setattr(store, "append_many", slow_append_many)
+    writer = HistoryWriter(maxsize=1, batch_size=1)
+    writer.enqueue({"user_id": "u", "timestamp": "0"})
+    assert entered.wait(10)  # записувач завис на першій пачці
+    writer.enqueue({"user_id": "u", "timestamp": "1"})  # лягає в чергу
+    writer.enqueue({"user_id": "u", "timestamp": "2"})  # черга повна — пишемо одразу
+
+    assert writer.overflow_writes == 1
+    assert _timestamps(store.list_user("u")[0]) == ["2"]
+    release.set()
+    writer.stop()
+    assert sorted(_timestamps(store.list_user("u")[0])) == ["0", "1", "2"]
+
+
+def test_flush_writes_everything_queued_before_it(store, writer):
+    writer.enqueue_many(_entries("u", 50))
+    writer.enqueue({"user_id": "u", "timestamp": "last"})
+
+    assert writer.flush()
+    entries = store.list_user("u")[0]
+    assert len(entries) == 51
+    assert entries[-1]["timestamp"] == "last"
+
+
+def test_stop_drains_queue_and_later_writes_are_synchronous(store, writer):
+    writer.enqueue_many(_entries("u", 20))
+    writer.stop()
+    assert len(store.list_user("u")[0]) == 20
+
+    writer.enqueue({"user_id": "v", "timestamp": "a"})
+    writer.enqueue_many(_entries("v", 2))
+    assert writer._thread is None
+    assert len(store.list_user("v")[0]) == 3
+
+
+def test_stop_waits_for_enqueue_in_progress(store, monkeypatch):
+    writer = HistoryWriter()
+    writer.start()
+    entered = threading.Event()
+    put_nowait = writer._queue.put_nowait
+
+    def slow_put_nowait(item):
+        if threading.current_thread().name == "producer":
+            entered.set()
+            time.sleep(0.2)  # stop() встигає спрацювати, поки запис іще не в черзі
+        put_nowait(item)
+
+    monkeypatch.setattr(writer._queue, "put_nowait", slow_put_nowait)
+    producer = threading.Thread(target=writer.enqueue, args=({"user_id": "u", "timestamp": "0"},), name="producer")
+    producer.start()
+    assert entered.wait(10)
+    writer.stop()
+    producer.join(10)
+
+    assert _timestamps(store.list_user("u")[0]) == ["0"]
+
+def test_writer_stats_route(client):
+    body = client.get("/history/writer").json()
+    assert {"queue_depth", "written", "batches", "overflow_writes"} <= set(body)
@@ -0,0 +1,151 @@
+import asyncio
+import os
+import threading
+import time
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api import routes_benchmark
+from app.services import benchmark_jobs
+from app.services.benchmark_jobs import BenchmarkJobManager, JobQueueFull, wait_for_job
+
+
+# Точки входу воркерів замість справжніх бенчмарків (процеси spawn імпортують їх із цього модуля)
+
+def _quick_job(job_id, kind, params, conn):
+    conn.send(("progress", "work", 50.0))
+    conn.send(("done", {"kind": kind, "params": params}))
+    conn.close()
+
+
+def _slow_job(job_id, kind, params, conn):
+    conn.send(("progress", "work", 10.0))
+    time.sleep(60)
+
+
+def _crashing_job(job_id, kind, params, conn):
+    os._exit(3)
+
+
+def _wait(job, timeout=30.0):
+    return asyncio.run(asyncio.wait_for(wait_for_job(job, poll=0.02), timeout))
+
+
+def _wait_running(job, timeout=30.0):
+    deadline = time.monotonic() + timeout
+    while job.progress < 10.0 and time.monotonic() < deadline:
+        time.sleep(0.02)
+    assert job.status == "running"
+
+
+@pytest.fixture
+def manager():
+    manager = BenchmarkJobManager(max_workers=1, max_pending=2)
+    yield manager
+    manager.stop()
+
+
+def test_job_reports_result(manager, monkeypatch):
+    monkeypatch.setattr(benchmark_jobs, "_job_main", _quick_job)
+    job = _wait(manager.submit("suite", {"n": 10}))
+
+    assert job.status == "done"
+    assert job.result == {"kind": "suite", "params": {"n": 10}}
+    assert job.progress == 100.0
+
+
+def test_cap_queues_jobs_and_cancel_starts_next(manager, monkeypatch):
+    monkeypatch.setattr(benchmark_jobs, "_job_main", _slow_job)
+    first = manager.submit("run", {})
+    second = manager.submit("run", {})
+    _wait_running(first)
+    assert second.status == "queued"
+    assert manager.stats() == {"max_workers": 1, "running": 1, "queued": 1, "tracked": 2}
+
+    monkeypatch.setattr(benchmark_jobs, "_job_main", _quick_job)
+    manager.cancel(first.id)
+    assert first.status == "cancelled"
+    assert _wait(second).status == "done"
+
+
+def test_pending_queue_is_bounded(manager, monkeypatch):
+    monkeypatch.setattr(benchmark_jobs, "_job_main", _slow_job)
+    manager.submit("run", {})
+    queued = [manager.submit("run", {}) for _ in range(2)]
+    with pytest.raises(JobQueueFull):
+        manager.submit("run", {})
+
+    manager.cancel(queued[0].id)
+    assert queued[0].status == "cancelled"
+    manager.submit("run", {})
+    with pytest.raises(ValueError):
+        manager.submit("unknown", {})
+
+
+def test_crashed_worker_fails_its_job(manager, monkeypatch):
+    monkeypatch.setattr(benchmark_jobs, "_job_main", _crashing_job)
+    job = _wait(manager.submit("run", {}))
+    assert job.status == "failed"
+    assert "без результату" in job.error
+
+
+
+def test_state_is_available_while_monitor_reads_a_report(manager, monkeypatch):
+    monkeypatch.setattr(benchmark_jobs, "_job_main", _quick_job)
+    reading, release = threading.Event(), threading.Event()
+    receive = manager._receive
+
+    def slow_receive(conn):
+        reading.set()
+        release.wait(10)  # великий звіт розпаковується довго
+        return receive(conn)
+
+    monkeypatch.setattr(manager, "_receive", slow_receive)
+    job = manager.submit("run", {})
+    assert reading.wait(30)
+
+    answers = []
+    caller = threading.Thread(target=lambda: answers.extend([manager.stats(), manager.list(), manager.cancel(job.id)]))
+    caller.start()
+    caller.join(5)
+    release.set()
+    assert answers, "стан менеджера недоступний, поки монітор читає канал"
+    assert job.status == "cancelled"
+
+
+# ---------------- /benchmark/jobs ---------------- #
+
+@pytest.fixture
+def client(manager, monkeypatch):
+    monkeypatch.setattr(routes_benchmark, "benchmark_jobs", manager)
+    app = FastAPI()
+    app.include_router(routes_benchmark.router, prefix="/benchmark")
+    return TestClient(app)
+
+
+def test_delete_cancels_running_job(client, manager, monkeypatch):
+    monkeypatch.setattr(benchmark_jobs, "_job_main", _slow_job)
+    submitted = client.post("/benchmark/jobs/run", json={"n": 100})
+    assert submitted.status_code == 202
+    job_id = submitted.json()["job_id"]
+    _wait_running(manager.get(job_id))
+
+    listed = client.get("/benchmark/jobs").json()
+    assert [job["job_id"] for job in listed["jobs"]] == [job_id]
+    assert listed["stats"]["running"] == 1
+
+    cancelled = client.delete(f"/benchmark/jobs/{job_id}")
+    assert cancelled.status_code == 200
+    assert cancelled.json()["status"] == "cancelled"
+    assert client.get(f"/benchmark/jobs/{job_id}").json()["status"] == "cancelled"
+    assert client.delete(f"/benchmark/jobs/{job_id}").status_code == 409
+    assert client.delete("/benchmark/jobs/no-such-job").status_code == 404
+
+
+def test_invalid_job_parameters_are_rejected_before_submit(client, manager):
+    assert client.post("/benchmark/jobs/run", json={"n": 5}).status_code == 400
+    assert client.post("/benchmark/jobs/suite", json={"functions": ["teleport"]}).status_code == 400
+    assert client.post("/benchmark/jobs/scaling", json={"assembly": True, "assembly_sizes": [0]}).status_code == 400
+    assert manager.list() == []
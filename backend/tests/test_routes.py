@@ -0,0 +1,175 @@
+import json
+import shutil
+from pathlib import Path
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api import routes_components
+from app.db.catalog_store import CatalogSnapshot, CatalogStore
+from app.services.component_pages import ComponentPages
+
+CATALOG = Path(__file__).resolve().parent.parent / "app" / "data" / "lego_components.json"
+
+
+class _Repo:
+    def __init__(self, store: CatalogStore):
+        self.store = store
+
+    def get_snapshot(self) -> CatalogSnapshot:
+        return self.store.get()
+
+
+@pytest.fixture
+def catalog_path(tmp_path):
+    # копія каталогу: журнал змін і правки в тестах не чіпають app/data
+    path = tmp_path / "lego_components.json"
+    shutil.copy(CATALOG, path)
+    return path
+
+
+@pytest.fixture
+def client(catalog_path, monkeypatch):
+    store = CatalogStore(catalog_path)
+    monkeypatch.setattr(routes_components, "Repo", lambda: _Repo(store))
+    app = FastAPI()
+    app.include_router(routes_components.router)
+    return TestClient(app)
+
+
+def _walk(client, limit, **params):
+    """Усі сторінки за курсором: (записи, кількість сторінок)."""
+    records, pages, cursor = [], 0, None
+    while True:
+        query = dict(params, limit=limit)
+        if cursor is not None:
+            query["cursor"] = cursor
+        response = client.get("/components", params=query)
+        assert response.status_code == 200
+        records.extend(response.json())
+        pages += 1
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            return records, pages
+
+
+# ---------------- GET /components ---------------- #
+
+def test_without_parameters_returns_whole_catalog(client):
+    response = client.get("/components")
+    assert response.status_code == 200
+    assert response.json() == json.loads(CATALOG.read_text(encoding="utf-8"))
+    assert response.headers["X-Total-Count"] == str(len(response.json()))
+
+
+def test_cursor_pages_cover_catalog_in_order(client):
+    full = client.get("/components").json()
+    records, pages = _walk(client, 37)
+    assert records == full
+    assert pages == -(-len(full) // 37)
+
+
+def test_filtered_pages_match_filtered_catalog(client):
+    full = client.get("/components").json()
+    category = full[0]["category"]
+    records, _ = _walk(client, 5, category=category, fields="id,name")
+    assert [r["id"] for r in records] == [c["id"] for c in full if c["category"] == category]
+    assert all(set(r) == {"id", "name"} for r in records)
+
+
+def test_bad_fields_and_cursor_are_rejected(client):
+    assert client.get("/components", params={"fields": "id,no_such_field"}).status_code == 400
+    assert client.get("/components", params={"cursor": -12345, "limit": 5}).status_code == 400
+
+
+def test_etag_gives_304_until_catalog_changes(client, catalog_path):
+    first = client.get("/components", params={"limit": 10})
+    etag = first.headers["ETag"]
+    again = client.get("/components", params={"limit": 10}, headers={"If-None-Match": etag})
+    assert again.status_code == 304
+    assert again.content == b""
+
+    other = client.get("/components", params={"limit": 11})
+    assert other.headers["ETag"] != etag
+
+    components = json.loads(catalog_path.read_text(encoding="utf-8"))
+    components[0]["price"] += 1
+    catalog_path.write_text(json.dumps(components, ensure_ascii=False), encoding="utf-8")
+    changed = client.get("/components", params={"limit": 10}, headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.json()[0]["price"] == components[0]["price"]
+
+
+
+def test_weak_and_listed_etags_match(client):
+    etag = client.get("/components", params={"limit": 10}).headers["ETag"]
+    for header in (f"W/{etag}", f'"other", {etag}', f' W/"other" , W/{etag} ', "*"):
+        response = client.get("/components", params={"limit": 10}, headers={"If-None-Match": header})
+        assert response.status_code == 304, header
+    assert client.get("/components", params={"limit": 10}, headers={"If-None-Match": 'W/"other"'}).status_code == 200
+
+
+def test_gzip_representation_has_its_own_etag(client):
+    plain = client.get("/components", headers={"Accept-Encoding": "identity"})
+    packed = client.get("/components", headers={"Accept-Encoding": "gzip"})
+    assert packed.headers["Content-Encoding"] == "gzip"
+    assert packed.headers["ETag"] != plain.headers["ETag"]
+    assert packed.json() == plain.json()
+
+
+# ---------------- КУРСОР ПРИ ДУБЛІКАТАХ id ---------------- #
+
+@pytest.mark.parametrize("ids", [[1, 1, 2, 3, 3, 3, 4, 2, 5], [7, 7, 7, 7], [1, 2, 1, 2, 3]])
+@pytest.mark.parametrize("limit", [1, 2, 3])
+def test_cursor_neither_skips_nor_repeats_duplicate_ids(ids, limit):
+    snapshot = CatalogSnapshot("v", tuple({"id": i, "pos": pos, "category": "x"} for pos, i in enumerate(ids)))
+    pages = ComponentPages(snapshot)
+
+    seen, cursor = [], None
+    for _ in range(len(ids) + 1):
+        page = pages.page(cursor=cursor, limit=limit)
+        seen.extend(r["pos"] for r in json.loads(page.body))
+        cursor = page.next_cursor
+        if cursor is None:
+            break
+    assert seen == list(range(len(ids)))
+
+
+# ---------------- GET /components/changes ---------------- #
+
+def _rewrite(path, change):
+    components = json.loads(path.read_text(encoding="utf-8"))
+    components = change(components)
+    path.write_text(json.dumps(components, ensure_ascii=False), encoding="utf-8")
+    return components
+
+
+def test_changes_since_current_version_are_empty(client):
+    version = client.get("/components", params={"limit": 1}).headers["X-Catalog-Version"]
+    body = client.get("/components/changes", params={"since": version}).json()
+    assert body["full"] is False
+    assert (body["added"], body["modified"], body["removed"]) == ([], [], [])
+
+
+def test_changes_return_delta_across_versions(client, catalog_path):
+    version = client.get("/components", params={"limit": 1}).headers["X-Catalog-Version"]
+
+    def edit(components):
+        components[0]["price"] += 1
+        removed = components.pop()
+        components.append(dict(removed, id=10 ** 6))
+        return components
+
+    components = _rewrite(catalog_path, edit)
+    body = client.get("/components/changes", params={"since": version, "fields": "id,price"}).json()
+    assert body["full"] is False
+    assert body["added"] == [{"id": 10 ** 6, "price": components[-1]["price"]}]
+    assert body["modified"] == [{"id": components[0]["id"], "price": components[0]["price"]}]
+    assert len(body["removed"]) == 1
+
+
+def test_unknown_version_gets_full_snapshot(client):
+    body = client.get("/components/changes", params={"since": "no-such-version"}).json()
+    assert body["full"] is True
+    assert len(body["components"]) == len(client.get("/components").json())
@@ -0,0 +1,143 @@
+import itertools
+import json
+import time
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from app.models.dto import ConfigRequest
+from app.services.greedy import GreedyConfigurator
+from app.services.solver import Repair, SolverSlot, pareto_front, solve
+
+CATALOG = Path(__file__).resolve().parent.parent / "app" / "data" / "lego_components.json"
+BASELINE = Path(__file__).resolve().parent / "data" / "baseline_configure.json"
+
+
+def _instance(rng):
+    """Випадкова задача: 1–4 слоти по 1–6 кандидатів, бюджет і вага."""
+    slots = []
+    for k in range(int(rng.integers(1, 5))):
+        n = int(rng.integers(1, 7))
+        score = np.sort(rng.uniform(0, 1, n))[::-1]  # кандидати — за спаданням оцінки
+        slots.append(SolverSlot(
+            str(k), int(rng.integers(1, 4)), np.arange(n),
+            rng.uniform(1, 50, n).round(2), rng.uniform(1, 30, n).round(1), score,
+        ))
+    return slots, float(rng.uniform(10, 300)), float(rng.uniform(10, 200))
+
+
+def _brute_force(slots, budget, weight_cap):
+    """Найкраща оцінка повним перебором (лише серед кандидатів слотів)."""
+    best = None
+    for choice in itertools.product(*[range(len(slot.rows)) for slot in slots]):
+        cost = sum(slot.cost[j] for slot, j in zip(slots, choice))
+        weight = sum(slot.weight[j] for slot, j in zip(slots, choice))
+        score = sum(slot.score[j] for slot, j in zip(slots, choice))
+        if cost <= budget and weight <= weight_cap and (best is None or score > best):
+            best = score
+    return best
+
+
+@pytest.fixture(scope="module")
+def configurator():
+    return GreedyConfigurator(json.loads(CATALOG.read_text(encoding="utf-8")))
+
+
+def _requests(**overrides):
+    cases = json.loads(BASELINE.read_text(encoding="utf-8"))
+    return [ConfigRequest(**dict(case["request"], **overrides)) for case in cases]
+
+
+# ---------------- ТОЧНИЙ ПІДБІР ---------------- #
+
+def test_branch_and_bound_matches_brute_force():
+    rng = np.random.default_rng(0)
+    for _ in range(300):
+        slots, budget, weight_cap = _instance(rng)
+        expected = _brute_force(slots, budget, weight_cap)
+        result = solve(slots, budget, weight_cap, time.perf_counter() + 5)
+        assert result["optimal"]
+        if expected is None:
+            assert result["solution"] is None
+        else:
+            solution = result["solution"]
+            assert solution.score == pytest.approx(expected)
+            assert solution.cost <= budget + 1e-9 and solution.weight <= weight_cap + 1e-9
+
+
+def test_pareto_front_is_strictly_cheaper_and_worse():
+    rng = np.random.default_rng(1)
+    for _ in range(50):
+        slots, budget, weight_cap = _instance(rng)
+        front = pareto_front(slots, budget, weight_cap, time.perf_counter() + 5)
+        assert all(a.cost > b.cost and a.score > b.score for a, b in zip(front, front[1:]))
+        if front:
+            assert front[0].score == pytest.approx(_brute_force(slots, budget, weight_cap))
+
+
+def test_exact_mode_respects_budget_and_weight(configurator):
+    for request in _requests(solver="exact", budget=6000.0):
+        result = configurator.configure(request)
+        if "error" in result:
+            continue
+        assert result["solver"]["optimal"]
+        assert result["total_price"] <= request.budget
+        assert result["total_weight"] <= request.weight
+
+
+def test_exact_mode_reports_pareto_front(configurator):
+    fronts = 0
+    for request in _requests(solver="exact", budget=6000.0, paretoFront=True):
+        result = configurator.configure(request)
+        if "error" in result:
+            continue
+        front = result["solver"]["pareto"]
+        fronts += bool(front)
+        # оцінки округлено до 4 знаків, тож сусідні точки можуть зрівнятись
+        assert all(a["total_price"] > b["total_price"] and a["score"] >= b["score"] for a, b in zip(front, front[1:]))
+        assert all(point["total_price"] <= request.budget for point in front)
+    assert fronts
+
+
+def test_unknown_solver_is_an_error(configurator):
+    assert "error" in configurator.configure(_requests(solver="magic")[0])
+
+
+# ---------------- РЕМОНТ БЮДЖЕТУ ---------------- #
+
+def test_repair_never_returns_over_cap_solution():
+    rng = np.random.default_rng(2)
+    repaired = 0
+    for _ in range(500):
+        slots, budget, weight_cap = _instance(rng)
+        solution = Repair(slots, budget, weight_cap).run()
+        if solution is None:
+            continue
+        repaired += 1
+        assert solution.cost <= budget and solution.weight <= weight_cap
+        assert solution.cost == pytest.approx(sum(s.cost[j] for s, j in zip(slots, solution.choice)))
+        assert solution.weight == pytest.approx(sum(s.weight[j] for s, j in zip(slots, solution.choice)))
+        assert solution.score <= _brute_force(slots, budget, weight_cap) + 1e-9
+    assert repaired
+
+
+def test_repaired_builds_fit_budget_and_weight(configurator):
+    repaired = 0
+    for budget in (1500.0, 3000.0, 6000.0):
+        for request in _requests(budget=budget, weight=2000.0):
+            result = configurator.configure(request)
+            if "error" in result:
+                continue
+            repaired += "repair" in result
+            assert result["total_price"] <= request.budget
+            assert result["total_weight"] <= request.weight
+    assert repaired
+
+
+def test_repair_can_be_turned_off(configurator):
+    for request in _requests(budget=3000.0, budgetRepair=False):
+        result = configurator.configure(request)
+        assert "repair" not in result
+        if "error" not in result:
+            assert result["total_price"] <= request.budget
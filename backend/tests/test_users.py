@@ -0,0 +1,59 @@
+import json
+import threading
+
+import pytest
+
+from app.db.user_store import UserExistsError, UserStore
+
+
+def _user(username, i=0):
+    return {"id": f"id-{username}-{i}", "username": username, "email": f"{username}@example.com",
+            "full_name": username, "password": "hash"}
+
+
+def test_create_and_lookup(tmp_path):
+    store = UserStore(tmp_path / "users.sqlite3", tmp_path / "users.json")
+    store.create(_user("anna"))
+    assert store.get_by_username("anna")["id"] == "id-anna-0"
+    assert store.get_by_username("nobody") is None
+    with pytest.raises(UserExistsError):
+        store.create(_user("anna", 1))
+
+
+def test_user_registered_by_another_worker_is_found(tmp_path):
+    path = tmp_path / "users.sqlite3"
+    first, second = UserStore(path, tmp_path / "users.json"), UserStore(path, tmp_path / "users.json")
+    first.create(_user("anna"))
+    assert second.get_by_username("anna")["id"] == "id-anna-0"
+    with pytest.raises(UserExistsError):
+        second.create(_user("anna", 1))
+
+
+def test_concurrent_registration_of_one_username(tmp_path):
+    store = UserStore(tmp_path / "users.sqlite3", tmp_path / "users.json")
+    results = []
+    barrier = threading.Barrier(8)
+
+    def register(i):
+        barrier.wait()
+        try:
+            store.create(_user("anna", i))
+            results.append("ok")
+        except UserExistsError:
+            results.append("exists")
+
+    threads = [threading.Thread(target=register, args=(i,)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sorted(results) == ["exists"] * 7 + ["ok"]
+    assert len(store) == 1
+
+
+def test_legacy_users_are_imported_into_empty_store(tmp_path):
+    legacy = tmp_path / "users.json"
+    legacy.write_text(json.dumps([_user("anna"), _user("bohdan"), {"username": "no-id"}]), encoding="utf-8")
+    store = UserStore(tmp_path / "users.sqlite3", legacy)
+    assert len(store) == 2
+    assert store.get_by_username("bohdan")["email"] == "bohdan@example.com"
@@ -70,7 +70,7 @@ export default function Home() {
   useEffect(() => {
     const fetchComponents = async () => {
       try {
-        const res = await fetch(`${API_URL}/components/`);
+        const res = await fetch(`${API_URL}/components?fields=list`);
         if (!res.ok) throw new Error("Помилка сервера");
         const data = await res.json();
         const list = Array.isArray(data) ? data : [];